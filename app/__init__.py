@@ -11,6 +11,8 @@ from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 import os
 from .database import db, migrate, init_db
+from .utils.response_cache import init_cache
+from .utils.json_provider import init_json_provider
 from config import Config
 
 # 创建扩展实例
@@ -22,9 +24,8 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
-    # 设置JSON编码
-    app.config['JSON_AS_ASCII'] = False
-    app.config['JSONIFY_MIMETYPE'] = 'application/json; charset=utf-8'
+    # 设置JSON编码（orjson，日期时间和枚举原生序列化，UTF-8 输出）
+    init_json_provider(app)
     
     # 配置日志记录
     if app.debug:
@@ -36,6 +37,7 @@ def create_app(config_class=Config):
     
     # 初始化扩展
     init_db(app)
+    init_cache(app)
     cors.init_app(app, origins=['http://localhost:3000', 'http://127.0.0.1:3000', 'http://localhost:3001', 'http://127.0.0.1:3001'], supports_credentials=True)
     jwt.init_app(app)
     
@@ -64,4 +66,28 @@ def create_app(config_class=Config):
     # 将socketio实例附加到app，以便其他模块可以访问
     app.socketio = socketio
     
+    # 恢复热度排行索引并启动定期检查点
+    from app.services.trending_service import init_trending
+    init_trending(app, db.session)
+    
+    # 初始化全文检索索引
+    from app.services.search_service import init_search_index
+    init_search_index(app, db.session)
+    
+    # 广场计数器为空时按业务表初始化
+    from app.services.marketplace_stats_service import init_marketplace_counters
+    init_marketplace_counters(app, db.session)
+    
+    # 执行统计时间桶为空时按历史执行记录重建
+    from app.services.execution_stats_service import init_execution_stats
+    init_execution_stats(app, db.session)
+    
+    # 启动浏览/点赞/分享计数的批量写回（同时定期清理过期的执行统计时间桶）
+    from app.services.stats_buffer_service import init_stats_buffer
+    init_stats_buffer(app, db.session)
+    
+    # 节点输入输出的模式校验方式
+    from app.services.node_schema_service import init_node_schemas
+    init_node_schemas(app)
+    
     return app
\ No newline at end of file
@@ -7,43 +7,72 @@ API路由
 from flask import jsonify, request
 from . import api_bp
 from app.models import User, Intent, Execution, ModelConfig
+from app.models.execution import EXECUTION_ROW
 from app.database import db
+from app.utils.streaming import stream_query, parse_export_format
+
+# 列表接口与导出接口共用的数据源：(查询, 序列化函数, 包装键)
+EXPORT_SOURCES = {
+    'users': (lambda: User.query.order_by(User.id), lambda user: user.to_dict(), 'users'),
+    'intents': (lambda: Intent.query.order_by(Intent.id), lambda intent: intent.to_dict(), 'intents'),
+    'executions': (lambda: EXECUTION_ROW.query(db.session).order_by(Execution.id), EXECUTION_ROW.build, 'executions'),
+    'model-configs': (lambda: ModelConfig.query.order_by(ModelConfig.id), lambda config: config.to_dict(), 'model_configs'),
+}
+
+def _stream_list(source):
+    """流式输出完整列表，响应结构保持 {key: [...], total: n}"""
+    query, serialize, key = EXPORT_SOURCES[source]
+    return stream_query(query(), serialize, fmt='json', key=key)
+
+def _stream_export(source):
+    """流式导出，format=ndjson(默认)|json"""
+    try:
+        fmt = parse_export_format(request.args.get('format'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    query, serialize, key = EXPORT_SOURCES[source]
+    return stream_query(query(), serialize, fmt=fmt, filename=key)
 
 @api_bp.route('/users', methods=['GET'])
 def get_users():
     """获取用户列表"""
-    users = User.query.all()
-    return jsonify({
-        'users': [user.to_dict() for user in users],
-        'total': len(users)
-    })
+    return _stream_list('users')
 
 @api_bp.route('/intents', methods=['GET'])
 def get_intents():
     """获取意图列表"""
-    intents = Intent.query.all()
-    return jsonify({
-        'intents': [intent.to_dict() for intent in intents],
-        'total': len(intents)
-    })
+    return _stream_list('intents')
 
 @api_bp.route('/executions', methods=['GET'])
 def get_executions():
     """获取执行列表"""
-    executions = Execution.query.all()
-    return jsonify({
-        'executions': [execution.to_dict() for execution in executions],
-        'total': len(executions)
-    })
+    return _stream_list('executions')
 
 @api_bp.route('/model-configs', methods=['GET'])
 def get_model_configs():
     """获取模型配置列表"""
-    configs = ModelConfig.query.all()
-    return jsonify({
-        'model_configs': [config.to_dict() for config in configs],
-        'total': len(configs)
-    })
+    return _stream_list('model-configs')
+
+@api_bp.route('/users/export', methods=['GET'])
+def export_users():
+    """导出用户"""
+    return _stream_export('users')
+
+@api_bp.route('/intents/export', methods=['GET'])
+def export_intents():
+    """导出意图"""
+    return _stream_export('intents')
+
+@api_bp.route('/executions/export', methods=['GET'])
+def export_executions():
+    """导出执行记录"""
+    return _stream_export('executions')
+
+@api_bp.route('/model-configs/export', methods=['GET'])
+def export_model_configs():
+    """导出模型配置"""
+    return _stream_export('model-configs')
 
 @api_bp.route('/chat', methods=['POST'])
 def chat():
@@ -10,7 +10,9 @@ import logging
 
 from . import api_v1
 from app.services.execution_service import ExecutionService
+from app.models.workflow_execution import WORKFLOW_EXECUTION_ROW, NODE_EXECUTION_ROW
 from app.database import db
+from app.utils.streaming import stream_query, parse_export_format
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +54,7 @@ def get_executions():
         size = int(request.args.get('size', 20))
         workflow_id = request.args.get('workflow_id')
         status = request.args.get('status')
+        cursor = request.args.get('cursor')
         
         service = ExecutionService(db.session)
         result = service.get_executions(
@@ -59,15 +62,59 @@ def get_executions():
             page=page,
             size=size,
             workflow_id=workflow_id,
-            status=status
+            status=status,
+            cursor=cursor
         )
         
         return jsonify(success_response(result))
         
+    except ValueError as e:
+        return jsonify(error_response(str(e), 400)), 400
     except Exception as e:
         logger.error(f"Error in get_executions: {str(e)}")
         return jsonify(error_response('获取执行记录失败', 500)), 500
 
+@api_v1.route('/executions/export', methods=['GET'])
+@require_auth
+def export_executions():
+    """流式导出执行记录，format=ndjson(默认)|json"""
+    try:
+        fmt = parse_export_format(request.args.get('format'))
+        service = ExecutionService(db.session)
+        query = service.export_executions_query(
+            user_id=g.user_id,
+            workflow_id=request.args.get('workflow_id'),
+            status=request.args.get('status')
+        )
+        return stream_query(query, WORKFLOW_EXECUTION_ROW.build, fmt=fmt, filename='executions')
+
+    except ValueError as e:
+        return jsonify(error_response(str(e), 400)), 400
+    except Exception as e:
+        logger.error(f"Error in export_executions: {str(e)}")
+        return jsonify(error_response('导出执行记录失败', 500)), 500
+
+@api_v1.route('/node-executions/export', methods=['GET'])
+@require_auth
+def export_node_executions():
+    """流式导出节点执行记录，format=ndjson(默认)|json"""
+    try:
+        fmt = parse_export_format(request.args.get('format'))
+        service = ExecutionService(db.session)
+        query = service.export_node_executions_query(
+            user_id=g.user_id,
+            workflow_id=request.args.get('workflow_id'),
+            status=request.args.get('status'),
+            execution_id=request.args.get('execution_id')
+        )
+        return stream_query(query, NODE_EXECUTION_ROW.build, fmt=fmt, filename='node_executions')
+
+    except ValueError as e:
+        return jsonify(error_response(str(e), 400)), 400
+    except Exception as e:
+        logger.error(f"Error in export_node_executions: {str(e)}")
+        return jsonify(error_response('导出节点执行记录失败', 500)), 500
+
 @api_v1.route('/executions/<execution_id>', methods=['GET'])
 @require_auth
 def get_execution(execution_id):
@@ -128,6 +175,8 @@ def get_execution_stats():
         
         return jsonify(success_response(result))
         
+    except ValueError as e:
+        return jsonify(error_response(str(e))), 400
     except Exception as e:
         logger.error(f"Error in get_execution_stats: {str(e)}")
         return jsonify(error_response('获取执行统计失败', 500)), 500
\ No newline at end of file
@@ -10,6 +10,7 @@ import logging
 from . import api_v1
 from app.services.node_service import NodeService
 from app.database import db
+from app.utils.http_cache import etag_matches, not_modified, with_etag, PUBLIC_REVALIDATE
 
 logger = logging.getLogger(__name__)
 
@@ -34,9 +35,15 @@ def get_node_types():
     """获取节点类型列表"""
     try:
         service = NodeService(db.session)
+        
+        # 目录未变化时直接返回304
+        etag = service.get_node_types_etag()
+        if etag_matches(etag):
+            return not_modified(etag, PUBLIC_REVALIDATE)
+        
         result = service.get_node_types()
         
-        return jsonify(success_response(result))
+        return with_etag(jsonify(success_response(result)), etag, PUBLIC_REVALIDATE)
         
     except Exception as e:
         logger.error(f"Error in get_node_types: {str(e)}")
@@ -47,9 +54,14 @@ def get_node_type(type_id):
     """获取节点类型详情"""
     try:
         service = NodeService(db.session)
+        
+        etag = service.get_node_type_etag(type_id)
+        if etag_matches(etag):
+            return not_modified(etag, PUBLIC_REVALIDATE)
+        
         result = service.get_node_type_detail(type_id)
         
-        return jsonify(success_response(result))
+        return with_etag(jsonify(success_response(result)), etag, PUBLIC_REVALIDATE)
         
     except ValueError as e:
         return jsonify(error_response(str(e), 404)), 404
@@ -4,13 +4,18 @@
 API v1 工作流管理路由
 """
 
-from flask import request, jsonify, g
+from flask import request, jsonify, g, current_app
 from functools import wraps
 import logging
 
 from . import api_v1
 from app.services.workflow_service import WorkflowService
+from app.services.graph_patch import VersionConflictError
 from app.database import db
+from app.utils.http_cache import (
+    etag_matches, not_modified, with_etag, short_lived, PUBLIC_REVALIDATE, PRIVATE_REVALIDATE
+)
+from app.utils.viewer import get_viewer_key
 
 logger = logging.getLogger(__name__)
 
@@ -52,17 +57,23 @@ def get_workflows():
         size = int(request.args.get('size', 20))
         category = request.args.get('category')
         status = request.args.get('status')
+        cursor = request.args.get('cursor')
+        fields = request.args.get('fields')
         
         service = WorkflowService(db.session)
         result = service.get_workflows(
             page=page,
             size=size,
             category=category,
-            status=status
+            status=status,
+            cursor=cursor,
+            fields=fields
         )
         
         return jsonify(success_response(result))
         
+    except ValueError as e:
+        return jsonify(error_response(str(e), 400)), 400
     except Exception as e:
         logger.error(f"Error in get_workflows: {str(e)}")
         return jsonify(error_response('获取工作流列表失败', 500)), 500
@@ -94,9 +105,19 @@ def get_workflow(workflow_id):
         user_id = getattr(g, 'user_id', None)
         
         service = WorkflowService(db.session)
-        result = service.get_workflow_detail(workflow_id, user_id)
         
-        return jsonify(success_response(result))
+        # 客户端缓存仍然有效时直接返回304，不加载工作流内容，但仍计入浏览；
+        # 附带的统计不参与 ETag，因此是弱 ETag，最新计数见 /workflows/<workflow_id>/stats
+        viewer_key = get_viewer_key()
+        etag, is_listed, category = service.get_workflow_etag(workflow_id, user_id)
+        cache_control = PUBLIC_REVALIDATE if is_listed else PRIVATE_REVALIDATE
+        if etag_matches(etag):
+            service.record_view(workflow_id, category, is_listed, user_id, viewer_key)
+            return not_modified(etag, cache_control, weak=True)
+        
+        result = service.get_workflow_detail(workflow_id, user_id, viewer_key)
+        
+        return with_etag(jsonify(success_response(result)), etag, cache_control, weak=True)
         
     except ValueError as e:
         return jsonify(error_response(str(e), 404)), 404
@@ -104,6 +125,23 @@ def get_workflow(workflow_id):
         logger.error(f"Error in get_workflow: {str(e)}")
         return jsonify(error_response('获取工作流详情失败', 500)), 500
 
+@api_v1.route('/workflows/<workflow_id>/stats', methods=['GET'])
+def get_workflow_stats(workflow_id):
+    """获取工作流的统计计数（短时间可直接缓存）"""
+    try:
+        service = WorkflowService(db.session)
+        stats, is_listed = service.get_workflow_stats(workflow_id, getattr(g, 'user_id', None))
+        
+        response = jsonify(success_response(stats))
+        response.headers['Cache-Control'] = short_lived(is_listed, current_app.config.get('STATS_MAX_AGE', 5))
+        return response
+        
+    except ValueError as e:
+        return jsonify(error_response(str(e), 404)), 404
+    except Exception as e:
+        logger.error(f"Error in get_workflow_stats: {str(e)}")
+        return jsonify(error_response('获取工作流统计失败', 500)), 500
+
 @api_v1.route('/workflows/<workflow_id>', methods=['PUT'])
 @require_auth
 def update_workflow(workflow_id):
@@ -124,6 +162,30 @@ def update_workflow(workflow_id):
         logger.error(f"Error in update_workflow: {str(e)}")
         return jsonify(error_response('更新工作流失败', 500)), 500
 
+@api_v1.route('/workflows/<workflow_id>/graph', methods=['PATCH'])
+@require_auth
+def patch_workflow_graph(workflow_id):
+    """增量修改工作流的节点和连接（乐观锁：请求需携带当前版本号）"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify(error_response('请求数据不能为空')), 400
+        
+        service = WorkflowService(db.session)
+        result = service.patch_workflow_graph(workflow_id, data, g.user_id)
+        
+        return jsonify(success_response(result, '修改工作流成功'))
+        
+    except VersionConflictError as e:
+        response = error_response(str(e), 409)
+        response['data'] = {'current_version': e.current_version}
+        return jsonify(response), 409
+    except ValueError as e:
+        return jsonify(error_response(str(e))), 400
+    except Exception as e:
+        logger.error(f"Error in patch_workflow_graph: {str(e)}")
+        return jsonify(error_response('修改工作流失败', 500)), 500
+
 @api_v1.route('/workflows/<workflow_id>', methods=['DELETE'])
 @require_auth
 def delete_workflow(workflow_id):
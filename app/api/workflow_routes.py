@@ -4,13 +4,21 @@
 工作流API路由
 """
 
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, request, jsonify, g, current_app
 from functools import wraps
 import logging
 
 from app.services.workflow_service import WorkflowService
+from app.services.graph_patch import VersionConflictError
+from app.services.workflow_archive import WorkflowArchiveService, parse_id_list
 from app.database import db
 from app.models.workflow import WorkflowCategory
+from app.utils.response_cache import response_cache
+from app.utils.streaming import stream_response, GZIP_MIMETYPE
+from app.utils.viewer import get_viewer_key
+from app.utils.http_cache import (
+    etag_matches, not_modified, with_etag, short_lived, PUBLIC_REVALIDATE, PRIVATE_REVALIDATE
+)
 
 logger = logging.getLogger(__name__)
 
@@ -43,10 +51,13 @@ def search_workflows():
         query = request.args.get('q', '')
         category = request.args.get('category')
         tags = request.args.get('tags', '').split(',') if request.args.get('tags') else []
-        sort_by = request.args.get('sort_by', 'created_at')
+        sort_by = request.args.get('sort_by', 'relevance' if query else 'created_at')
         order = request.args.get('order', 'desc')
+        tag_match = request.args.get('tag_match', 'all')
         page = int(request.args.get('page', 1))
         size = int(request.args.get('size', 20))
+        cursor = request.args.get('cursor')
+        fields = request.args.get('fields')
         
         # 调用服务层
         service = WorkflowService(db.session)
@@ -57,7 +68,10 @@ def search_workflows():
             sort_by=sort_by,
             order=order,
             page=page,
-            size=size
+            size=size,
+            tag_match=tag_match,
+            cursor=cursor,
+            fields=fields
         )
         
         return jsonify({
@@ -65,6 +79,11 @@ def search_workflows():
             'data': result
         })
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Error in search_workflows: {str(e)}")
         return jsonify({
@@ -111,12 +130,21 @@ def get_workflow_detail(workflow_id):
         user_id = get_current_user()  # 可选的用户ID
         
         service = WorkflowService(db.session)
-        result = service.get_workflow_detail(workflow_id, user_id)
         
-        return jsonify({
+        # 客户端缓存仍然有效时直接返回304，不加载工作流内容，但仍计入浏览；
+        # 附带的统计不参与 ETag，因此是弱 ETag，最新计数见 /<workflow_id>/stats
+        etag, is_listed, category = service.get_workflow_etag(workflow_id, user_id)
+        cache_control = PUBLIC_REVALIDATE if is_listed else PRIVATE_REVALIDATE
+        if etag_matches(etag):
+            service.record_view(workflow_id, category, is_listed, user_id, get_viewer_key())
+            return not_modified(etag, cache_control, weak=True)
+        
+        result = service.get_workflow_detail(workflow_id, user_id, get_viewer_key())
+        
+        return with_etag(jsonify({
             'success': True,
             'data': result
-        })
+        }), etag, cache_control, weak=True)
         
     except ValueError as e:
         return jsonify({
@@ -130,6 +158,120 @@ def get_workflow_detail(workflow_id):
             'error': '获取工作流详情失败'
         }), 500
 
+@workflow_bp.route('/<workflow_id>/stats', methods=['GET'])
+def get_workflow_stats(workflow_id):
+    """获取工作流的统计计数（短时间可直接缓存）"""
+    try:
+        service = WorkflowService(db.session)
+        stats, is_listed = service.get_workflow_stats(workflow_id, get_current_user())
+        
+        response = jsonify({
+            'success': True,
+            'data': stats
+        })
+        response.headers['Cache-Control'] = short_lived(is_listed, current_app.config.get('STATS_MAX_AGE', 5))
+        return response
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 404
+    except Exception as e:
+        logger.error(f"Error in get_workflow_stats: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': '获取工作流统计失败'
+        }), 500
+
+@workflow_bp.route('/<workflow_id>/viewport', methods=['GET'])
+def get_workflow_viewport(workflow_id):
+    """按视口获取工作流的节点和连接（大型画布的首屏加载）"""
+    try:
+        user_id = get_current_user()  # 可选的用户ID
+        
+        service = WorkflowService(db.session)
+        result = service.get_workflow_viewport(workflow_id, request.args.get('bbox'), user_id)
+        
+        return jsonify({
+            'success': True,
+            'data': result
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error in get_workflow_viewport: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': '获取工作流视口失败'
+        }), 500
+
+@workflow_bp.route('/batch-get', methods=['POST'])
+def batch_get_workflows():
+    """按ID批量获取工作流详情"""
+    try:
+        data = request.get_json(silent=True) or {}
+        user_id = get_current_user()  # 可选的用户ID
+        
+        service = WorkflowService(db.session)
+        result = service.get_workflows_batch(
+            data.get('ids'),
+            user_id,
+            include_graph=bool(data.get('include_graph', True))
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': result
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error in batch_get_workflows: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': '批量获取工作流失败'
+        }), 500
+
+@workflow_bp.route('/batch', methods=['POST'])
+@require_auth
+def batch_update_workflows():
+    """在一个事务中批量发布、归档或删除工作流，返回逐项结果"""
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        service = WorkflowService(db.session)
+        result = service.batch_update_workflows(
+            data.get('operations'),
+            g.user_id,
+            atomic=bool(data.get('atomic', False))
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': result
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error in batch_update_workflows: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': '批量操作工作流失败'
+        }), 500
+
 @workflow_bp.route('/<workflow_id>', methods=['PUT'])
 @require_auth
 def update_workflow(workflow_id):
@@ -156,6 +298,76 @@ def update_workflow(workflow_id):
             'error': '更新工作流失败'
         }), 500
 
+@workflow_bp.route('/<workflow_id>/graph', methods=['PATCH'])
+@require_auth
+def patch_workflow_graph(workflow_id):
+    """增量修改工作流的节点和连接（乐观锁：请求需携带当前版本号）"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': '请求数据不能为空'}), 400
+        
+        service = WorkflowService(db.session)
+        result = service.patch_workflow_graph(workflow_id, data, g.user_id)
+        
+        return jsonify({
+            'success': True,
+            'data': result
+        })
+        
+    except VersionConflictError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'current_version': e.current_version
+        }), 409
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error in patch_workflow_graph: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': '修改工作流失败'
+        }), 500
+
+@workflow_bp.route('/<workflow_id>/layout', methods=['POST'])
+@require_auth
+def layout_workflow(workflow_id):
+    """服务端自动布局（乐观锁：请求需携带当前版本号）"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': '请求数据不能为空'}), 400
+        
+        service = WorkflowService(db.session)
+        result = service.layout_workflow(workflow_id, data, g.user_id)
+        
+        return jsonify({
+            'success': True,
+            'data': result
+        })
+        
+    except VersionConflictError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'current_version': e.current_version
+        }), 409
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error in layout_workflow: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': '自动布局失败'
+        }), 500
+
 @workflow_bp.route('/<workflow_id>', methods=['DELETE'])
 @require_auth
 def delete_workflow(workflow_id):
@@ -200,6 +412,79 @@ def fork_workflow(workflow_id):
             'error': '复制工作流失败'
         }), 500
 
+@workflow_bp.route('/export', methods=['GET'])
+@require_auth
+def export_workflows():
+    """批量导出工作流及模板（gzip 压缩的 NDJSON 归档，流式输出）"""
+    try:
+        workflow_ids = parse_id_list(request.args.get('ids'), '工作流ID')
+        template_ids = parse_id_list(request.args.get('template_ids'), '模板ID')
+        
+        service = WorkflowArchiveService(db.session)
+        chunks = service.export_archive(workflow_ids, template_ids, g.user_id)
+        
+        return stream_response(chunks, GZIP_MIMETYPE, 'workflows.ndjson.gz')
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error in export_workflows: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': '导出工作流失败'
+        }), 500
+
+@workflow_bp.route('/import', methods=['POST'])
+@require_auth
+def import_workflows():
+    """批量导入工作流归档（请求体按块读取，可为 gzip 压缩）"""
+    try:
+        service = WorkflowArchiveService(db.session)
+        result = service.import_archive(request.stream, g.user_id)
+        
+        return jsonify({
+            'success': True,
+            'data': result
+        }), 201
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error in import_workflows: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': '导入工作流失败'
+        }), 500
+
+@workflow_bp.route('/templates/<template_id>/instantiate', methods=['POST'])
+@require_auth
+def instantiate_template(template_id):
+    """由模板创建工作流"""
+    try:
+        data = request.get_json(silent=True) or {}
+        service = WorkflowService(db.session)
+        result = service.instantiate_template(template_id, g.user_id, data)
+        
+        return jsonify(result), 201
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error in instantiate_template: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': '由模板创建工作流失败'
+        }), 500
+
 @workflow_bp.route('/<workflow_id>/publish', methods=['POST'])
 @require_auth
 def publish_workflow(workflow_id):
@@ -254,6 +539,34 @@ def rate_workflow(workflow_id):
             'error': '评价工作流失败'
         }), 500
 
+@workflow_bp.route('/<workflow_id>/actions', methods=['POST'])
+def record_workflow_action(workflow_id):
+    """记录点赞、分享等行为"""
+    try:
+        data = request.get_json()
+        if not data or not data.get('action'):
+            return jsonify({'error': '行为类型不能为空'}), 400
+        
+        service = WorkflowService(db.session)
+        result = service.record_action(workflow_id, data['action'], get_current_user(), get_viewer_key())
+        
+        return jsonify({
+            'success': True,
+            'data': result
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error in record_workflow_action: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': '记录行为失败'
+        }), 500
+
 @workflow_bp.route('/trending', methods=['GET'])
 def get_trending_workflows():
     """获取热门工作流"""
@@ -261,15 +574,21 @@ def get_trending_workflows():
         category = request.args.get('category')
         time_range = request.args.get('time_range', '7d')
         limit = int(request.args.get('limit', 20))
+        fields = request.args.get('fields')
         
         service = WorkflowService(db.session)
-        result = service.get_trending_workflows(category, time_range, limit)
+        result = service.get_trending_workflows(category, time_range, limit, fields)
         
         return jsonify({
             'success': True,
             'data': result
         })
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Error in get_trending_workflows: {str(e)}")
         return jsonify({
@@ -284,15 +603,22 @@ def get_my_workflows():
     try:
         page = int(request.args.get('page', 1))
         size = int(request.args.get('size', 20))
+        cursor = request.args.get('cursor')
+        fields = request.args.get('fields')
         
         service = WorkflowService(db.session)
-        result = service.get_user_workflows(g.user_id, page, size)
+        result = service.get_user_workflows(g.user_id, page, size, cursor, fields)
         
         return jsonify({
             'success': True,
             'data': result
         })
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Error in get_my_workflows: {str(e)}")
         return jsonify({
@@ -304,10 +630,10 @@ def get_my_workflows():
 def get_categories():
     """获取工作流分类"""
     try:
-        categories = [{
+        categories = response_cache.get_or_load('workflow_categories', [], lambda: [{
             'value': category.value,
             'label': category.value.replace('_', ' ').title()
-        } for category in WorkflowCategory]
+        } for category in WorkflowCategory])
         
         return jsonify({
             'success': True,
@@ -325,17 +651,8 @@ def get_categories():
 def get_marketplace_stats():
     """获取工作流广场统计信息"""
     try:
-        # 统计信息查询
-        
-        # 这里可以添加统计查询逻辑
-        # 例如：总工作流数、活跃用户数、热门分类等
-        
-        stats = {
-            'total_workflows': 0,
-            'total_users': 0,
-            'total_forks': 0,
-            'popular_categories': []
-        }
+        service = WorkflowService(db.session)
+        stats = service.get_marketplace_stats()
         
         return jsonify({
             'success': True,
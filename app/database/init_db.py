@@ -22,6 +22,7 @@ from app.models import (
     WorkflowTemplate
 )
 from app.core.security import get_password_hash
+from app.services.template_service import TemplateService
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -559,17 +560,10 @@ class DatabaseInitializer:
             }
         ]
         
+        # 保存时预编译为图快照，由模板创建工作流时直接引用
+        template_service = TemplateService(session)
         for template_data in templates_data:
-            template = WorkflowTemplate(
-                name=template_data['name'],
-                description=template_data['description'],
-                category=template_data['category'],
-                tags=template_data['tags'],
-                template_data=template_data['template_data'],
-                is_featured=template_data['is_featured'],
-                is_public=template_data['is_public']
-            )
-            session.add(template)
+            template_service.create_template(template_data)
         
         logger.info(f"创建 {len(templates_data)} 个工作流模板")
 
@@ -5,10 +5,13 @@
 """
 
 from .user import User, UserRole, UserStatus
-from .workflow import Workflow, WorkflowStatus, ActionType, WorkflowCategory, WorkflowReview, WorkflowStats, WorkflowCollection, WorkflowTag
+from .workflow import Workflow, WorkflowStatus, ActionType, WorkflowCategory, WorkflowReview, WorkflowStats, WorkflowCollection, WorkflowLike, WorkflowTag, WorkflowTagLink, WorkflowGraphSnapshot
 from .node import Node, Connection, NodeType
 from .file_storage import FileStorage, FileType
 from .workflow_execution import WorkflowExecution, NodeExecution, ExecutionStatus, TriggerType
+from .execution_stats import ExecutionStatsBucket, StatsScope, StatsGranularity
+from .trending import TrendingScore
+from .marketplace import MarketplaceCounter
 from .template import WorkflowTemplate, SystemConfig
 from .execution import Execution
 from .intent import Intent
@@ -19,10 +22,12 @@ from .model_call_log import ModelCallLog
 
 __all__ = [
     'User', 'UserRole', 'UserStatus',
-    'Workflow', 'WorkflowStatus', 'ActionType', 'WorkflowCategory', 'WorkflowReview', 'WorkflowStats', 'WorkflowCollection', 'WorkflowTag',
+    'Workflow', 'WorkflowStatus', 'ActionType', 'WorkflowCategory', 'WorkflowReview', 'WorkflowStats', 'WorkflowCollection', 'WorkflowLike', 'WorkflowTag', 'WorkflowTagLink', 'WorkflowGraphSnapshot',
     'Node', 'Connection', 'NodeType',
     'FileStorage', 'FileType',
     'WorkflowExecution', 'NodeExecution', 'ExecutionStatus', 'TriggerType',
+    'ExecutionStatsBucket', 'StatsScope', 'StatsGranularity',
+    'TrendingScore', 'MarketplaceCounter',
     'WorkflowTemplate', 'SystemConfig',
     'Execution',
     'Intent',
@@ -6,6 +6,7 @@
 
 from datetime import datetime
 from app.database import db
+from app.utils.row_serializer import RowSerializer
 
 class Execution(db.Model):
     """执行模型"""
@@ -43,4 +44,7 @@ class Execution(db.Model):
     def __repr__(self):
         return f'<Execution {self.id} - {self.status}>'
 
+# 列表读路径的行映射，字段顺序与 to_dict 一致
+EXECUTION_ROW = RowSerializer(Execution)
+
 # WorkflowExecution 模型已移动到 workflow_execution.py 文件中
\ No newline at end of file
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+执行统计汇总模型
+"""
+
+from datetime import datetime
+from app.database import db
+from sqlalchemy import BigInteger, DateTime, Integer, Float, Enum, Index, UniqueConstraint
+import enum
+
+from .workflow_execution import ExecutionStatus
+
+# 执行时长直方图的桶上界(秒)，最后一个桶收纳所有更长的执行
+DURATION_HISTOGRAM_BOUNDS = [0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300]
+
+class StatsScope(str, enum.Enum):
+    """统计维度枚举"""
+    USER = "user"
+    WORKFLOW = "workflow"
+
+class StatsGranularity(str, enum.Enum):
+    """统计时间粒度枚举"""
+    MINUTE = "minute"
+    HOUR = "hour"
+    DAY = "day"
+
+class ExecutionStatsBucket(db.Model):
+    """执行统计时间桶模型
+
+    每行记录某个用户或工作流在一个时间桶内、某一执行状态下的执行次数、
+    时长总和与时长直方图，执行结束时增量更新。
+    """
+    __tablename__ = 'execution_stats_buckets'
+    __table_args__ = (
+        UniqueConstraint('scope', 'scope_id', 'granularity', 'bucket_start', 'status',
+                         name='uq_execution_stats_bucket'),
+        Index('ix_execution_stats_lookup', 'scope', 'scope_id', 'granularity', 'bucket_start'),
+    )
+
+    id = db.Column(BigInteger, primary_key=True, autoincrement=True)
+    scope = db.Column(Enum(StatsScope), nullable=False, comment='统计维度')
+    scope_id = db.Column(BigInteger, nullable=False, comment='用户ID或工作流ID')
+    granularity = db.Column(Enum(StatsGranularity), nullable=False, comment='时间粒度')
+    bucket_start = db.Column(DateTime, nullable=False, comment='时间桶起点')
+    status = db.Column(Enum(ExecutionStatus), nullable=False, comment='执行状态')
+    execution_count = db.Column(Integer, default=0, comment='执行次数')
+    duration_sum = db.Column(Float, default=0.0, comment='执行时长总和(秒)')
+    duration_max = db.Column(Float, default=0.0, comment='最长执行时长(秒)')
+    duration_histogram = db.Column(db.JSON, comment='执行时长直方图')
+    updated_at = db.Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment='更新时间')
+
+    def add_duration(self, duration):
+        """累加一次执行"""
+        self.execution_count = (self.execution_count or 0) + 1
+        if duration is None:
+            return
+
+        self.duration_sum = (self.duration_sum or 0.0) + duration
+        self.duration_max = max(self.duration_max or 0.0, duration)
+
+        # JSON列需要整体赋值才能被识别为已修改
+        histogram = list(self.duration_histogram or [0] * (len(DURATION_HISTOGRAM_BOUNDS) + 1))
+        histogram[histogram_index(duration)] += 1
+        self.duration_histogram = histogram
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'scope': self.scope.value if self.scope else None,
+            'scope_id': self.scope_id,
+            'granularity': self.granularity.value if self.granularity else None,
+            'bucket_start': self.bucket_start.isoformat() if self.bucket_start else None,
+            'status': self.status.value if self.status else None,
+            'execution_count': self.execution_count,
+            'duration_sum': self.duration_sum,
+            'duration_max': self.duration_max,
+            'duration_histogram': self.duration_histogram,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f'<ExecutionStatsBucket {self.scope}:{self.scope_id} {self.granularity} {self.bucket_start}>'
+
+def histogram_index(duration):
+    """返回执行时长所属的直方图桶下标"""
+    for index, bound in enumerate(DURATION_HISTOGRAM_BOUNDS):
+        if duration <= bound:
+            return index
+    return len(DURATION_HISTOGRAM_BOUNDS)
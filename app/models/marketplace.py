@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流广场计数器模型
+"""
+
+from datetime import datetime
+from app.database import db
+from sqlalchemy import BigInteger, String, DateTime
+
+class MarketplaceCounter(db.Model):
+    """工作流广场物化计数器
+
+    以键值形式保存广场统计（已发布工作流数、作者数、复制次数、各分类
+    工作流数等），在创建、发布、复制、删除的事务中同步增减。
+    """
+    __tablename__ = 'marketplace_counters'
+
+    id = db.Column(BigInteger, primary_key=True, autoincrement=True)
+    name = db.Column(String(100), unique=True, nullable=False, comment='计数器名称')
+    value = db.Column(BigInteger, nullable=False, default=0, comment='计数值')
+    updated_at = db.Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment='更新时间')
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'value': self.value,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f'<MarketplaceCounter {self.name}={self.value}>'
@@ -5,14 +5,63 @@
 """
 
 from datetime import datetime
+import math
 from app.database import db
-from sqlalchemy import BigInteger, String, Text, DateTime, Boolean, Integer, Float, Enum, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import BigInteger, String, Text, DateTime, Boolean, Integer, Float, Enum, ForeignKey, Index
+from sqlalchemy.orm import relationship, validates
 import enum
 
+# 节点空间网格的单元边长（画布坐标），按视口读取节点时按单元定位
+NODE_GRID_SIZE = 512
+
+def grid_cell(value):
+    """画布坐标所在的网格单元（向下取整，负坐标同样适用）"""
+    return math.floor((value or 0) / NODE_GRID_SIZE)
+
+def serialize_node(node):
+    """序列化节点（Node 实例或 nodes 表的查询行）"""
+    return {
+        'id': node.id,
+        'workflow_id': node.workflow_id,
+        'node_type': node.node_type,
+        'name': node.name,
+        'description': node.description,
+        'position': {
+            'x': node.position_x,
+            'y': node.position_y
+        },
+        'config': node.config,
+        'input_schema': node.input_schema,
+        'output_schema': node.output_schema,
+        'validation_rules': node.validation_rules,
+        'retry_count': node.retry_count,
+        'timeout': node.timeout,
+        'is_enabled': node.is_enabled,
+        'created_at': node.created_at.isoformat() if node.created_at else None,
+        'updated_at': node.updated_at.isoformat() if node.updated_at else None
+    }
+
+def serialize_connection(connection):
+    """序列化连接线（Connection 实例或 connections 表的查询行）"""
+    return {
+        'id': connection.id,
+        'workflow_id': connection.workflow_id,
+        'source_node_id': connection.source_node_id,
+        'target_node_id': connection.target_node_id,
+        'source_handle': connection.source_handle,
+        'target_handle': connection.target_handle,
+        'condition': connection.condition,
+        'is_enabled': connection.is_enabled,
+        'created_at': connection.created_at.isoformat() if connection.created_at else None
+    }
+
 class Node(db.Model):
     """节点模型"""
     __tablename__ = 'nodes'
+    __table_args__ = (
+        # 视口查询：每个网格列一段 grid_y 区间
+        Index('ix_nodes_workflow_grid', 'workflow_id', 'grid_x', 'grid_y'),
+    )
     
     id = db.Column(BigInteger, primary_key=True, autoincrement=True)
     workflow_id = db.Column(BigInteger, ForeignKey('workflows.id'), nullable=False, comment='所属工作流ID')
@@ -21,6 +70,8 @@ class Node(db.Model):
     description = db.Column(Text, comment='节点描述')
     position_x = db.Column(Float, default=0, comment='X坐标')
     position_y = db.Column(Float, default=0, comment='Y坐标')
+    grid_x = db.Column(Integer, default=0, comment='空间网格列（随X坐标维护）')
+    grid_y = db.Column(Integer, default=0, comment='空间网格行（随Y坐标维护）')
     config = db.Column(db.JSON, comment='节点配置')
     input_schema = db.Column(db.JSON, comment='输入模式')
     output_schema = db.Column(db.JSON, comment='输出模式')
@@ -36,28 +87,38 @@ class Node(db.Model):
     input_connections = relationship("Connection", foreign_keys="Connection.target_node_id", back_populates="target_node")
     output_connections = relationship("Connection", foreign_keys="Connection.source_node_id", back_populates="source_node")
     
+    @validates('position_x', 'position_y')
+    def _update_grid(self, key, value):
+        """坐标变化时同步网格单元"""
+        setattr(self, 'grid_x' if key == 'position_x' else 'grid_y', grid_cell(value))
+        return value
+
+    @classmethod
+    def from_data(cls, workflow_id, node_data):
+        """由请求数据构造节点（position 为 {x, y}，也接受 position_x / position_y）"""
+        position = node_data.get('position') or {}
+        node_type = node_data.get('node_type') or node_data.get('type')
+        if not node_type:
+            raise ValueError('节点类型不能为空')
+        return cls(
+            workflow_id=workflow_id,
+            node_type=node_type,
+            name=node_data.get('name') or node_type,
+            description=node_data.get('description'),
+            position_x=position.get('x', node_data.get('position_x', 0)),
+            position_y=position.get('y', node_data.get('position_y', 0)),
+            config=node_data.get('config'),
+            input_schema=node_data.get('input_schema'),
+            output_schema=node_data.get('output_schema'),
+            validation_rules=node_data.get('validation_rules'),
+            retry_count=node_data.get('retry_count', 0),
+            timeout=node_data.get('timeout', 30),
+            is_enabled=node_data.get('is_enabled', True)
+        )
+
     def to_dict(self):
         """转换为字典"""
-        return {
-            'id': self.id,
-            'workflow_id': self.workflow_id,
-            'node_type': self.node_type,
-            'name': self.name,
-            'description': self.description,
-            'position': {
-                'x': self.position_x,
-                'y': self.position_y
-            },
-            'config': self.config,
-            'input_schema': self.input_schema,
-            'output_schema': self.output_schema,
-            'validation_rules': self.validation_rules,
-            'retry_count': self.retry_count,
-            'timeout': self.timeout,
-            'is_enabled': self.is_enabled,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+        return serialize_node(self)
     
     def __repr__(self):
         return f'<Node {self.name} ({self.node_type})>'
@@ -81,19 +142,22 @@ class Connection(db.Model):
     source_node = relationship("Node", foreign_keys=[source_node_id], back_populates="output_connections")
     target_node = relationship("Node", foreign_keys=[target_node_id], back_populates="input_connections")
     
+    @classmethod
+    def from_data(cls, workflow_id, source_node_id, target_node_id, connection_data):
+        """由请求数据构造连接，端点为已解析的节点ID"""
+        return cls(
+            workflow_id=workflow_id,
+            source_node_id=source_node_id,
+            target_node_id=target_node_id,
+            source_handle=connection_data.get('source_handle'),
+            target_handle=connection_data.get('target_handle'),
+            condition=connection_data.get('condition'),
+            is_enabled=connection_data.get('is_enabled', True)
+        )
+
     def to_dict(self):
         """转换为字典"""
-        return {
-            'id': self.id,
-            'workflow_id': self.workflow_id,
-            'source_node_id': self.source_node_id,
-            'target_node_id': self.target_node_id,
-            'source_handle': self.source_handle,
-            'target_handle': self.target_handle,
-            'condition': self.condition,
-            'is_enabled': self.is_enabled,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+        return serialize_connection(self)
     
     def __repr__(self):
         return f'<Connection {self.source_node_id} -> {self.target_node_id}>'
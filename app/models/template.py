@@ -7,7 +7,7 @@
 from datetime import datetime
 from app.database import db
 from sqlalchemy import BigInteger, String, Text, DateTime, Boolean, Integer, Float, Enum, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 import enum
 
 class WorkflowTemplate(db.Model):
@@ -20,6 +20,9 @@ class WorkflowTemplate(db.Model):
     category = db.Column(String(50), comment='模板分类')
     tags = db.Column(String(500), comment='标签，用逗号分隔')
     template_data = db.Column(db.JSON, nullable=False, comment='模板数据')
+    graph_snapshot_id = db.Column(String(64), ForeignKey('workflow_graph_snapshots.id'), comment='预编译的图快照（模板数据修改后清空）')
+    graph_hash = db.Column(String(64), comment='图结构哈希')
+    compiled_at = db.Column(DateTime, comment='预编译时间')
     preview_image = db.Column(String(500), comment='预览图片URL')
     usage_count = db.Column(Integer, default=0, comment='使用次数')
     is_featured = db.Column(Boolean, default=False, comment='是否推荐')
@@ -31,6 +34,14 @@ class WorkflowTemplate(db.Model):
     # 关系
     author = relationship("User")
     
+    @validates('template_data')
+    def _reset_compiled(self, key, value):
+        """模板数据变化后预编译结果失效，下次使用时重新编译"""
+        self.graph_snapshot_id = None
+        self.graph_hash = None
+        self.compiled_at = None
+        return value
+    
     def to_dict(self):
         """转换为字典"""
         return {
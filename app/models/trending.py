@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+热度排行检查点模型
+"""
+
+from datetime import datetime
+from app.database import db
+from sqlalchemy import BigInteger, String, DateTime, Float, Enum, Index, UniqueConstraint
+
+from .workflow import WorkflowCategory
+
+class TrendingScore(db.Model):
+    """热度排行检查点
+
+    内存中的热度索引定期把衰减后的分数写入该表，进程重启时据此恢复。
+    """
+    __tablename__ = 'workflow_trending_scores'
+    __table_args__ = (
+        UniqueConstraint('workflow_id', 'time_range', name='uq_trending_workflow_range'),
+        # 检查点按 (时间范围, 分类) 读取分数最高的行
+        Index('ix_trending_scores_rank', 'time_range', 'category', 'score'),
+    )
+
+    id = db.Column(BigInteger, primary_key=True, autoincrement=True)
+    workflow_id = db.Column(BigInteger, nullable=False, comment='工作流ID')
+    category = db.Column(Enum(WorkflowCategory), comment='工作流分类')
+    time_range = db.Column(String(10), nullable=False, comment='时间范围')
+    score = db.Column(Float, nullable=False, default=0.0, comment='检查点时刻的衰减分数')
+    checkpoint_at = db.Column(DateTime, nullable=False, default=datetime.utcnow, comment='检查点时间')
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'workflow_id': self.workflow_id,
+            'category': self.category.value if self.category else None,
+            'time_range': self.time_range,
+            'score': self.score,
+            'checkpoint_at': self.checkpoint_at.isoformat() if self.checkpoint_at else None
+        }
+
+    def __repr__(self):
+        return f'<TrendingScore {self.workflow_id} {self.time_range}={self.score}>'
@@ -6,10 +6,12 @@
 
 from datetime import datetime
 from app.database import db
-from sqlalchemy import BigInteger, String, Text, DateTime, Boolean, Integer, Float, Enum, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import BigInteger, String, Text, DateTime, Boolean, Integer, Float, Enum, ForeignKey, Index
+from sqlalchemy.orm import relationship, deferred
 import enum
 
+from app.utils.quantile_sketch import QuantileSketch
+
 class WorkflowStatus(str, enum.Enum):
     """工作流状态枚举"""
     DRAFT = "draft"
@@ -38,26 +40,65 @@ class WorkflowCategory(str, enum.Enum):
     BUSINESS_LOGIC = "business_logic"
     OTHER = "other"
 
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+def _enum_value(value):
+    return value.value if value else None
+
+# 工作流可输出的字段及其序列化方式（字段名即模型属性名）
+WORKFLOW_FIELD_SERIALIZERS = {
+    'id': lambda workflow: workflow.id,
+    'name': lambda workflow: workflow.name,
+    'description': lambda workflow: workflow.description,
+    'category': lambda workflow: _enum_value(workflow.category),
+    'tags': lambda workflow: workflow.tags.split(',') if workflow.tags else [],
+    'version': lambda workflow: workflow.version,
+    'status': lambda workflow: _enum_value(workflow.status),
+    'is_public': lambda workflow: workflow.is_public,
+    'canvas_config': lambda workflow: workflow.canvas_config,
+    'global_variables': lambda workflow: workflow.global_variables,
+    'execution_timeout': lambda workflow: workflow.execution_timeout,
+    'max_concurrent_executions': lambda workflow: workflow.max_concurrent_executions,
+    'user_id': lambda workflow: workflow.user_id,
+    'created_at': lambda workflow: _isoformat(workflow.created_at),
+    'updated_at': lambda workflow: _isoformat(workflow.updated_at),
+    'published_at': lambda workflow: _isoformat(workflow.published_at)
+}
+
 class Workflow(db.Model):
     """工作流模型"""
     __tablename__ = 'workflows'
+    __table_args__ = (
+        # 列表游标分页按 (排序键, id) 在复合索引上定位
+        Index('ix_workflows_created_id', 'created_at', 'id'),
+        Index('ix_workflows_user_updated_id', 'user_id', 'updated_at', 'id'),
+        Index('ix_workflows_listing_created_id', 'status', 'is_public', 'created_at', 'id'),
+        # 查找结构相同的工作流
+        Index('ix_workflows_graph_hash', 'graph_hash'),
+    )
     
     id = db.Column(BigInteger, primary_key=True, autoincrement=True)
     name = db.Column(String(200), nullable=False, comment='工作流名称')
     description = db.Column(Text, comment='工作流描述')
     category = db.Column(Enum(WorkflowCategory), default=WorkflowCategory.OTHER, comment='工作流分类')
-    tags = db.Column(String(500), comment='标签，用逗号分隔')
+    tags = db.Column(String(500), comment='标签，用逗号分隔（展示用，筛选走 workflow_tag_links）')
     version = db.Column(String(20), default='1.0.0', comment='版本号')
     status = db.Column(Enum(WorkflowStatus), default=WorkflowStatus.DRAFT, comment='工作流状态')
     is_public = db.Column(Boolean, default=False, comment='是否公开')
-    canvas_config = db.Column(db.JSON, comment='画布配置')
-    global_variables = db.Column(db.JSON, comment='全局变量')
+    # 画布配置和全局变量可能有几百KB，延迟加载，列表查询不读取
+    canvas_config = deferred(db.Column(db.JSON, comment='画布配置'), group='content')
+    global_variables = deferred(db.Column(db.JSON, comment='全局变量'), group='content')
     execution_timeout = db.Column(Integer, default=300, comment='执行超时时间(秒)')
     max_concurrent_executions = db.Column(Integer, default=1, comment='最大并发执行数')
     user_id = db.Column(BigInteger, ForeignKey('users.id'), nullable=False, comment='创建用户ID')
     created_at = db.Column(DateTime, default=datetime.utcnow, comment='创建时间')
     updated_at = db.Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment='更新时间')
     published_at = db.Column(DateTime, comment='发布时间')
+    # 写时复制：复制出的工作流只指向源工作流的图快照，首次修改或执行时才写入节点和连接
+    graph_snapshot_id = db.Column(String(64), ForeignKey('workflow_graph_snapshots.id'), comment='与当前图内容一致的快照（图修改后清空）')
+    graph_materialized = db.Column(Boolean, nullable=False, default=True, comment='节点和连接是否已写入 nodes / connections 表')
+    graph_hash = db.Column(String(64), comment='图结构哈希（忽略名称和位置），结构相同的工作流共用执行计划')
     
     # 关系
     user = relationship("User")
@@ -67,26 +108,15 @@ class Workflow(db.Model):
     reviews = relationship("WorkflowReview", back_populates="workflow")
     stats = relationship("WorkflowStats", back_populates="workflow", uselist=False)
     
-    def to_dict(self, include_nodes=False, include_connections=False):
-        """转换为字典"""
-        data = {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'category': self.category.value if self.category else None,
-            'tags': self.tags.split(',') if self.tags else [],
-            'version': self.version,
-            'status': self.status.value if self.status else None,
-            'is_public': self.is_public,
-            'canvas_config': self.canvas_config,
-            'global_variables': self.global_variables,
-            'execution_timeout': self.execution_timeout,
-            'max_concurrent_executions': self.max_concurrent_executions,
-            'user_id': self.user_id,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'published_at': self.published_at.isoformat() if self.published_at else None
-        }
+    # 全部可输出字段
+    FIELDS = tuple(WORKFLOW_FIELD_SERIALIZERS)
+    
+    # 列表接口默认输出的字段（不含延迟加载的大字段）
+    LIST_FIELDS = tuple(field for field in FIELDS if field not in ('canvas_config', 'global_variables'))
+    
+    def to_dict(self, include_nodes=False, include_connections=False, fields=None):
+        """转换为字典，指定 fields 时只输出这些字段（不会访问未请求的延迟加载列）"""
+        data = {field: WORKFLOW_FIELD_SERIALIZERS[field](self) for field in fields or self.FIELDS}
         
         if include_nodes:
             data['nodes'] = [node.to_dict() for node in self.nodes]
@@ -129,18 +159,47 @@ class WorkflowStats(db.Model):
     __tablename__ = 'workflow_stats'
     
     id = db.Column(BigInteger, primary_key=True, autoincrement=True)
-    workflow_id = db.Column(BigInteger, ForeignKey('workflows.id'), nullable=False)
+    workflow_id = db.Column(BigInteger, ForeignKey('workflows.id'), nullable=False, unique=True, index=True)
     view_count = db.Column(Integer, default=0, comment='查看次数')
     like_count = db.Column(Integer, default=0, comment='点赞次数')
     fork_count = db.Column(Integer, default=0, comment='复制次数')
+    share_count = db.Column(Integer, default=0, comment='分享次数')
     execution_count = db.Column(Integer, default=0, comment='执行次数')
+    success_count = db.Column(Integer, default=0, comment='成功次数')
     success_rate = db.Column(Float, default=0.0, comment='成功率')
     avg_execution_time = db.Column(Float, default=0.0, comment='平均执行时间')
+    timed_execution_count = db.Column(Integer, default=0, comment='计入平均执行时间的执行次数')
+    duration_p50 = db.Column(Float, comment='执行时长P50(秒)')
+    duration_p95 = db.Column(Float, comment='执行时长P95(秒)')
+    duration_p99 = db.Column(Float, comment='执行时长P99(秒)')
+    duration_sketch = db.Column(db.JSON, comment='执行时长分位数草图')
     updated_at = db.Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # 关系
     workflow = relationship("Workflow", back_populates="stats")
     
+    def record_execution(self, succeeded, duration=None):
+        """以O(1)代价累加一次执行结果，无需回看历史执行记录"""
+        self.execution_count = (self.execution_count or 0) + 1
+        if succeeded:
+            self.success_count = (self.success_count or 0) + 1
+        self.success_rate = round(self.success_count / self.execution_count * 100, 2) if self.success_count else 0.0
+        
+        if duration is None:
+            return
+        
+        sketch = QuantileSketch.from_dict(self.duration_sketch)
+        sketch.add(duration)
+        
+        # 滑动平均：mean += (x - mean) / n，n 含迁移前已计入平均值的执行（草图只有迁移后的）
+        self.timed_execution_count = (self.timed_execution_count or 0) + 1
+        avg = self.avg_execution_time or 0.0
+        self.avg_execution_time = avg + (duration - avg) / self.timed_execution_count
+        self.duration_p50 = sketch.quantile(0.5)
+        self.duration_p95 = sketch.quantile(0.95)
+        self.duration_p99 = sketch.quantile(0.99)
+        self.duration_sketch = sketch.to_dict()
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -148,9 +207,14 @@ class WorkflowStats(db.Model):
             'view_count': self.view_count,
             'like_count': self.like_count,
             'fork_count': self.fork_count,
+            'share_count': self.share_count,
             'execution_count': self.execution_count,
+            'success_count': self.success_count,
             'success_rate': self.success_rate,
             'avg_execution_time': self.avg_execution_time,
+            'duration_p50': self.duration_p50,
+            'duration_p95': self.duration_p95,
+            'duration_p99': self.duration_p99,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
@@ -175,6 +239,14 @@ class WorkflowCollection(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+class WorkflowLike(db.Model):
+    """工作流点赞（每个用户对每个工作流最多一行）"""
+    __tablename__ = 'workflow_likes'
+    
+    workflow_id = db.Column(BigInteger, ForeignKey('workflows.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(BigInteger, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    created_at = db.Column(DateTime, default=datetime.utcnow, comment='点赞时间')
+
 class WorkflowTag(db.Model):
     """工作流标签模型"""
     __tablename__ = 'workflow_tags'
@@ -194,4 +266,74 @@ class WorkflowTag(db.Model):
             'color': self.color,
             'usage_count': self.usage_count,
             'created_at': self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+        }
+
+class WorkflowTagLink(db.Model):
+    """工作流与标签的关联"""
+    __tablename__ = 'workflow_tag_links'
+    __table_args__ = (
+        # 主键 (workflow_id, tag_id) 用于读取工作流的标签，(tag_id, workflow_id) 用于按标签筛选
+        Index('ix_workflow_tag_links_tag', 'tag_id', 'workflow_id'),
+    )
+    
+    workflow_id = db.Column(BigInteger, ForeignKey('workflows.id', ondelete='CASCADE'), primary_key=True)
+    tag_id = db.Column(BigInteger, ForeignKey('workflow_tags.id', ondelete='CASCADE'), primary_key=True)
+    created_at = db.Column(DateTime, default=datetime.utcnow)
+    
+    # 关系
+    tag = relationship("WorkflowTag")
+
+class WorkflowGraphSnapshot(db.Model):
+    """工作流图快照：不可变，以内容哈希为主键，内容相同的图共用一行"""
+    __tablename__ = 'workflow_graph_snapshots'
+    
+    id = db.Column(String(64), primary_key=True, comment='内容哈希(sha256)')
+    nodes = db.Column(db.JSON, nullable=False, comment='节点内容列表')
+    connections = db.Column(db.JSON, nullable=False, comment='连接列表，端点为节点在列表中的下标')
+    node_count = db.Column(Integer, default=0, comment='节点数')
+    connection_count = db.Column(Integer, default=0, comment='连接数')
+    created_at = db.Column(DateTime, default=datetime.utcnow, comment='创建时间')
+    
+    def expand(self, workflow_id, created_at=None):
+        """
+        展开为 serialize_node / serialize_connection 格式的节点和连接
+
+        尚未写入数据库的节点和连接没有真实ID，用 -1, -2, ... 占位；物化时
+        按同样的顺序写入，并返回占位ID到数据库ID的映射。
+        """
+        timestamp = _isoformat(created_at or self.created_at)
+        nodes = [
+            {
+                'id': -(index + 1),
+                'workflow_id': workflow_id,
+                'node_type': node['node_type'],
+                'name': node['name'],
+                'description': node.get('description'),
+                'position': {'x': node.get('position_x'), 'y': node.get('position_y')},
+                'config': node.get('config'),
+                'input_schema': node.get('input_schema'),
+                'output_schema': node.get('output_schema'),
+                'validation_rules': node.get('validation_rules'),
+                'retry_count': node.get('retry_count'),
+                'timeout': node.get('timeout'),
+                'is_enabled': node.get('is_enabled'),
+                'created_at': timestamp,
+                'updated_at': timestamp
+            }
+            for index, node in enumerate(self.nodes)
+        ]
+        connections = [
+            {
+                'id': -(index + 1),
+                'workflow_id': workflow_id,
+                'source_node_id': -(connection['source'] + 1),
+                'target_node_id': -(connection['target'] + 1),
+                'source_handle': connection.get('source_handle'),
+                'target_handle': connection.get('target_handle'),
+                'condition': connection.get('condition'),
+                'is_enabled': connection.get('is_enabled'),
+                'created_at': timestamp
+            }
+            for index, connection in enumerate(self.connections)
+        ]
+        return nodes, connections
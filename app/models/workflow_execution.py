@@ -6,10 +6,12 @@
 
 from datetime import datetime
 from app.database import db
-from sqlalchemy import BigInteger, String, Text, DateTime, Boolean, Integer, Float, Enum, ForeignKey
+from sqlalchemy import BigInteger, String, Text, DateTime, Boolean, Integer, Float, Enum, ForeignKey, Index
 from sqlalchemy.orm import relationship
 import enum
 
+from app.utils.row_serializer import RowSerializer
+
 class ExecutionStatus(str, enum.Enum):
     """执行状态枚举"""
     PENDING = "pending"
@@ -30,12 +32,18 @@ class TriggerType(str, enum.Enum):
 class WorkflowExecution(db.Model):
     """工作流执行模型"""
     __tablename__ = 'workflow_executions'
+    __table_args__ = (
+        # 执行记录列表游标分页按 (created_at, id) 在复合索引上定位
+        Index('ix_workflow_executions_user_created_id', 'user_id', 'created_at', 'id'),
+        Index('ix_workflow_executions_workflow_created_id', 'workflow_id', 'created_at', 'id'),
+    )
     
     id = db.Column(BigInteger, primary_key=True, autoincrement=True)
     workflow_id = db.Column(BigInteger, ForeignKey('workflows.id'), nullable=False, comment='工作流ID')
     user_id = db.Column(BigInteger, ForeignKey('users.id'), nullable=False, comment='执行用户ID')
     trigger_type = db.Column(Enum(TriggerType), default=TriggerType.MANUAL, comment='触发类型')
     input_data = db.Column(db.JSON, comment='输入数据')
+    variables = db.Column(db.JSON, comment='本次执行的全局变量（已渲染）')
     output_data = db.Column(db.JSON, comment='输出数据')
     status = db.Column(Enum(ExecutionStatus), default=ExecutionStatus.PENDING, comment='执行状态')
     progress = db.Column(Float, default=0.0, comment='执行进度(0-100)')
@@ -55,25 +63,26 @@ class WorkflowExecution(db.Model):
     node_executions = relationship("NodeExecution", back_populates="workflow_execution", cascade="all, delete-orphan")
     
     def to_dict(self, include_nodes=False):
-        """转换为字典"""
+        """转换为字典（日期时间和枚举由应用的 orjson JSON provider 直接序列化）"""
         data = {
             'id': self.id,
             'workflow_id': self.workflow_id,
             'user_id': self.user_id,
-            'trigger_type': self.trigger_type.value if self.trigger_type else None,
+            'trigger_type': self.trigger_type,
             'input_data': self.input_data,
+            'variables': self.variables,
             'output_data': self.output_data,
-            'status': self.status.value if self.status else None,
+            'status': self.status,
             'progress': self.progress,
             'error_message': self.error_message,
-            'started_at': self.started_at.isoformat() if self.started_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'started_at': self.started_at,
+            'completed_at': self.completed_at,
             'duration': self.duration,
             'node_count': self.node_count,
             'completed_nodes': self.completed_nodes,
             'failed_nodes': self.failed_nodes,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
         
         if include_nodes:
@@ -107,22 +116,26 @@ class NodeExecution(db.Model):
     node = relationship("Node")
     
     def to_dict(self):
-        """转换为字典"""
+        """转换为字典（日期时间和枚举由应用的 orjson JSON provider 直接序列化）"""
         return {
             'id': self.id,
             'workflow_execution_id': self.workflow_execution_id,
             'node_id': self.node_id,
-            'status': self.status.value if self.status else None,
+            'status': self.status,
             'input_data': self.input_data,
             'output_data': self.output_data,
             'error_message': self.error_message,
             'retry_count': self.retry_count,
-            'started_at': self.started_at.isoformat() if self.started_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'started_at': self.started_at,
+            'completed_at': self.completed_at,
             'duration': self.duration,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
     
     def __repr__(self):
-        return f'<NodeExecution {self.id} - {self.status}>'
\ No newline at end of file
+        return f'<NodeExecution {self.id} - {self.status}>'
+
+# 列表读路径的行映射，字段顺序与 to_dict 一致
+WORKFLOW_EXECUTION_ROW = RowSerializer(WorkflowExecution)
+NODE_EXECUTION_ROW = RowSerializer(NodeExecution)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+执行管理服务
+"""
+
+from datetime import datetime
+import logging
+
+from app.models.workflow_execution import (
+    WorkflowExecution, NodeExecution, ExecutionStatus, WORKFLOW_EXECUTION_ROW, NODE_EXECUTION_ROW
+)
+from app.models.execution_stats import StatsScope
+from app.services.execution_stats_service import ExecutionStatsService, FINISHED_STATUSES
+from app.services.workflow_stats_service import WorkflowStatsService
+from app.utils.pagination import paginate
+
+logger = logging.getLogger(__name__)
+
+class ExecutionService:
+    """执行管理服务"""
+
+    def __init__(self, session):
+        self.session = session
+        self.stats_service = ExecutionStatsService(session)
+        self.workflow_stats_service = WorkflowStatsService(session)
+
+    def get_executions(self, user_id, page=1, size=20, workflow_id=None, status=None, cursor=None):
+        """
+        获取执行记录列表，提供 cursor 时按 (created_at, id) 游标分页
+
+        只选出列元组并装入行对象，不构造 WorkflowExecution 实例
+        """
+        query = self._filter_executions(WORKFLOW_EXECUTION_ROW.query(self.session), user_id, workflow_id, status)
+        order_by = [(WorkflowExecution.created_at, True), (WorkflowExecution.id, True)]
+        rows, meta = paginate(query, order_by, page, size, cursor)
+        return {'items': WORKFLOW_EXECUTION_ROW.build_all(rows), **meta}
+
+    def export_executions_query(self, user_id, workflow_id=None, status=None):
+        """用户执行记录的导出查询（列元组），按 id 排序，供流式导出逐批读取"""
+        query = self._filter_executions(WORKFLOW_EXECUTION_ROW.query(self.session), user_id, workflow_id, status)
+        return query.order_by(WorkflowExecution.id)
+
+    def export_node_executions_query(self, user_id, workflow_id=None, status=None, execution_id=None):
+        """用户节点执行记录的导出查询（列元组），按执行过滤条件关联工作流执行"""
+        query = NODE_EXECUTION_ROW.query(self.session) \
+            .join(WorkflowExecution, WorkflowExecution.id == NodeExecution.workflow_execution_id)
+        query = self._filter_executions(query, user_id, workflow_id, status)
+        if execution_id:
+            query = query.filter(NodeExecution.workflow_execution_id == execution_id)
+        return query.order_by(NodeExecution.id)
+
+    def _filter_executions(self, query, user_id, workflow_id=None, status=None):
+        """按用户、工作流和状态过滤执行记录"""
+        query = query.filter(WorkflowExecution.user_id == user_id)
+        if workflow_id:
+            query = query.filter(WorkflowExecution.workflow_id == workflow_id)
+        if status:
+            query = query.filter(WorkflowExecution.status == ExecutionStatus(status))
+        return query
+
+    def get_execution_detail(self, execution_id, user_id):
+        """获取执行详情"""
+        execution = self._get_user_execution(execution_id, user_id)
+        return execution.to_dict(include_nodes=True)
+
+    def get_execution_status(self, execution_id, user_id):
+        """获取执行状态"""
+        execution = self._get_user_execution(execution_id, user_id)
+        return {
+            'execution_id': execution.id,
+            'status': execution.status.value if execution.status else None,
+            'progress': execution.progress,
+            'node_count': execution.node_count,
+            'completed_nodes': execution.completed_nodes,
+            'failed_nodes': execution.failed_nodes,
+            'started_at': execution.started_at.isoformat() if execution.started_at else None,
+            'completed_at': execution.completed_at.isoformat() if execution.completed_at else None
+        }
+
+    def cancel_execution(self, execution_id, user_id):
+        """取消执行"""
+        execution = self._get_user_execution(execution_id, user_id)
+        if execution.status not in (ExecutionStatus.PENDING, ExecutionStatus.RUNNING):
+            raise ValueError('当前执行状态无法取消')
+
+        self.finish_execution(execution, ExecutionStatus.CANCELLED)
+        return execution.to_dict()
+
+    def finish_execution(self, execution, status, output_data=None, error_message=None):
+        """结束执行，并在同一事务中增量更新统计汇总和工作流统计"""
+        if status not in FINISHED_STATUSES:
+            raise ValueError(f'不是终止状态: {status}')
+
+        now = datetime.utcnow()
+        execution.status = status
+        execution.completed_at = now
+        if output_data is not None:
+            execution.output_data = output_data
+        if error_message is not None:
+            execution.error_message = error_message
+        if execution.started_at:
+            execution.duration = (now - execution.started_at).total_seconds()
+
+        try:
+            self.stats_service.record_execution(execution)
+            self.workflow_stats_service.record_execution(execution)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        return execution
+
+    def get_execution_stats(self, user_id, time_range='7d'):
+        """获取执行统计"""
+        return self.stats_service.get_stats(StatsScope.USER, user_id, time_range)
+
+    def get_workflow_execution_stats(self, workflow_id, time_range='7d'):
+        """获取单个工作流的执行统计"""
+        return self.stats_service.get_stats(StatsScope.WORKFLOW, workflow_id, time_range)
+
+    def _get_user_execution(self, execution_id, user_id):
+        """获取当前用户的执行记录"""
+        execution = self.session.query(WorkflowExecution).filter_by(id=execution_id, user_id=user_id).first()
+        if not execution:
+            raise ValueError('执行记录不存在')
+        return execution
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+执行统计汇总服务
+
+执行结束时按用户、工作流两个维度，把执行次数、时长总和与时长直方图
+累加到分钟/小时/天三种粒度的时间桶中。查询统计时把时间范围拆分成
+"首尾用细粒度、中间用粗粒度"的几段，只读取覆盖该范围所需的少量桶，
+因此90天与1小时的查询代价基本相同。
+"""
+
+from datetime import datetime, timedelta
+import logging
+
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+
+from app.models.execution_stats import (
+    ExecutionStatsBucket, StatsScope, StatsGranularity, DURATION_HISTOGRAM_BOUNDS
+)
+from app.models.workflow_execution import WorkflowExecution, ExecutionStatus
+
+logger = logging.getLogger(__name__)
+
+# 支持的统计时间范围
+TIME_RANGES = {
+    '1h': timedelta(hours=1),
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30),
+    '90d': timedelta(days=90)
+}
+
+# 计入统计的终止状态
+FINISHED_STATUSES = (
+    ExecutionStatus.COMPLETED,
+    ExecutionStatus.FAILED,
+    ExecutionStatus.CANCELLED,
+    ExecutionStatus.TIMEOUT
+)
+
+GRANULARITY_STEPS = {
+    StatsGranularity.MINUTE: timedelta(minutes=1),
+    StatsGranularity.HOUR: timedelta(hours=1),
+    StatsGranularity.DAY: timedelta(days=1)
+}
+
+# 各粒度时间桶的保留时长，超过后只能依赖更粗粒度的桶
+BUCKET_RETENTION = {
+    StatsGranularity.MINUTE: timedelta(days=2),
+    StatsGranularity.HOUR: timedelta(days=35),
+    StatsGranularity.DAY: None
+}
+
+def truncate_time(moment, granularity):
+    """把时间截断到所属时间桶的起点"""
+    moment = moment.replace(second=0, microsecond=0)
+    if granularity == StatsGranularity.MINUTE:
+        return moment
+    moment = moment.replace(minute=0)
+    if granularity == StatsGranularity.HOUR:
+        return moment
+    return moment.replace(hour=0)
+
+def ceil_time(moment, granularity):
+    """把时间向上取整到时间桶边界"""
+    truncated = truncate_time(moment, granularity)
+    if truncated == moment:
+        return truncated
+    return truncated + GRANULARITY_STEPS[granularity]
+
+def plan_bucket_ranges(start, end):
+    """
+    把 [start, end) 拆分成若干 (粒度, 起点, 终点) 区间
+
+    首尾不足一小时的部分使用分钟桶，不足一天的部分使用小时桶，
+    中间的整天使用天桶，返回的区间互不重叠且恰好覆盖整个范围。
+    """
+    hour_start = ceil_time(start, StatsGranularity.HOUR)
+    hour_end = truncate_time(end, StatsGranularity.HOUR)
+    if hour_start >= hour_end:
+        return [(StatsGranularity.MINUTE, start, end)]
+
+    ranges = [(StatsGranularity.MINUTE, start, hour_start)]
+
+    day_start = ceil_time(start, StatsGranularity.DAY)
+    day_end = truncate_time(end, StatsGranularity.DAY)
+    if day_start >= day_end:
+        ranges.append((StatsGranularity.HOUR, hour_start, hour_end))
+    else:
+        ranges.append((StatsGranularity.HOUR, hour_start, day_start))
+        ranges.append((StatsGranularity.DAY, day_start, day_end))
+        ranges.append((StatsGranularity.HOUR, day_end, hour_end))
+
+    ranges.append((StatsGranularity.MINUTE, hour_end, end))
+    return [(granularity, lower, upper) for granularity, lower, upper in ranges if lower < upper]
+
+class ExecutionStatsService:
+    """执行统计汇总服务"""
+
+    def __init__(self, session):
+        self.session = session
+
+    def record_execution(self, execution):
+        """执行结束时把结果累加到所有相关时间桶"""
+        if execution.status not in FINISHED_STATUSES:
+            return
+
+        finished_at = execution.completed_at or datetime.utcnow()
+        scopes = (
+            (StatsScope.USER, execution.user_id),
+            (StatsScope.WORKFLOW, execution.workflow_id)
+        )
+
+        for scope, scope_id in scopes:
+            for granularity in StatsGranularity:
+                bucket = self._get_or_create_bucket(
+                    scope, scope_id, granularity,
+                    truncate_time(finished_at, granularity),
+                    execution.status
+                )
+                bucket.add_duration(execution.duration)
+
+    def get_stats(self, scope, scope_id, time_range='7d', now=None):
+        """读取时间范围内的汇总统计"""
+        if time_range not in TIME_RANGES:
+            raise ValueError(f'不支持的时间范围: {time_range}')
+
+        now = now or datetime.utcnow()
+        end = truncate_time(now, StatsGranularity.MINUTE) + GRANULARITY_STEPS[StatsGranularity.MINUTE]
+        start = self._align_start(truncate_time(now - TIME_RANGES[time_range], StatsGranularity.MINUTE), now)
+
+        conditions = [
+            and_(
+                ExecutionStatsBucket.granularity == granularity,
+                ExecutionStatsBucket.bucket_start >= lower,
+                ExecutionStatsBucket.bucket_start < upper
+            )
+            for granularity, lower, upper in plan_bucket_ranges(start, end)
+        ]
+
+        rows = self.session.query(
+            ExecutionStatsBucket.status,
+            ExecutionStatsBucket.execution_count,
+            ExecutionStatsBucket.duration_sum,
+            ExecutionStatsBucket.duration_max,
+            ExecutionStatsBucket.duration_histogram
+        ).filter(
+            ExecutionStatsBucket.scope == scope,
+            ExecutionStatsBucket.scope_id == scope_id,
+            or_(*conditions)
+        ).all()
+
+        status_counts = {status.value: 0 for status in FINISHED_STATUSES}
+        histogram = [0] * (len(DURATION_HISTOGRAM_BOUNDS) + 1)
+        duration_sum = 0.0
+        duration_max = 0.0
+
+        for status, count, bucket_sum, bucket_max, bucket_histogram in rows:
+            status_counts[status.value] += count or 0
+            duration_sum += bucket_sum or 0.0
+            duration_max = max(duration_max, bucket_max or 0.0)
+            for index, value in enumerate(bucket_histogram or []):
+                histogram[index] += value
+
+        total = sum(status_counts.values())
+        timed_count = sum(histogram)
+
+        return {
+            'time_range': time_range,
+            'start_time': start.isoformat(),
+            'end_time': now.isoformat(),
+            'total_executions': total,
+            'status_counts': status_counts,
+            'success_rate': round(status_counts[ExecutionStatus.COMPLETED.value] / total * 100, 2) if total else 0.0,
+            'avg_duration': round(duration_sum / timed_count, 3) if timed_count else 0.0,
+            'max_duration': duration_max,
+            'duration_histogram': [
+                {'le': bound, 'count': count}
+                for bound, count in zip(DURATION_HISTOGRAM_BOUNDS + [None], histogram)
+            ]
+        }
+
+    def purge_expired_buckets(self, now=None):
+        """删除超过保留时长的细粒度时间桶"""
+        now = now or datetime.utcnow()
+        deleted = 0
+
+        for granularity, retention in BUCKET_RETENTION.items():
+            if retention is None:
+                continue
+            deleted += self.session.query(ExecutionStatsBucket).filter(
+                ExecutionStatsBucket.granularity == granularity,
+                ExecutionStatsBucket.bucket_start < now - retention
+            ).delete(synchronize_session=False)
+
+        logger.info(f"Purged {deleted} expired execution stats buckets")
+        return deleted
+
+    def rebuild_buckets(self, batch_size=1000, now=None):
+        """
+        根据历史执行记录重建全部时间桶（用于首次上线或修复数据，由调用方提交）
+
+        执行记录按主键分批读取，在内存中按桶聚合后一次写入，已超过保留时长的
+        细粒度桶不再生成。并发重建时后写入的一方违反唯一约束，提交失败。
+        """
+        now = now or datetime.utcnow()
+        self.session.query(ExecutionStatsBucket).delete(synchronize_session=False)
+
+        buckets = {}
+        count = 0
+        last_id = 0
+        while True:
+            rows = self.session.query(
+                WorkflowExecution.id, WorkflowExecution.user_id, WorkflowExecution.workflow_id,
+                WorkflowExecution.status, WorkflowExecution.completed_at, WorkflowExecution.duration
+            ).filter(
+                WorkflowExecution.status.in_(FINISHED_STATUSES),
+                WorkflowExecution.id > last_id
+            ).order_by(WorkflowExecution.id).limit(batch_size).all()
+            if not rows:
+                break
+
+            for row in rows:
+                finished_at = row.completed_at or now
+                for scope, scope_id in ((StatsScope.USER, row.user_id), (StatsScope.WORKFLOW, row.workflow_id)):
+                    for granularity in StatsGranularity:
+                        bucket_start = truncate_time(finished_at, granularity)
+                        retention = BUCKET_RETENTION[granularity]
+                        if retention is not None and bucket_start < now - retention:
+                            continue
+                        key = (scope, scope_id, granularity, bucket_start, row.status)
+                        bucket = buckets.get(key)
+                        if bucket is None:
+                            bucket = buckets[key] = ExecutionStatsBucket(
+                                scope=scope, scope_id=scope_id, granularity=granularity,
+                                bucket_start=bucket_start, status=row.status,
+                                execution_count=0, duration_sum=0.0, duration_max=0.0
+                            )
+                        bucket.add_duration(row.duration)
+            count += len(rows)
+            last_id = rows[-1].id
+
+        self.session.add_all(buckets.values())
+        self.session.flush()
+        logger.info(f"Rebuilt {len(buckets)} execution stats buckets from {count} executions")
+        return count
+
+    def _align_start(self, start, now):
+        """细粒度时间桶过期后，把查询起点对齐到更粗的粒度"""
+        if now - start > BUCKET_RETENTION[StatsGranularity.MINUTE]:
+            start = truncate_time(start, StatsGranularity.HOUR)
+        if now - start > BUCKET_RETENTION[StatsGranularity.HOUR]:
+            start = truncate_time(start, StatsGranularity.DAY)
+        return start
+
+    def _get_or_create_bucket(self, scope, scope_id, granularity, bucket_start, status):
+        """获取（必要时创建）时间桶并加行锁"""
+        key = {
+            'scope': scope,
+            'scope_id': scope_id,
+            'granularity': granularity,
+            'bucket_start': bucket_start,
+            'status': status
+        }
+
+        bucket = self.session.query(ExecutionStatsBucket).filter_by(**key).with_for_update().first()
+        if bucket:
+            return bucket
+
+        bucket = ExecutionStatsBucket(execution_count=0, duration_sum=0.0, duration_max=0.0, **key)
+        try:
+            with self.session.begin_nested():
+                self.session.add(bucket)
+        except IntegrityError:
+            # 并发写入时其他事务已经创建了该时间桶
+            bucket = self.session.query(ExecutionStatsBucket).filter_by(**key).with_for_update().one()
+        return bucket
+
+def init_execution_stats(app, session):
+    """启动时时间桶表为空（新部署或刚执行迁移）则按历史执行记录重建"""
+    try:
+        with app.app_context():
+            if session.query(ExecutionStatsBucket.id).first() is None:
+                ExecutionStatsService(session).rebuild_buckets()
+                session.commit()
+    except IntegrityError:
+        # 其他进程同时完成了重建
+        session.rollback()
+    except Exception as e:
+        session.rollback()
+        logger.warning(f"Failed to rebuild execution stats buckets: {str(e)}")
+
+def purge_stats_buckets(app, session):
+    """删除过期的细粒度时间桶（由计数缓冲的写回线程定期调用）"""
+    try:
+        with app.app_context():
+            ExecutionStatsService(session).purge_expired_buckets()
+            session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Error purging execution stats buckets: {str(e)}")
@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流图自动布局（分层布局）
+
+智能创建生成的图没有合理的坐标，几千个节点在浏览器中布局会卡住编辑器，
+改为在服务端计算后批量写回 nodes.position_x / position_y（及网格列）。
+
+整体布局按 Sugiyama 分层方法，画布从左到右：
+    1. 去环：深度优先找出回边并反向
+    2. 分层：最长路径分层，源点靠近其后继
+    3. 跨越多层的连接插入虚拟节点
+    4. 交叉最小化：逐层重心排序上下扫描，每轮用归并计数交叉数并保留最好的
+       排列，重心和交叉数都以 numpy 数组按层批量计算
+    5. 坐标：层号决定 X；层内保持顺序和最小间距，Y 向相邻节点的平均位置靠拢
+
+增量布局只放置新节点（未指定时为坐标仍在原点的节点），已有节点一律不动：
+新节点放在已放置的前驱右侧（没有前驱时放在后继左侧），Y 取相邻节点的
+平均值，与已有节点重叠时上下错开。向大画布加一个节点不会重排整张图。
+
+布局耗时基准见 benchmarks/graph_layout.py。
+"""
+
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import select, bindparam
+
+from app.models.node import Node, Connection, grid_cell
+
+LAYOUT_MODES = ('incremental', 'full')
+
+# 相邻两层的水平间距和层内相邻节点的垂直间距（画布坐标）
+LAYER_SPACING = 300
+NODE_SPACING = 150
+
+# 整体布局左上角的位置
+LAYOUT_ORIGIN = (100, 100)
+
+# 交叉最小化的最大扫描轮数（一轮为自上而下、自下而上各一次），
+# 连续 CROSSING_PATIENCE 轮没有减少交叉时提前结束
+CROSSING_SWEEPS = 12
+CROSSING_PATIENCE = 3
+
+# 层内 Y 坐标向相邻节点靠拢的迭代次数
+COORDINATE_PASSES = 6
+
+# 跨越超过这么多层的连接不拆分为虚拟节点，只参与分层，不参与排序和坐标计算，
+# 避免少数长回边产生数十万个虚拟节点
+MAX_EDGE_SPAN = 32
+
+# 单次布局的节点数上限
+MAX_LAYOUT_NODES = 20000
+
+# 批量写回坐标时每条语句的行数
+LAYOUT_WRITE_BATCH = 1000
+
+def _break_cycles(count, edges):
+    """迭代深度优先去环：回边反向，自环和重复边去掉，返回无环的边列表"""
+    adjacency = [[] for _ in range(count)]
+    for source, target in edges:
+        if source != target:
+            adjacency[source].append(target)
+
+    # 0 未访问，1 在栈上，2 已完成
+    state = [0] * count
+    back_edges = set()
+    for root in range(count):
+        if state[root]:
+            continue
+        state[root] = 1
+        stack = [(root, iter(adjacency[root]))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if state[child] == 1:
+                    back_edges.add((node, child))
+                elif state[child] == 0:
+                    state[child] = 1
+                    stack.append((child, iter(adjacency[child])))
+                    break
+            else:
+                state[node] = 2
+                stack.pop()
+
+    acyclic = set()
+    for source, target in edges:
+        if source == target:
+            continue
+        acyclic.add((target, source) if (source, target) in back_edges else (source, target))
+    return sorted(acyclic)
+
+def _assign_layers(count, edges):
+    """
+    最长路径分层
+
+    Returns:
+        (每个节点的层号, 拓扑序)
+    """
+    successors = [[] for _ in range(count)]
+    in_degree = [0] * count
+    for source, target in edges:
+        successors[source].append(target)
+        in_degree[target] += 1
+
+    order = [node for node in range(count) if not in_degree[node]]
+    layers = [0] * count
+    for node in order:
+        for child in successors[node]:
+            layers[child] = max(layers[child], layers[node] + 1)
+            in_degree[child] -= 1
+            if not in_degree[child]:
+                order.append(child)
+
+    # 源点紧贴最近的后继，避免所有入口都堆在第一层、连接拉得很长
+    has_predecessor = [False] * count
+    for _, target in edges:
+        has_predecessor[target] = True
+    for node in reversed(order):
+        if not has_predecessor[node] and successors[node]:
+            layers[node] = min(layers[child] for child in successors[node]) - 1
+    return layers, order
+
+def count_inversions(values):
+    """
+    序列中逆序对（i < j 且 values[i] > values[j]）的个数
+
+    自底向上归并：每层把相邻两块中右块的元素在左块中二分计数，按块号加偏移后
+    所有块一次 searchsorted / sort 完成，每层都是整体的 numpy 运算。
+    """
+    values = np.asarray(values, dtype=np.int64)
+    size = len(values)
+    if size < 2:
+        return 0
+
+    span = int(values.max()) + 1
+    index = np.arange(size)
+    total = 0
+    width = 1
+    while width < size:
+        block = index // (2 * width)
+        keyed = values + block * span
+        in_left = index % (2 * width) < width
+        left, right, right_block = keyed[in_left], keyed[~in_left], block[~in_left]
+        # 左块整体有序（块内有序，块间按偏移递增），同块左侧大于右侧元素的个数
+        left_end = np.searchsorted(left, (right_block + 1) * span, side='left')
+        total += int((left_end - np.searchsorted(left, right, side='right')).sum())
+        values = np.sort(keyed) - block * span
+        width *= 2
+    return total
+
+class _LayeredGraph:
+    """插入虚拟节点后的分层图，位置数组 rank 为节点在本层中的序号"""
+
+    def __init__(self, count, edges):
+        edges = _break_cycles(count, edges)
+        layers, order = _assign_layers(count, edges)
+        low = min(layers) if layers else 0
+        layers = [layer - low for layer in layers]
+
+        # 跨越多层的连接拆成相邻层之间的线段
+        segments = []
+        for source, target in edges:
+            if layers[target] - layers[source] > MAX_EDGE_SPAN:
+                continue
+            previous = source
+            for layer in range(layers[source] + 1, layers[target]):
+                layers.append(layer)
+                segments.append((previous, len(layers) - 1))
+                previous = len(layers) - 1
+            segments.append((previous, target))
+
+        self.count = count
+        self.layer_of = np.array(layers, dtype=np.int64)
+        self.layer_count = int(self.layer_of.max()) + 1 if len(layers) else 0
+
+        # 初始层内顺序：真实节点按拓扑序，虚拟节点按生成顺序
+        sequence = order + list(range(count, len(layers)))
+        self.layers = [[] for _ in range(self.layer_count)]
+        for node in sequence:
+            self.layers[layers[node]].append(node)
+        self.layers = [np.array(nodes, dtype=np.int64) for nodes in self.layers]
+        self.rank = np.zeros(len(layers), dtype=np.int64)
+        for nodes in self.layers:
+            self.rank[nodes] = np.arange(len(nodes))
+
+        # 按上层号分组的线段（上端、下端）
+        segments = np.array(segments, dtype=np.int64).reshape(-1, 2)
+        upper_layer = self.layer_of[segments[:, 0]] if len(segments) else np.array([], dtype=np.int64)
+        self.segments = [segments[upper_layer == layer] for layer in range(max(self.layer_count - 1, 0))]
+        self.all_segments = segments
+
+    def crossings(self):
+        """
+        当前排列的交叉总数：线段按（上层号, 上端序号, 下端序号）排序后下端序号的
+        逆序对数。下端序号加上 上层号 × 最大层宽 的偏移，不同层间不会构成逆序，
+        所有相邻层一次计数。
+        """
+        if len(self.all_segments) < 2:
+            return 0
+        upper, lower = self.all_segments[:, 0], self.all_segments[:, 1]
+        upper_layer = self.layer_of[upper]
+        span = int(self.rank.max()) + 1
+        order = np.lexsort((self.rank[lower], self.rank[upper], upper_layer))
+        return count_inversions((self.rank[lower] + upper_layer * span)[order])
+
+    def sweep(self, downward):
+        """一次重心排序扫描：按相邻层（已排好的一侧）的平均序号重排本层"""
+        layer_range = range(1, self.layer_count) if downward else range(self.layer_count - 2, -1, -1)
+        for layer in layer_range:
+            if downward:
+                segments = self.segments[layer - 1]
+                movable, fixed = segments[:, 1], segments[:, 0]
+            else:
+                segments = self.segments[layer]
+                movable, fixed = segments[:, 0], segments[:, 1]
+
+            nodes = self.layers[layer][np.argsort(self.rank[self.layers[layer]])]
+            size = len(nodes)
+            sums = np.bincount(self.rank[movable], weights=self.rank[fixed], minlength=size)
+            counts = np.bincount(self.rank[movable], minlength=size)
+            # 没有连接的节点保持当前序号
+            keys = np.where(counts > 0, sums / np.maximum(counts, 1), np.arange(size))
+            nodes = nodes[np.argsort(keys, kind='stable')]
+            self.layers[layer] = nodes
+            self.rank[nodes] = np.arange(size)
+
+    def minimize_crossings(self):
+        """上下交替扫描，保留交叉最少的排列"""
+        best_rank, best = self.rank.copy(), self.crossings()
+        stale = 0
+        for _ in range(CROSSING_SWEEPS):
+            if best == 0 or stale >= CROSSING_PATIENCE:
+                break
+            self.sweep(downward=True)
+            self.sweep(downward=False)
+            crossings = self.crossings()
+            if crossings < best:
+                best_rank, best, stale = self.rank.copy(), crossings, 0
+            else:
+                stale += 1
+
+        self.rank = best_rank
+        self.layers = [nodes[np.argsort(best_rank[nodes])] for nodes in self.layers]
+        return best
+
+    def coordinates(self):
+        """
+        层内 Y 坐标：从等间距开始，反复向相邻节点的平均 Y 靠拢，并保持层内顺序和
+        最小间距（把期望值减去序号×间距后取前向最大、后向最小累积的平均，结果
+        仍单调，满足间距约束）
+        """
+        y = self.rank.astype(float) * NODE_SPACING
+        for nodes in self.layers:
+            y[nodes] -= (len(nodes) - 1) * NODE_SPACING / 2
+
+        upper, lower = self.all_segments[:, 0], self.all_segments[:, 1]
+        size = len(y)
+        degree = np.bincount(upper, minlength=size) + np.bincount(lower, minlength=size)
+        for _ in range(COORDINATE_PASSES):
+            sums = np.bincount(upper, weights=y[lower], minlength=size) + \
+                np.bincount(lower, weights=y[upper], minlength=size)
+            desired = np.where(degree > 0, sums / np.maximum(degree, 1), y)
+            for nodes in self.layers:
+                offsets = np.arange(len(nodes)) * NODE_SPACING
+                shifted = desired[nodes] - offsets
+                forward = np.maximum.accumulate(shifted)
+                backward = np.minimum.accumulate(shifted[::-1])[::-1]
+                y[nodes] = (forward + backward) / 2 + offsets
+        return y
+
+def layered_layout(node_ids, edges):
+    """
+    整体分层布局
+
+    Args:
+        node_ids: 节点ID列表
+        edges: [(源节点ID, 目标节点ID)]，引用不存在节点的连接被忽略
+
+    Returns:
+        {节点ID: (x, y)}
+    """
+    if not node_ids:
+        return {}
+    index = {node_id: position for position, node_id in enumerate(node_ids)}
+    indexed = [(index[source], index[target]) for source, target in edges if source in index and target in index]
+
+    graph = _LayeredGraph(len(node_ids), indexed)
+    graph.minimize_crossings()
+    y = graph.coordinates()[:len(node_ids)]
+    y -= y.min()
+
+    x = graph.layer_of[:len(node_ids)] * LAYER_SPACING + LAYOUT_ORIGIN[0]
+    y += LAYOUT_ORIGIN[1]
+    return {node_id: (float(round(x[position])), float(round(y[position]))) for position, node_id in enumerate(node_ids)}
+
+class _Occupancy:
+    """已占用位置的空间索引，判断新节点是否与已有节点重叠"""
+
+    def __init__(self, positions):
+        self.cells = {}
+        for x, y in positions:
+            self.add(x, y)
+
+    def _cell(self, x, y):
+        return int(x // LAYER_SPACING), int(y // NODE_SPACING)
+
+    def add(self, x, y):
+        self.cells.setdefault(self._cell(x, y), []).append((x, y))
+
+    def is_free(self, x, y):
+        cell_x, cell_y = self._cell(x, y)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for other_x, other_y in self.cells.get((cell_x + dx, cell_y + dy), ()):
+                    if abs(other_x - x) < LAYER_SPACING * 0.75 and abs(other_y - y) < NODE_SPACING:
+                        return False
+        return True
+
+    def nearest_free(self, x, y):
+        """Y 方向上离 (x, y) 最近的空位，依次尝试下方、上方"""
+        step = 0
+        while True:
+            for candidate in ((y + step * NODE_SPACING,) if step == 0 else
+                              (y + step * NODE_SPACING, y - step * NODE_SPACING)):
+                if self.is_free(x, candidate):
+                    return candidate
+            step += 1
+
+def incremental_layout(positions, free_ids, edges):
+    """
+    只放置 free_ids 中的节点，其余节点保持 positions 中的坐标
+
+    新节点按拓扑序放置，同一补丁中相连的新节点依次向右延伸。
+
+    Args:
+        positions: {节点ID: (x, y)}，包括所有节点
+        free_ids: 需要放置的节点ID
+        edges: [(源节点ID, 目标节点ID)]
+
+    Returns:
+        {节点ID: (x, y)}，只包含 free_ids 中的节点
+    """
+    free_ids = set(free_ids)
+    free = [node_id for node_id in positions if node_id in free_ids]
+    if not free:
+        return {}
+    fixed = {node_id: position for node_id, position in positions.items() if node_id not in free_ids}
+    if not fixed:
+        return layered_layout(free, edges)
+
+    predecessors, successors = {}, {}
+    for source, target in edges:
+        if source in positions and target in positions and source != target:
+            successors.setdefault(source, []).append(target)
+            predecessors.setdefault(target, []).append(source)
+
+    # 新节点之间的拓扑序（有环时按去环后的顺序）
+    index = {node_id: position for position, node_id in enumerate(free)}
+    free_edges = [(index[source], index[target]) for source, target in edges if source in index and target in index]
+    _, order = _assign_layers(len(free), _break_cycles(len(free), free_edges))
+
+    occupancy = _Occupancy(fixed.values())
+    right = max(x for x, _ in fixed.values())
+    top = min(y for _, y in fixed.values())
+    placed = dict(fixed)
+    result = {}
+    for node_id in (free[position] for position in order):
+        before = [placed[other] for other in predecessors.get(node_id, ()) if other in placed]
+        after = [placed[other] for other in successors.get(node_id, ()) if other in placed]
+        if before:
+            x = max(position[0] for position in before) + LAYER_SPACING
+        elif after:
+            x = min(position[0] for position in after) - LAYER_SPACING
+        else:
+            # 孤立的新节点放在画布右侧
+            x = right + LAYER_SPACING
+        neighbours = before or after
+        y = sum(position[1] for position in neighbours) / len(neighbours) if neighbours else top
+
+        y = occupancy.nearest_free(x, y)
+        occupancy.add(x, y)
+        placed[node_id] = result[node_id] = (float(x), float(y))
+    return result
+
+def _is_unplaced(x, y):
+    return not x and not y
+
+class GraphLayoutService:
+    """在服务端计算布局并批量写回节点坐标"""
+
+    def __init__(self, session):
+        self.session = session
+
+    def layout(self, workflow, mode='incremental', node_ids=None):
+        """
+        布局已物化工作流的节点并写回坐标（不提交事务）
+
+        Args:
+            mode: incremental 只放置 node_ids（未指定时为坐标在原点的节点），
+                  其余节点不动；full 重新布局整张图
+            node_ids: 需要放置的节点ID
+
+        Returns:
+            {节点ID: (x, y)}，坐标有变化的节点
+        """
+        if mode not in LAYOUT_MODES:
+            raise ValueError(f'无效的布局方式: {mode}')
+
+        rows = self.session.execute(
+            select(Node.id, Node.position_x, Node.position_y)
+            .where(Node.workflow_id == workflow.id)
+            .order_by(Node.id)
+        ).all()
+        if len(rows) > MAX_LAYOUT_NODES:
+            raise ValueError(f'单次最多布局 {MAX_LAYOUT_NODES} 个节点')
+        edges = self.session.execute(
+            select(Connection.source_node_id, Connection.target_node_id)
+            .where(Connection.workflow_id == workflow.id)
+            .order_by(Connection.id)
+        ).all()
+
+        positions = {row.id: (row.position_x or 0, row.position_y or 0) for row in rows}
+        if mode == 'full':
+            placed = layered_layout(list(positions), edges)
+        else:
+            if node_ids is None:
+                free_ids = {node_id for node_id, (x, y) in positions.items() if _is_unplaced(x, y)}
+            else:
+                free_ids = set(node_ids)
+                missing = free_ids - set(positions)
+                if missing:
+                    raise ValueError(f"节点不存在: {', '.join(str(item) for item in sorted(missing))}")
+            placed = incremental_layout(positions, free_ids, edges)
+
+        placed = {node_id: position for node_id, position in placed.items() if position != positions[node_id]}
+        self._write_positions(placed)
+        return placed
+
+    def _write_positions(self, placed):
+        """按主键批量 UPDATE 坐标和网格列（Core 语句不经过模型上的网格维护）"""
+        if not placed:
+            return
+        table = Node.__table__
+        statement = table.update().where(table.c.id == bindparam('target_node_id')).values(
+            position_x=bindparam('new_x'),
+            position_y=bindparam('new_y'),
+            grid_x=bindparam('new_grid_x'),
+            grid_y=bindparam('new_grid_y'),
+            updated_at=bindparam('laid_out_at')
+        )
+        laid_out_at = datetime.utcnow()
+        params = [
+            {
+                'target_node_id': node_id, 'new_x': x, 'new_y': y,
+                'new_grid_x': grid_cell(x), 'new_grid_y': grid_cell(y), 'laid_out_at': laid_out_at
+            }
+            for node_id, (x, y) in placed.items()
+        ]
+        for start in range(0, len(params), LAYOUT_WRITE_BATCH):
+            self.session.execute(statement, params[start:start + LAYOUT_WRITE_BATCH])
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流图加载器
+
+工作流详情固定用三条按集合读取的查询完成：工作流（连同统计行）、全部节点、
+全部连接。节点和连接直接从 Core 查询行序列化，不构造 ORM 对象，也不会触发
+nodes / connections / input_connections 等关系的懒加载。尚未物化的复制品
+（见 graph_snapshot）改为读取一行图快照。批量读取多个工作流时同样每类
+一条 IN 查询，查询数与工作流数无关。
+"""
+
+from collections import defaultdict
+
+from sqlalchemy import select
+from sqlalchemy.orm import Load
+
+from app.models.workflow import Workflow, WorkflowStats, WorkflowGraphSnapshot
+from app.models.node import Node, Connection, serialize_node, serialize_connection
+
+class WorkflowGraphLoader:
+    """工作流图加载器"""
+
+    def __init__(self, session):
+        self.session = session
+
+    def load_workflow(self, workflow_id):
+        """
+        读取工作流（含延迟加载的画布配置和全局变量）及其统计行，一条查询
+
+        Returns:
+            (workflow, stats)，工作流不存在时为 (None, None)
+        """
+        row = self.session.query(Workflow, WorkflowStats) \
+            .outerjoin(WorkflowStats, WorkflowStats.workflow_id == Workflow.id) \
+            .options(Load(Workflow).undefer_group('content')) \
+            .filter(Workflow.id == workflow_id) \
+            .first()
+        return tuple(row) if row else (None, None)
+
+    def load_graph(self, workflow):
+        """
+        读取工作流的全部节点和连接，两条查询（未物化时为一条快照查询）
+
+        Returns:
+            (节点字典列表, 连接字典列表)
+        """
+        if not workflow.graph_materialized:
+            snapshot = self.session.get(WorkflowGraphSnapshot, workflow.graph_snapshot_id)
+            return snapshot.expand(workflow.id, workflow.created_at)
+
+        workflow_id = workflow.id
+        nodes = self.session.execute(
+            select(Node.__table__).where(Node.workflow_id == workflow_id).order_by(Node.id)
+        )
+        connections = self.session.execute(
+            select(Connection.__table__).where(Connection.workflow_id == workflow_id).order_by(Connection.id)
+        )
+        return [serialize_node(row) for row in nodes], [serialize_connection(row) for row in connections]
+
+    def load_workflows(self, workflow_ids):
+        """
+        批量读取工作流及其统计行，一条 IN 查询
+
+        Returns:
+            {workflow_id: (workflow, stats)}，不存在的ID不在结果中
+        """
+        if not workflow_ids:
+            return {}
+        rows = self.session.query(Workflow, WorkflowStats) \
+            .outerjoin(WorkflowStats, WorkflowStats.workflow_id == Workflow.id) \
+            .options(Load(Workflow).undefer_group('content')) \
+            .filter(Workflow.id.in_(workflow_ids))
+        return {workflow.id: (workflow, stats) for workflow, stats in rows}
+
+    def load_graphs(self, workflows):
+        """
+        批量读取多个工作流的节点和连接：节点、连接、快照各一条查询
+
+        Returns:
+            {workflow_id: (节点字典列表, 连接字典列表)}
+        """
+        graphs = {}
+        materialized = [workflow.id for workflow in workflows if workflow.graph_materialized]
+        snapshot_ids = {workflow.graph_snapshot_id for workflow in workflows if not workflow.graph_materialized}
+
+        if snapshot_ids:
+            snapshots = {
+                snapshot.id: snapshot for snapshot in self.session.query(WorkflowGraphSnapshot)
+                .filter(WorkflowGraphSnapshot.id.in_(snapshot_ids))
+            }
+            for workflow in workflows:
+                if not workflow.graph_materialized:
+                    graphs[workflow.id] = snapshots[workflow.graph_snapshot_id].expand(workflow.id, workflow.created_at)
+
+        if materialized:
+            nodes, connections = defaultdict(list), defaultdict(list)
+            for row in self.session.execute(
+                select(Node.__table__).where(Node.workflow_id.in_(materialized)).order_by(Node.id)
+            ):
+                nodes[row.workflow_id].append(serialize_node(row))
+            for row in self.session.execute(
+                select(Connection.__table__).where(Connection.workflow_id.in_(materialized)).order_by(Connection.id)
+            ):
+                connections[row.workflow_id].append(serialize_connection(row))
+            for workflow_id in materialized:
+                graphs[workflow_id] = (nodes[workflow_id], connections[workflow_id])
+        return graphs
+
+    def to_detail(self, workflow, stats=None, include_stats=True):
+        """组装详情响应：工作流字段 + 节点 + 连接（+ 统计）"""
+        data = workflow.to_dict()
+        data['nodes'], data['connections'] = self.load_graph(workflow)
+        if include_stats:
+            data['stats'] = stats.to_dict() if stats else None
+        return data
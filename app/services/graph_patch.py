@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流图增量修改
+
+编辑器自动保存只提交变化的部分：一组对节点和连接的 add / update / remove
+操作，在一个事务内应用，写入量与变化量成正比而不是与整张图成正比。
+
+并发控制基于 Workflow.version 的乐观锁：请求携带编辑器加载时的版本号，
+先以 UPDATE ... WHERE version = 旧版本 递增版本，影响行数为 0 说明其间
+已有其他修改，整个补丁被拒绝（VersionConflictError）。
+
+操作格式：
+    {"op": "add", "type": "node", "id": "tmp-1", "data": {...}}
+    {"op": "update", "type": "node", "id": 12, "data": {"position": {"x": 10, "y": 20}}}
+    {"op": "remove", "type": "node", "id": 12}
+    {"op": "add", "type": "connection", "id": "tmp-c1",
+     "data": {"source_node_id": "tmp-1", "target_node_id": 12}}
+    {"op": "update", "type": "connection", "id": 5, "data": {"condition": {...}}}
+    {"op": "remove", "type": "connection", "id": 5}
+
+新增节点的 id 是前端临时ID，同一补丁内的连接可以引用它；响应返回临时ID
+到数据库ID的映射。删除节点时一并删除与它相连的连接。
+
+尚未物化的复制品（见 graph_snapshot）先物化再应用补丁，请求中的占位ID
+（-1, -2, ...）换算为新写入的ID，映射同样在响应中返回。
+"""
+
+from datetime import datetime
+
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models.workflow import Workflow
+from app.models.node import Node, Connection
+
+GRAPH_OPS = ('add', 'update', 'remove')
+GRAPH_TARGETS = ('node', 'connection')
+
+# 单个补丁的最大操作数
+MAX_GRAPH_OPERATIONS = 1000
+
+# 允许通过 update 修改的字段（端点变化用 remove + add 表示）
+NODE_PATCH_FIELDS = (
+    'node_type', 'name', 'description', 'config', 'input_schema', 'output_schema',
+    'validation_rules', 'retry_count', 'timeout', 'is_enabled'
+)
+CONNECTION_PATCH_FIELDS = ('source_handle', 'target_handle', 'condition', 'is_enabled')
+
+# 只影响展示、不改变图结构的节点字段
+LAYOUT_FIELDS = ('position', 'position_x', 'position_y', 'name', 'description')
+
+def is_layout_only(operations):
+    """补丁是否只修改节点的位置、名称或描述（不影响结构哈希）"""
+    return all(
+        operation.get('op') == 'update' and operation.get('type') == 'node'
+        and set(operation.get('data') or {}) <= set(LAYOUT_FIELDS)
+        for operation in operations
+    )
+
+class VersionConflictError(ValueError):
+    """工作流已被其他修改更新，客户端需要重新加载后再提交"""
+
+    def __init__(self, current_version=None):
+        super().__init__('工作流已被修改，请刷新后重试')
+        self.current_version = current_version
+
+class GraphPatcher:
+    """工作流图增量修改"""
+
+    def __init__(self, session, snapshot_service):
+        self.session = session
+        self.snapshot_service = snapshot_service
+
+    def apply(self, workflow, expected_version, operations, new_version):
+        """
+        在当前事务内应用补丁（不提交）
+
+        Args:
+            workflow: 已校验权限的工作流
+            expected_version: 客户端持有的版本号
+            operations: 操作列表
+            new_version: 成功后的版本号
+
+        Returns:
+            {'node_ids': {临时ID: 节点ID}, 'connection_ids': {临时ID: 连接ID}}
+        """
+        plan = self._plan(operations)
+        aliases = self.claim(workflow, expected_version, new_version)
+        plan['nodes'].translate(aliases['nodes'])
+        plan['connections'].translate(aliases['connections'])
+
+        nodes = self._load(Node, plan['nodes'].referenced(), workflow.id)
+        connections = self._load(Connection, plan['connections'].referenced(), workflow.id)
+
+        # 删除：先删连接（含与被删节点相连的），再删节点
+        removed_nodes = plan['nodes'].removes
+        for connection_id, connection in connections.items():
+            if connection_id in plan['connections'].updates and (
+                    connection.source_node_id in removed_nodes or connection.target_node_id in removed_nodes):
+                raise ValueError(f'连接 {connection_id} 的端点节点已被删除')
+        if plan['connections'].removes:
+            self.session.query(Connection) \
+                .filter(Connection.workflow_id == workflow.id, Connection.id.in_(plan['connections'].removes)) \
+                .delete(synchronize_session=False)
+            for connection_id in plan['connections'].removes:
+                self.session.expunge(connections.pop(connection_id))
+        if removed_nodes:
+            self.session.query(Connection) \
+                .filter(Connection.workflow_id == workflow.id) \
+                .filter(Connection.source_node_id.in_(removed_nodes) | Connection.target_node_id.in_(removed_nodes)) \
+                .delete(synchronize_session=False)
+            self.session.query(Node) \
+                .filter(Node.workflow_id == workflow.id, Node.id.in_(removed_nodes)) \
+                .delete(synchronize_session=False)
+            for node_id in removed_nodes:
+                self.session.expunge(nodes.pop(node_id))
+
+        # 新增节点，flush 后才有数据库ID供连接引用
+        new_nodes = []
+        added_nodes = {}
+        for temp_id, node_data in plan['nodes'].adds:
+            node = Node.from_data(workflow.id, node_data)
+            self.session.add(node)
+            new_nodes.append(node)
+            if temp_id is not None:
+                added_nodes[temp_id] = node
+        if new_nodes:
+            self.session.flush()
+
+        for node_id, changes in plan['nodes'].updates.items():
+            self._update_node(nodes[node_id], changes)
+
+        added_connections = {}
+        for temp_id, connection_data in plan['connections'].adds:
+            source_id = self._resolve_node(connection_data, 'source', nodes, added_nodes, removed_nodes, aliases['nodes'])
+            target_id = self._resolve_node(connection_data, 'target', nodes, added_nodes, removed_nodes, aliases['nodes'])
+            connection = Connection.from_data(workflow.id, source_id, target_id, connection_data)
+            self.session.add(connection)
+            if temp_id is not None:
+                added_connections[temp_id] = connection
+
+        for connection_id, changes in plan['connections'].updates.items():
+            connection = connections[connection_id]
+            for field in CONNECTION_PATCH_FIELDS:
+                if field in changes:
+                    setattr(connection, field, changes[field])
+
+        self.session.flush()
+        # 关系集合已与数据库不一致
+        self.session.expire(workflow, ['nodes', 'connections'])
+
+        return {
+            'node_ids': {
+                **{str(alias): node_id for alias, node_id in aliases['nodes'].items() if node_id not in removed_nodes},
+                **{temp_id: node.id for temp_id, node in added_nodes.items()}
+            },
+            'connection_ids': {
+                **{
+                    str(alias): connection_id for alias, connection_id in aliases['connections'].items()
+                    if connection_id not in plan['connections'].removes
+                },
+                **{temp_id: connection.id for temp_id, connection in added_connections.items()}
+            }
+        }
+
+    def _plan(self, operations):
+        """校验并按目标归类操作"""
+        if not isinstance(operations, list) or not operations:
+            raise ValueError('操作列表不能为空')
+        if len(operations) > MAX_GRAPH_OPERATIONS:
+            raise ValueError(f'单次最多提交 {MAX_GRAPH_OPERATIONS} 个操作')
+
+        plan = {'nodes': _TargetPlan(), 'connections': _TargetPlan()}
+        for operation in operations:
+            if not isinstance(operation, dict):
+                raise ValueError('无效的操作')
+            op, target = operation.get('op'), operation.get('type')
+            if op not in GRAPH_OPS:
+                raise ValueError(f'无效的操作类型: {op}')
+            if target not in GRAPH_TARGETS:
+                raise ValueError(f'无效的操作对象: {target}')
+            data = operation.get('data') or {}
+            if not isinstance(data, dict):
+                raise ValueError('操作数据必须是对象')
+            plan['nodes' if target == 'node' else 'connections'].add_operation(op, operation.get('id'), data)
+
+        # 新增连接引用的已有节点（非本补丁的临时ID）需要校验归属
+        temp_node_ids = {temp_id for temp_id, _ in plan['nodes'].adds if temp_id is not None}
+        for _, connection_data in plan['connections'].adds:
+            for end in ('source', 'target'):
+                ref = _endpoint(connection_data, end)
+                if str(ref) not in temp_node_ids:
+                    plan['nodes'].endpoint_refs.add(_existing_id(ref))
+
+        plan['nodes'].check()
+        plan['connections'].check()
+        return plan
+
+    def claim(self, workflow, expected_version, new_version):
+        """
+        占有版本并物化工作流，之后可以直接修改节点和连接行（不提交事务）
+
+        Returns:
+            占位ID到数据库ID的映射 {'nodes': {...}, 'connections': {...}}
+        """
+        self._claim_version(workflow, expected_version, new_version)
+        aliases = self.snapshot_service.materialize(workflow) or {'nodes': {}, 'connections': {}}
+        # 图将被修改，快照不再与之一致（数据库中已由 _claim_version 清空）
+        set_committed_value(workflow, 'graph_snapshot_id', None)
+        return aliases
+
+    def _claim_version(self, workflow, expected_version, new_version):
+        """按旧版本号条件更新版本，失败说明已被并发修改"""
+        now = datetime.utcnow()
+        updated = self.session.query(Workflow) \
+            .filter(Workflow.id == workflow.id, Workflow.version == expected_version) \
+            .update({Workflow.version: new_version, Workflow.updated_at: now, Workflow.graph_snapshot_id: None},
+                    synchronize_session=False)
+        if updated != 1:
+            raise VersionConflictError(workflow.version)
+
+        # 同步内存中的对象，不标记为脏，flush 时不会再次 UPDATE
+        set_committed_value(workflow, 'version', new_version)
+        set_committed_value(workflow, 'updated_at', now)
+
+    def _load(self, model, ids, workflow_id):
+        """一次读取补丁引用的已有节点或连接，并校验都属于该工作流"""
+        if not ids:
+            return {}
+        rows = self.session.query(model).filter(model.workflow_id == workflow_id, model.id.in_(ids)).all()
+        loaded = {row.id: row for row in rows}
+        missing = set(ids) - set(loaded)
+        if missing:
+            label = '节点' if model is Node else '连接'
+            raise ValueError(f"{label}不存在: {', '.join(str(item) for item in sorted(missing))}")
+        return loaded
+
+    def _update_node(self, node, changes):
+        """只写入请求中出现的字段，未变化的列不会出现在 UPDATE 中"""
+        position = changes.get('position')
+        if isinstance(position, dict):
+            if 'x' in position:
+                node.position_x = position['x']
+            if 'y' in position:
+                node.position_y = position['y']
+        for field in ('position_x', 'position_y'):
+            if field in changes:
+                setattr(node, field, changes[field])
+        if 'type' in changes and 'node_type' not in changes:
+            changes = {**changes, 'node_type': changes['type']}
+        for field in NODE_PATCH_FIELDS:
+            if field in changes:
+                if field in ('node_type', 'name') and not changes[field]:
+                    raise ValueError('节点类型和名称不能为空')
+                setattr(node, field, changes[field])
+
+    def _resolve_node(self, connection_data, end, nodes, added_nodes, removed_nodes, aliases):
+        """把连接端点（临时ID优先，其次为已有节点ID或占位ID）解析为数据库ID"""
+        ref = _endpoint(connection_data, end)
+        if str(ref) in added_nodes:
+            return added_nodes[str(ref)].id
+        node_id = _existing_id(ref)
+        node_id = aliases.get(node_id, node_id)
+        if node_id in removed_nodes or node_id not in nodes:
+            raise ValueError(f'连接引用了不存在的节点: {ref}')
+        return node_id
+
+class _TargetPlan:
+    """某一类对象（节点或连接）的操作归类"""
+
+    def __init__(self):
+        self.adds = []
+        self.updates = {}
+        self.removes = set()
+        self.endpoint_refs = set()
+
+    def add_operation(self, op, entity_id, data):
+        if op == 'add':
+            temp_id = str(entity_id) if entity_id is not None else None
+            if temp_id is not None and any(temp_id == existing for existing, _ in self.adds):
+                raise ValueError(f'重复的临时ID: {temp_id}')
+            self.adds.append((temp_id, data))
+            return
+
+        entity_id = _existing_id(entity_id)
+        if op == 'update':
+            # 同一对象的多次更新按顺序合并
+            self.updates.setdefault(entity_id, {}).update(data)
+        else:
+            self.removes.add(entity_id)
+
+    def check(self):
+        both = self.removes & set(self.updates)
+        if both:
+            raise ValueError(f'不能在同一补丁中更新并删除: {", ".join(str(item) for item in sorted(both))}')
+
+    def translate(self, aliases):
+        """把占位ID换算为物化后的数据库ID"""
+        if not aliases:
+            return
+        self.updates = {aliases.get(entity_id, entity_id): changes for entity_id, changes in self.updates.items()}
+        self.removes = {aliases.get(entity_id, entity_id) for entity_id in self.removes}
+        self.endpoint_refs = {aliases.get(entity_id, entity_id) for entity_id in self.endpoint_refs}
+
+    def referenced(self):
+        """需要从数据库读取的已有对象ID"""
+        return set(self.updates) | self.removes | self.endpoint_refs
+
+def _endpoint(connection_data, end):
+    """连接端点的引用（source_node_id 或 source）"""
+    ref = connection_data.get(f'{end}_node_id', connection_data.get(end))
+    if ref is None:
+        raise ValueError('连接缺少端点')
+    return ref
+
+def _existing_id(value):
+    """已有对象的数据库ID"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'无效的ID: {value}')
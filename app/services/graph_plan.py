@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流图结构哈希与共享的执行计划
+
+结构哈希只覆盖影响执行的内容：节点类型、配置、输入输出模式、校验规则、
+重试和超时，以及连接拓扑（端口、条件）；忽略节点名称、描述、画布位置和
+数据库ID。未修改过的复制品、由同一模板创建的工作流哈希相同，共用按哈希
+缓存的执行计划（校验结论、节点数等），不必各自重新加载和校验整张图。
+
+节点的规范顺序由 Weisfeiler-Lehman 迭代得到的结构标签决定，与存储顺序
+无关；标签完全相同的节点按原顺序排列。这只可能让同构的图得到不同哈希，
+不会让不同的图得到相同哈希，共享计划是安全的。
+
+全局变量中的 {{变量}} 模板（见 utils.interpolation）在创建执行时按本次输入
+渲染一次，保存在执行记录中。
+"""
+
+import hashlib
+import json
+from collections import defaultdict
+
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models.workflow import Workflow
+from app.services.node_schema_service import node_schemas
+from app.utils.schema_validator import SchemaError
+from app.utils.interpolation import compile_template, make_context, render
+from app.utils.response_cache import response_cache
+
+# 参与结构哈希的节点和连接字段
+STRUCTURAL_NODE_FIELDS = (
+    'node_type', 'config', 'input_schema', 'output_schema', 'validation_rules', 'retry_count', 'timeout', 'is_enabled'
+)
+STRUCTURAL_CONNECTION_FIELDS = ('source_handle', 'target_handle', 'condition', 'is_enabled')
+
+# 标签细化轮数（每轮把邻居的标签并入自身）
+REFINEMENT_ROUNDS = 3
+
+# 节点上需要能编译的模式字段（validation_rules 是自由格式的规则，不按 JSON Schema 编译）
+SCHEMA_FIELDS = (('input_schema', '输入模式'), ('output_schema', '输出模式'))
+
+# 端点不存在的连接使用的标签
+MISSING_NODE = ''
+
+def _digest(value):
+    raw = json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def structural_hash(nodes, connections):
+    """
+    计算图的结构哈希
+
+    Args:
+        nodes: serialize_node 格式的节点
+        connections: serialize_connection 格式的连接
+
+    Returns:
+        sha256 十六进制字符串
+    """
+    node_ids = [node['id'] for node in nodes]
+    contents = {node['id']: [node.get(field) for field in STRUCTURAL_NODE_FIELDS] for node in nodes}
+    edges = [
+        (connection['source_node_id'], connection['target_node_id'],
+         _digest([connection.get(field) for field in STRUCTURAL_CONNECTION_FIELDS]))
+        for connection in connections
+    ]
+
+    labels = {node_id: _digest(content) for node_id, content in contents.items()}
+    for _ in range(min(len(node_ids), REFINEMENT_ROUNDS)):
+        outgoing, incoming = defaultdict(list), defaultdict(list)
+        for source, target, edge in edges:
+            outgoing[source].append((edge, labels.get(target, MISSING_NODE)))
+            incoming[target].append((edge, labels.get(source, MISSING_NODE)))
+        labels = {
+            node_id: _digest([labels[node_id], sorted(outgoing[node_id]), sorted(incoming[node_id])])
+            for node_id in node_ids
+        }
+
+    # sorted 是稳定排序，标签相同的节点保持原顺序
+    order = sorted(range(len(node_ids)), key=lambda index: labels[node_ids[index]])
+    rank = {node_ids[index]: position for position, index in enumerate(order)}
+    return _digest({
+        'nodes': [contents[node_ids[index]] for index in order],
+        'connections': sorted([rank.get(source, -1), rank.get(target, -1), edge] for source, target, edge in edges)
+    })
+
+def validate_graph(nodes, connections):
+    """校验工作流结构（graph_loader 读出的节点和连接），返回错误信息列表"""
+    errors = []
+    node_ids = {node['id'] for node in nodes}
+
+    if not node_ids:
+        errors.append('工作流没有节点')
+    for node in nodes:
+        # 顺带把节点自身的模式编译进校验缓存
+        for field, label in SCHEMA_FIELDS:
+            try:
+                node_schemas.schema_validator(node.get(field))
+            except SchemaError as e:
+                errors.append(f'节点 {node["id"]} 的{label}无效: {e}')
+    for connection in connections:
+        if connection['source_node_id'] not in node_ids or connection['target_node_id'] not in node_ids:
+            errors.append(f'连接 {connection["id"]} 引用了不存在的节点')
+    return errors
+
+def plan_cache_key(graph_hash):
+    """执行计划的缓存键（内容由哈希决定，不需要失效标签）"""
+    return f'graph_plan:{graph_hash}'
+
+class GraphPlanService:
+    """结构哈希与执行计划"""
+
+    def __init__(self, session, graph_loader):
+        self.session = session
+        self.graph_loader = graph_loader
+
+    def graph_hash_of(self, workflow):
+        """工作流的结构哈希，旧数据没有时计算并记录"""
+        if not workflow.graph_hash:
+            self.refresh_hash(workflow)
+        return workflow.graph_hash
+
+    def store_hash(self, workflow, graph_hash):
+        """记录结构哈希，不改变 updated_at，也不标记对象为脏"""
+        self.session.query(Workflow) \
+            .filter(Workflow.id == workflow.id) \
+            .update({Workflow.graph_hash: graph_hash, Workflow.updated_at: Workflow.updated_at},
+                    synchronize_session=False)
+        set_committed_value(workflow, 'graph_hash', graph_hash)
+
+    def refresh_hash(self, workflow):
+        """按当前的节点和连接重新计算哈希"""
+        self.store_hash(workflow, structural_hash(*self.graph_loader.load_graph(workflow)))
+
+    def get_plan(self, workflow):
+        """
+        工作流的执行计划，结构相同的工作流共用一份
+
+        Returns:
+            {'graph_hash', 'valid', 'errors', 'node_count', 'connection_count'}
+        """
+        graph = None
+        if not workflow.graph_hash:
+            graph = self.graph_loader.load_graph(workflow)
+            self.store_hash(workflow, structural_hash(*graph))
+
+        def compile_plan():
+            nodes, connections = graph or self.graph_loader.load_graph(workflow)
+            errors = validate_graph(nodes, connections)
+            return {
+                'graph_hash': workflow.graph_hash,
+                'valid': not errors,
+                'errors': errors,
+                'node_count': len(nodes),
+                'connection_count': len(connections)
+            }
+
+        # 校验失败的结论带有具体连接ID，只缓存通过校验的计划
+        return response_cache.get_or_load(
+            plan_cache_key(workflow.graph_hash), [], compile_plan, cacheable=lambda plan: plan['valid']
+        )
+
+    def render_variables(self, workflow, input_data=None):
+        """渲染本次执行的全局变量（可以引用执行输入），不含变量的全局变量原样返回"""
+        compiled = compile_template(workflow.global_variables or {})
+        return render(compiled, make_context(input_data=input_data))
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流图快照（写时复制）
+
+图内容（节点和连接，不含ID和时间）规范化后取 sha256 作为快照主键，快照一经
+写入不再修改，内容相同的图共用一行。
+
+复制工作流时不再逐行复制节点和连接：复制品只记录源工作流当前图的快照
+（graph_materialized = False），读取时直接展开快照。源工作流的快照ID缓存在
+graph_snapshot_id 上，同一模板被复制成千上万次，除第一次外都只插入一行
+workflows。复制品第一次被修改或执行时才把快照物化为 nodes / connections
+行（节点执行记录和增量修改都以节点ID为准），此后与普通工作流相同。任何改变
+图的写操作都会清空 graph_snapshot_id，下次复制时再按新内容生成快照。
+"""
+
+from datetime import datetime
+import hashlib
+import json
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models.workflow import Workflow, WorkflowGraphSnapshot
+from app.models.node import Node, Connection
+
+# 快照中保存的节点和连接内容字段
+SNAPSHOT_NODE_FIELDS = (
+    'node_type', 'name', 'description', 'position_x', 'position_y', 'config', 'input_schema',
+    'output_schema', 'validation_rules', 'retry_count', 'timeout', 'is_enabled'
+)
+SNAPSHOT_CONNECTION_FIELDS = ('source_handle', 'target_handle', 'condition', 'is_enabled')
+
+def snapshot_content(nodes, connections):
+    """
+    serialize_node / serialize_connection 格式的图 -> 快照内容
+
+    节点按给定顺序保存，连接端点改为节点下标，与节点ID无关。
+    """
+    index = {node['id']: position for position, node in enumerate(nodes)}
+    content_nodes = []
+    for node in nodes:
+        position = node.get('position') or {}
+        values = {**node, 'position_x': position.get('x'), 'position_y': position.get('y')}
+        content_nodes.append({field: values.get(field) for field in SNAPSHOT_NODE_FIELDS})
+
+    content_connections = []
+    for connection in connections:
+        if connection['source_node_id'] not in index or connection['target_node_id'] not in index:
+            raise ValueError('连接引用了不存在的节点')
+        content_connections.append({
+            'source': index[connection['source_node_id']],
+            'target': index[connection['target_node_id']],
+            **{field: connection.get(field) for field in SNAPSHOT_CONNECTION_FIELDS}
+        })
+    return {'nodes': content_nodes, 'connections': content_connections}
+
+def content_hash(content):
+    """快照内容的 sha256（规范化 JSON：键排序、无空白）"""
+    raw = json.dumps(content, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+class GraphSnapshotService:
+    """工作流图快照服务"""
+
+    def __init__(self, session, graph_loader):
+        self.session = session
+        self.graph_loader = graph_loader
+
+    def snapshot_of(self, workflow):
+        """
+        工作流当前图的快照ID
+
+        已缓存时不读取图；否则读取一次图、写入（或复用）快照，并把快照ID记在
+        工作流上。记录时以 updated_at 为条件，读取期间图被修改则不记录。
+        """
+        if workflow.graph_snapshot_id:
+            return workflow.graph_snapshot_id
+
+        nodes, connections = self.graph_loader.load_graph(workflow)
+        snapshot_id = self.get_or_create(snapshot_content(nodes, connections))
+
+        # 保持 updated_at 不变：记录快照不是对工作流的修改
+        self.session.query(Workflow) \
+            .filter(Workflow.id == workflow.id, Workflow.updated_at == workflow.updated_at,
+                    Workflow.graph_snapshot_id.is_(None)) \
+            .update({Workflow.graph_snapshot_id: snapshot_id, Workflow.updated_at: Workflow.updated_at},
+                    synchronize_session=False)
+        return snapshot_id
+
+    def get_or_create(self, content):
+        """按内容哈希获取或写入快照，返回快照ID"""
+        snapshot_id = content_hash(content)
+        if self.session.get(WorkflowGraphSnapshot, snapshot_id) is not None:
+            return snapshot_id
+
+        try:
+            with self.session.begin_nested():
+                self.session.add(WorkflowGraphSnapshot(
+                    id=snapshot_id,
+                    nodes=content['nodes'],
+                    connections=content['connections'],
+                    node_count=len(content['nodes']),
+                    connection_count=len(content['connections'])
+                ))
+        except IntegrityError:
+            # 并发写入了相同内容的快照
+            pass
+        return snapshot_id
+
+    def materialize(self, workflow, new_version=None):
+        """
+        把未物化工作流的快照写入 nodes / connections 表
+
+        以 graph_materialized 为条件更新作为占有，并发的物化只有一个生效。
+        物化后节点和连接的ID从占位ID变为数据库ID，因此同时更新 updated_at
+        （详情的 ETag 随之变化），调用方提交后需要按工作流标签失效响应缓存。
+
+        Args:
+            new_version: 物化后的版本号，提供时一并更新。不是由所有者的修改
+                触发的物化（例如执行）需要递增版本号，所有者按旧版本号和
+                占位ID提交的修改会得到版本冲突，而不是找不到节点
+
+        Returns:
+            占位ID到数据库ID的映射 {'nodes': {-1: 12, ...}, 'connections': {...}}，
+            已物化时为 None
+        """
+        if workflow.graph_materialized:
+            return None
+
+        now = datetime.utcnow()
+        values = {Workflow.graph_materialized: True, Workflow.updated_at: now}
+        if new_version is not None:
+            values[Workflow.version] = new_version
+        claimed = self.session.query(Workflow) \
+            .filter(Workflow.id == workflow.id, Workflow.graph_materialized.is_(False)) \
+            .update(values, synchronize_session=False)
+        if claimed != 1:
+            # 已由其他请求物化
+            self.session.refresh(workflow, ['graph_materialized', 'graph_snapshot_id', 'version', 'updated_at'])
+            return None
+
+        snapshot = self.session.get(WorkflowGraphSnapshot, workflow.graph_snapshot_id)
+        nodes = [Node.from_data(workflow.id, node_data) for node_data in snapshot.nodes]
+        self.session.add_all(nodes)
+        self.session.flush()
+
+        connections = [
+            Connection.from_data(
+                workflow.id, nodes[connection_data['source']].id, nodes[connection_data['target']].id, connection_data
+            )
+            for connection_data in snapshot.connections
+        ]
+        self.session.add_all(connections)
+        self.session.flush()
+
+        set_committed_value(workflow, 'graph_materialized', True)
+        set_committed_value(workflow, 'updated_at', now)
+        if new_version is not None:
+            set_committed_value(workflow, 'version', new_version)
+        self.session.expire(workflow, ['nodes', 'connections'])
+        return {
+            'nodes': {-(index + 1): node.id for index, node in enumerate(nodes)},
+            'connections': {-(index + 1): connection.id for index, connection in enumerate(connections)}
+        }
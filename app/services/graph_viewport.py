@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按视口读取大型工作流
+
+节点按坐标落入边长 NODE_GRID_SIZE 的网格单元（nodes.grid_x / grid_y，由模型
+随坐标维护），(workflow_id, grid_x, grid_y) 索引上每个网格列是一段 grid_y
+区间。视口查询只读取与视口相交的单元中的节点、一端在这些节点上的连接，以及
+这些连接另一端的节点位置；画布其余部分以网格汇总（LOD）表示：每个单元的节点
+数和包围盒，单元过多时逐级合并。汇总按工作流缓存，图被修改时随工作流标签
+失效。首屏只与视口内的节点数有关，与整张图的规模无关。
+
+尚未物化的复制品没有节点行，读取快照后在内存中按同样的规则筛选。
+"""
+
+import math
+
+from sqlalchemy import select, func, or_
+
+from app.models.node import Node, Connection, NODE_GRID_SIZE, grid_cell, serialize_node, serialize_connection
+from app.utils.response_cache import response_cache, workflow_tag
+
+# 视口向左上扩展的距离：节点坐标是左上角，位置略在视口外的节点仍可能部分可见
+NODE_EXTENT = 320
+
+# 单次视口最多返回的节点数，超过时截断并标记 truncated
+MAX_VIEWPORT_NODES = 2000
+
+# 视口最多跨越的网格单元数（列数 × 行数）
+MAX_VIEWPORT_CELLS = 4096
+
+# 汇总最多包含的单元数，超过时把相邻单元 2×2 合并
+MAX_SUMMARY_CELLS = 256
+
+def parse_bbox(value):
+    """解析视口 "x1,y1,x2,y2"，返回 (min_x, min_y, max_x, max_y)"""
+    try:
+        x1, y1, x2, y2 = (float(part) for part in (value or '').split(','))
+        # inf / nan 无法换算为网格坐标
+        if not all(math.isfinite(part) for part in (x1, y1, x2, y2)):
+            raise ValueError
+    except ValueError:
+        raise ValueError('视口格式应为 x1,y1,x2,y2')
+    bbox = (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+
+    columns = grid_cell(bbox[2]) - grid_cell(bbox[0] - NODE_EXTENT) + 1
+    rows = grid_cell(bbox[3]) - grid_cell(bbox[1] - NODE_EXTENT) + 1
+    if columns * rows > MAX_VIEWPORT_CELLS:
+        raise ValueError('视口范围过大')
+    return bbox
+
+def _in_bbox(x, y, bbox):
+    min_x, min_y, max_x, max_y = bbox
+    return min_x - NODE_EXTENT <= (x or 0) <= max_x and min_y - NODE_EXTENT <= (y or 0) <= max_y
+
+def _endpoint(node):
+    """视口外连接端点的最小信息"""
+    return {'id': node['id'], 'node_type': node['node_type'], 'position': node['position']}
+
+def summarize_cells(cells, max_cells=MAX_SUMMARY_CELLS):
+    """
+    网格汇总：{(grid_x, grid_y): [count, min_x, min_y, max_x, max_y]} 逐级 2×2 合并
+    到不超过 max_cells 个单元
+
+    Returns:
+        {'cell_size', 'cells': [{'x', 'y', 'count', 'bounds'}], 'bounds'}
+    """
+    size = NODE_GRID_SIZE
+    while len(cells) > max_cells:
+        merged = {}
+        for (x, y), (count, min_x, min_y, max_x, max_y) in cells.items():
+            key = (x // 2, y // 2)
+            if key in merged:
+                entry = merged[key]
+                entry[0] += count
+                entry[1:] = [min(entry[1], min_x), min(entry[2], min_y), max(entry[3], max_x), max(entry[4], max_y)]
+            else:
+                merged[key] = [count, min_x, min_y, max_x, max_y]
+        cells, size = merged, size * 2
+
+    bounds = None
+    if cells:
+        bounds = [
+            min(cell[1] for cell in cells.values()), min(cell[2] for cell in cells.values()),
+            max(cell[3] for cell in cells.values()), max(cell[4] for cell in cells.values())
+        ]
+    return {
+        'cell_size': size,
+        'cells': [
+            {'x': x, 'y': y, 'count': count, 'bounds': [min_x, min_y, max_x, max_y]}
+            for (x, y), (count, min_x, min_y, max_x, max_y) in sorted(cells.items())
+        ],
+        'bounds': bounds
+    }
+
+class GraphViewportService:
+    """按视口读取节点和连接"""
+
+    def __init__(self, session, graph_loader):
+        self.session = session
+        self.graph_loader = graph_loader
+
+    def get_viewport(self, workflow, bbox):
+        """
+        视口内的节点和连接，以及整张图的网格汇总
+
+        Returns:
+            {'bbox', 'nodes', 'connections', 'external_nodes', 'truncated', 'summary'}
+        """
+        if workflow.graph_materialized:
+            window = self._query_window(workflow.id, bbox)
+        else:
+            window = self._filter_window(*self.graph_loader.load_graph(workflow), bbox)
+
+        window['bbox'] = list(bbox)
+        window['summary'] = response_cache.get_or_load(
+            f'workflow:{workflow.id}:viewport_summary',
+            [workflow_tag(workflow.id)],
+            lambda: self.get_summary(workflow)
+        )
+        return window
+
+    def get_summary(self, workflow):
+        """整张图的网格汇总及节点、连接总数（按索引分组聚合，只返回单元）"""
+        if not workflow.graph_materialized:
+            nodes, connections = self.graph_loader.load_graph(workflow)
+            cells = {}
+            for node in nodes:
+                x, y = node['position']['x'] or 0, node['position']['y'] or 0
+                key = (grid_cell(x), grid_cell(y))
+                entry = cells.get(key)
+                if entry is None:
+                    cells[key] = [1, x, y, x, y]
+                else:
+                    entry[:] = [entry[0] + 1, min(entry[1], x), min(entry[2], y), max(entry[3], x), max(entry[4], y)]
+            connection_count = len(connections)
+        else:
+            rows = self.session.execute(
+                select(
+                    Node.grid_x, Node.grid_y, func.count(),
+                    func.min(Node.position_x), func.min(Node.position_y),
+                    func.max(Node.position_x), func.max(Node.position_y)
+                )
+                .where(Node.workflow_id == workflow.id)
+                .group_by(Node.grid_x, Node.grid_y)
+            )
+            cells = {(row[0], row[1]): [row[2], *(value or 0 for value in row[3:])] for row in rows}
+            connection_count = self.session.query(func.count(Connection.id)) \
+                .filter(Connection.workflow_id == workflow.id).scalar()
+
+        summary = summarize_cells(cells)
+        summary['node_count'] = sum(cell['count'] for cell in summary['cells'])
+        summary['connection_count'] = connection_count
+        return summary
+
+    def _query_window(self, workflow_id, bbox):
+        """视口内的节点：每个网格列一次索引区间扫描，再按坐标精确筛选"""
+        min_x, min_y, max_x, max_y = bbox
+        columns = range(grid_cell(min_x - NODE_EXTENT), grid_cell(max_x) + 1)
+
+        rows = self.session.execute(
+            select(Node.__table__)
+            .where(
+                Node.workflow_id == workflow_id,
+                Node.grid_x.in_(list(columns)),
+                Node.grid_y.between(grid_cell(min_y - NODE_EXTENT), grid_cell(max_y)),
+                Node.position_x.between(min_x - NODE_EXTENT, max_x),
+                Node.position_y.between(min_y - NODE_EXTENT, max_y)
+            )
+            .order_by(Node.id)
+            .limit(MAX_VIEWPORT_NODES + 1)
+        ).all()
+        truncated = len(rows) > MAX_VIEWPORT_NODES
+        nodes = [serialize_node(row) for row in rows[:MAX_VIEWPORT_NODES]]
+        node_ids = [node['id'] for node in nodes]
+        if not node_ids:
+            return {'nodes': [], 'connections': [], 'external_nodes': [], 'truncated': truncated}
+
+        connections = [
+            serialize_connection(row) for row in self.session.execute(
+                select(Connection.__table__)
+                .where(
+                    Connection.workflow_id == workflow_id,
+                    or_(Connection.source_node_id.in_(node_ids), Connection.target_node_id.in_(node_ids))
+                )
+                .order_by(Connection.id)
+            )
+        ]
+
+        loaded = set(node_ids)
+        external_ids = {
+            endpoint for connection in connections
+            for endpoint in (connection['source_node_id'], connection['target_node_id'])
+            if endpoint not in loaded
+        }
+        external_nodes = []
+        if external_ids:
+            external_nodes = [
+                {'id': row.id, 'node_type': row.node_type, 'position': {'x': row.position_x, 'y': row.position_y}}
+                for row in self.session.execute(
+                    select(Node.id, Node.node_type, Node.position_x, Node.position_y)
+                    .where(Node.id.in_(external_ids))
+                    .order_by(Node.id)
+                )
+            ]
+
+        return {'nodes': nodes, 'connections': connections, 'external_nodes': external_nodes, 'truncated': truncated}
+
+    def _filter_window(self, nodes, connections, bbox):
+        """在内存中按视口筛选（未物化的复制品）"""
+        inside = [node for node in nodes if _in_bbox(node['position']['x'], node['position']['y'], bbox)]
+        truncated = len(inside) > MAX_VIEWPORT_NODES
+        inside = inside[:MAX_VIEWPORT_NODES]
+
+        loaded = {node['id'] for node in inside}
+        window_connections = [
+            connection for connection in connections
+            if connection['source_node_id'] in loaded or connection['target_node_id'] in loaded
+        ]
+        by_id = {node['id']: node for node in nodes}
+        external_ids = sorted({
+            endpoint for connection in window_connections
+            for endpoint in (connection['source_node_id'], connection['target_node_id'])
+            if endpoint not in loaded
+        })
+        return {
+            'nodes': inside,
+            'connections': window_connections,
+            'external_nodes': [_endpoint(by_id[node_id]) for node_id in external_ids],
+            'truncated': truncated
+        }
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流广场统计服务
+
+广场统计保存在 marketplace_counters 物化计数器中，由工作流的发布、复制、
+删除在同一事务内以 UPDATE ... SET value = value + n 方式增减，
+读取时只按计数器名称命中唯一索引，不对业务大表做 COUNT(*)。
+"""
+
+from collections import Counter, namedtuple
+from datetime import datetime
+import logging
+
+from sqlalchemy import func, insert, update
+from sqlalchemy.exc import IntegrityError
+
+from app.models.marketplace import MarketplaceCounter
+from app.models.workflow import Workflow, WorkflowStatus, WorkflowCategory, WorkflowStats
+
+logger = logging.getLogger(__name__)
+
+# 计数器名称
+PUBLISHED_WORKFLOWS = 'workflows.published'
+TOTAL_FORKS = 'workflows.forks'
+TOTAL_AUTHORS = 'users.authors'
+CATEGORY_PREFIX = 'category:'
+AUTHOR_PREFIX = 'author:'
+
+# 工作流在广场中的上架状态：是否上架、分类、作者
+ListingState = namedtuple('ListingState', ['listed', 'category', 'user_id'])
+
+def listing_state(workflow):
+    """获取工作流当前的上架状态"""
+    return ListingState(
+        listed=workflow.status == WorkflowStatus.PUBLISHED and bool(workflow.is_public),
+        category=workflow.category,
+        user_id=workflow.user_id
+    )
+
+def category_counter(category):
+    """分类计数器名称"""
+    value = category.value if isinstance(category, WorkflowCategory) else category
+    return f'{CATEGORY_PREFIX}{value or WorkflowCategory.OTHER.value}'
+
+class MarketplaceStatsService:
+    """工作流广场统计服务"""
+
+    def __init__(self, session):
+        self.session = session
+
+    def record_fork(self):
+        """记录一次复制"""
+        self.increment(TOTAL_FORKS, 1)
+
+    def record_listing_change(self, before, after):
+        """根据工作流变更前后的上架状态调整已发布数、分类数和作者数"""
+        if before == after:
+            return
+
+        deltas = Counter()
+        for state, sign in ((before, -1), (after, 1)):
+            if state and state.listed:
+                deltas[PUBLISHED_WORKFLOWS] += sign
+                deltas[category_counter(state.category)] += sign
+                deltas[f'{AUTHOR_PREFIX}{state.user_id}'] += sign
+
+        for name, delta in deltas.items():
+            if not delta:
+                continue
+            value = self.increment(name, delta)
+
+            # 作者已发布数从0变为正数（或降为0）时调整作者总数
+            if name.startswith(AUTHOR_PREFIX):
+                if delta > 0 and value == delta:
+                    self.increment(TOTAL_AUTHORS, 1)
+                elif delta < 0 and value == 0:
+                    self.increment(TOTAL_AUTHORS, -1)
+
+    def increment(self, name, delta=1):
+        """原子地增减计数器并返回新值，计数器不存在时创建"""
+        if not delta:
+            return None
+
+        statement = update(MarketplaceCounter).where(MarketplaceCounter.name == name).values(
+            value=MarketplaceCounter.value + delta,
+            updated_at=datetime.utcnow()
+        ).execution_options(synchronize_session=False)
+
+        if self.session.execute(statement).rowcount == 0:
+            try:
+                with self.session.begin_nested():
+                    self.session.execute(insert(MarketplaceCounter).values(
+                        name=name, value=delta, updated_at=datetime.utcnow()
+                    ))
+            except IntegrityError:
+                # 并发事务已经创建了该计数器
+                self.session.execute(statement)
+
+        return self.session.query(MarketplaceCounter.value).filter(MarketplaceCounter.name == name).scalar()
+
+    def get_marketplace_stats(self, top_categories=5):
+        """读取广场统计"""
+        counters = dict(self.session.query(MarketplaceCounter.name, MarketplaceCounter.value).filter(
+            MarketplaceCounter.name.in_([PUBLISHED_WORKFLOWS, TOTAL_FORKS, TOTAL_AUTHORS])
+        ).all())
+
+        categories = self.session.query(MarketplaceCounter.name, MarketplaceCounter.value).filter(
+            MarketplaceCounter.name.like(f'{CATEGORY_PREFIX}%'),
+            MarketplaceCounter.value > 0
+        ).order_by(MarketplaceCounter.value.desc()).limit(top_categories).all()
+
+        return {
+            'total_workflows': counters.get(PUBLISHED_WORKFLOWS, 0),
+            'total_users': counters.get(TOTAL_AUTHORS, 0),
+            'total_forks': counters.get(TOTAL_FORKS, 0),
+            'popular_categories': [
+                {
+                    'value': name[len(CATEGORY_PREFIX):],
+                    'label': name[len(CATEGORY_PREFIX):].replace('_', ' ').title(),
+                    'count': value
+                }
+                for name, value in categories
+            ]
+        }
+
+    def rebuild(self):
+        """按业务表重新计算全部计数器（仅用于初始化或修复数据，不应在请求中调用）"""
+        listed = (Workflow.status == WorkflowStatus.PUBLISHED, Workflow.is_public.is_(True))
+        values = {
+            PUBLISHED_WORKFLOWS: self.session.query(func.count(Workflow.id)).filter(*listed).scalar(),
+            TOTAL_FORKS: self.session.query(func.coalesce(func.sum(WorkflowStats.fork_count), 0)).scalar()
+        }
+
+        for category, count in self.session.query(Workflow.category, func.count(Workflow.id)) \
+                .filter(*listed).group_by(Workflow.category):
+            # 未分类和 OTHER 共用 category:other 计数器
+            name = category_counter(category)
+            values[name] = values.get(name, 0) + count
+
+        authors = self.session.query(Workflow.user_id, func.count(Workflow.id)) \
+            .filter(*listed).group_by(Workflow.user_id).all()
+        for user_id, count in authors:
+            values[f'{AUTHOR_PREFIX}{user_id}'] = count
+        values[TOTAL_AUTHORS] = len(authors)
+
+        self.session.query(MarketplaceCounter).delete(synchronize_session=False)
+        self.session.bulk_insert_mappings(MarketplaceCounter, [
+            {'name': name, 'value': value, 'updated_at': datetime.utcnow()}
+            for name, value in values.items()
+        ])
+        logger.info(f"Rebuilt {len(values)} marketplace counters")
+        return values
+
+def init_marketplace_counters(app, session):
+    """启动时计数器表为空（新部署或刚执行迁移）则按业务表初始化计数器"""
+    try:
+        with app.app_context():
+            if session.query(MarketplaceCounter.id).first() is None:
+                MarketplaceStatsService(session).rebuild()
+                session.commit()
+    except IntegrityError:
+        # 其他进程同时完成了初始化
+        session.rollback()
+    except Exception as e:
+        session.rollback()
+        logger.warning(f"Failed to initialize marketplace counters: {str(e)}")
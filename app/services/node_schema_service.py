@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+节点输入输出的模式校验
+
+模式编译为校验闭包（见 utils.schema_validator），在进程内缓存：
+    节点类型的 input_schema / output_schema 按 (name, version) 编译一次，节点类型
+    被修改（版本号或 updated_at 变化）时重新编译并替换旧的闭包；
+    节点自身的 input_schema / output_schema 覆盖节点类型的模式，按模式内容缓存
+    （LRU），结构相同的工作流共用。validation_rules 是自由格式的规则，不是
+    JSON Schema，不在这里编译。
+闭包不能序列化，不放进共享的响应缓存；每个进程按版本各自编译，不需要跨进程失效。
+应用中没有修改节点类型的接口（节点类型只由 init_db 写入初始数据），直接改库
+时只要更新 version 或 updated_at，下次取校验时就会重新编译，不需要显式失效。
+
+节点执行器在开始执行时为每个节点取一次 NodeValidators，每次调用节点时只执行
+闭包（目前代码中还没有节点执行器，execute_workflow 只创建执行记录；发布和
+执行前的结构校验会把节点的模式编译进缓存）。校验方式按环境配置
+（NODE_SCHEMA_VALIDATION）：full 每次校验，sampled 按 NODE_SCHEMA_SAMPLE_RATE
+抽样校验，off 不校验。
+"""
+
+import json
+import random
+import threading
+from collections import OrderedDict
+
+from app.utils.schema_validator import compile_schema, SchemaValidationError
+
+VALIDATION_MODES = ('full', 'sampled', 'off')
+
+# 按内容缓存的模式数上限
+MAX_CACHED_SCHEMAS = 1024
+
+def _field(obj, name):
+    """NodeType / Node 实例或其字典形式（to_dict、serialize_node）的字段"""
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+def _stamp(node_type):
+    """节点类型的版本标识"""
+    updated_at = _field(node_type, 'updated_at')
+    if hasattr(updated_at, 'isoformat'):
+        updated_at = updated_at.isoformat()
+    return _field(node_type, 'version'), updated_at
+
+class NodeValidators:
+    """一个节点的输入、输出校验"""
+
+    __slots__ = ('registry', 'input_check', 'output_check')
+
+    def __init__(self, registry, input_check, output_check):
+        self.registry = registry
+        self.input_check = input_check
+        self.output_check = output_check
+
+    def validate_input(self, data):
+        """按当前校验方式校验节点输入，不符合时抛出 SchemaValidationError"""
+        self._run(self.input_check, data, '输入')
+
+    def validate_output(self, data):
+        """按当前校验方式校验节点输出，不符合时抛出 SchemaValidationError"""
+        self._run(self.output_check, data, '输出')
+
+    def _run(self, check, value, label):
+        if check is None:
+            return
+        registry = self.registry
+        if registry.mode != 'full':
+            if registry.mode == 'off' or random.random() >= registry.sample_rate:
+                return
+        error = check(value)
+        if error is not None:
+            raise SchemaValidationError(label, *error)
+
+class NodeSchemaRegistry:
+    """编译后的节点校验闭包（每个进程一份）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # {节点类型名称: ((version, updated_at), (输入校验, 输出校验))}
+        self._types = {}
+        # {模式的规范 JSON: 校验闭包}
+        self._schemas = OrderedDict()
+        self.mode = 'full'
+        self.sample_rate = 0.1
+
+    def configure(self, mode='full', sample_rate=0.1):
+        """设置校验方式和抽样比例"""
+        if mode not in VALIDATION_MODES:
+            raise ValueError(f'无效的校验方式: {mode}')
+        sample_rate = float(sample_rate)
+        if not 0 <= sample_rate <= 1:
+            raise ValueError('抽样比例应在 0 到 1 之间')
+        self.mode = mode
+        self.sample_rate = sample_rate
+
+    def node_validators(self, node, node_type=None):
+        """
+        节点的校验：节点自身的模式优先，否则使用节点类型的模式
+
+        Args:
+            node: Node 实例或 serialize_node 格式
+            node_type: NodeType 实例或 to_dict 格式，可选
+        """
+        type_input, type_output = self.type_validators(node_type) if node_type is not None else (None, None)
+
+        input_schema, output_schema = _field(node, 'input_schema'), _field(node, 'output_schema')
+        input_check = self.schema_validator(input_schema) if input_schema else type_input
+        output_check = self.schema_validator(output_schema) if output_schema else type_output
+        return NodeValidators(self, input_check, output_check)
+
+    def type_validators(self, node_type):
+        """节点类型的 (输入校验, 输出校验)，按 (name, version) 编译一次"""
+        name, stamp = _field(node_type, 'name'), _stamp(node_type)
+        entry = self._types.get(name)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+
+        validators = (
+            self.schema_validator(_field(node_type, 'input_schema')),
+            self.schema_validator(_field(node_type, 'output_schema'))
+        )
+        with self._lock:
+            self._types[name] = (stamp, validators)
+        return validators
+
+    def schema_validator(self, schema):
+        """
+        按内容缓存的校验闭包
+
+        Returns:
+            校验闭包；模式为空或不施加约束时为 None
+
+        Raises:
+            SchemaError: 模式无效
+        """
+        if not schema:
+            return None
+        key = json.dumps(schema, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+        with self._lock:
+            if key in self._schemas:
+                self._schemas.move_to_end(key)
+                return self._schemas[key]
+
+        check = compile_schema(schema)
+        with self._lock:
+            self._schemas[key] = check
+            while len(self._schemas) > MAX_CACHED_SCHEMAS:
+                self._schemas.popitem(last=False)
+        return check
+
+# 全局校验注册表（每个进程一份）
+node_schemas = NodeSchemaRegistry()
+
+def init_node_schemas(app):
+    """按配置设置节点输入输出的校验方式"""
+    node_schemas.configure(
+        app.config.get('NODE_SCHEMA_VALIDATION', 'full'),
+        app.config.get('NODE_SCHEMA_SAMPLE_RATE', 0.1)
+    )
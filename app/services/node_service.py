@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+节点类型服务
+
+节点类型目录很小，且应用中没有修改节点类型的接口（只由 init_db 写入），
+不放进响应缓存：目录接口每次计算 ETag，客户端缓存有效时返回 304，否则直接
+读表，不存在需要失效的缓存副本。
+"""
+
+import logging
+
+from app.models.node import NodeType
+from app.utils.http_cache import make_etag
+
+logger = logging.getLogger(__name__)
+
+class NodeService:
+    """节点类型服务"""
+
+    def __init__(self, session):
+        self.session = session
+
+    def get_node_types_etag(self):
+        """由启用节点类型的 (id, version, updated_at) 计算目录的强 ETag"""
+        versions = self.session.query(NodeType.id, NodeType.version, NodeType.updated_at) \
+            .filter(NodeType.is_enabled.is_(True)).order_by(NodeType.id).all()
+        return make_etag('node_types', [tuple(row) for row in versions])
+
+    def get_node_types(self):
+        """获取启用的节点类型列表"""
+        node_types = self.session.query(NodeType).filter(NodeType.is_enabled.is_(True)) \
+            .order_by(NodeType.category, NodeType.name).all()
+        return [node_type.to_dict() for node_type in node_types]
+
+    def get_node_type_etag(self, type_id):
+        """计算单个节点类型的强 ETag"""
+        row = self._filter_type(self.session.query(NodeType.id, NodeType.version, NodeType.updated_at), type_id).first()
+        if not row:
+            raise ValueError('节点类型不存在')
+        return make_etag('node_type', *row)
+
+    def get_node_type_detail(self, type_id):
+        """按ID或名称获取节点类型详情"""
+        node_type = self._filter_type(self.session.query(NodeType), type_id).first()
+        if not node_type:
+            raise ValueError('节点类型不存在')
+        return node_type.to_dict()
+
+    def _filter_type(self, query, type_id):
+        """按ID（纯数字）或名称筛选节点类型"""
+        if str(type_id).isdigit():
+            return query.filter(NodeType.id == int(type_id))
+        return query.filter(NodeType.name == type_id)
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流全文检索
+
+按数据库方言选择检索后端：
+- SQLite：FTS5 虚拟表，写入前先把中文切成单字 + 二元组(bigram)，用 bm25() 排序；
+- MySQL：InnoDB FULLTEXT 索引 + ngram 解析器，按 MATCH ... AGAINST 的相关度排序；
+- 其他数据库或全文索引表不存在时退化为 LIKE 查询。
+
+全文索引表由迁移 012 创建；索引在工作流创建、更新、复制和删除的同一事务中
+同步维护，表为空时在启动时回填。
+"""
+
+import logging
+import re
+import weakref
+
+from sqlalchemy import column, false, inspect, table, text
+
+from app.models.workflow import Workflow, WorkflowStatus
+
+logger = logging.getLogger(__name__)
+
+# 中日韩统一表意文字（含扩展A区和兼容区）
+CJK_CHARS = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+CJK_PATTERN = re.compile(f'[{CJK_CHARS}]')
+TOKEN_PATTERN = re.compile(f'[{CJK_CHARS}]+|[^\\W{CJK_CHARS}]+')
+
+# name / description / tags 三列的 bm25 权重
+BM25_WEIGHTS = (10.0, 2.0, 5.0)
+
+def ngram_tokens(content, for_query=False):
+    """
+    切分文本为检索词
+
+    中文连续字符串切为二元组（建索引时额外保留单字，以支持单字查询），
+    其余单词整体保留并转为小写。
+    """
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(content or ''):
+        word = match.group()
+        if not CJK_PATTERN.match(word):
+            tokens.append(word.lower())
+            continue
+
+        bigrams = [word[i:i + 2] for i in range(len(word) - 1)]
+        if for_query:
+            tokens.extend(bigrams or [word])
+        else:
+            tokens.extend(word)
+            tokens.extend(bigrams)
+    return tokens
+
+def fts_query(tokens):
+    """
+    检索词 -> FTS5 查询串
+
+    每个词加引号按短语匹配；最后一个非中文词按前缀匹配（"work"* 匹配
+    workflow），边输入边检索时不必输完整个单词。中文已切成单字和二元组，
+    不需要前缀匹配。
+    """
+    terms = [f'"{token}"' for token in tokens]
+    if not CJK_PATTERN.match(tokens[-1]):
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+def _document_fields(workflow):
+    """工作流参与检索的字段"""
+    return {
+        'name': workflow.name or '',
+        'description': workflow.description or '',
+        'tags': (workflow.tags or '').replace(',', ' ')
+    }
+
+class LikeSearchBackend:
+    """LIKE 查询后端（无全文索引时使用）"""
+
+    name = 'like'
+
+    def is_empty(self, session):
+        return False
+
+    def index_workflow(self, session, workflow):
+        pass
+
+    def remove_workflow(self, session, workflow_id):
+        pass
+
+    def apply(self, query, search_text):
+        """给工作流查询加上检索条件，返回 (查询, 相关度排序表达式)"""
+        pattern = f'%{search_text}%'
+        query = query.filter(
+            Workflow.name.like(pattern)
+            | Workflow.description.like(pattern)
+            | Workflow.tags.like(pattern)
+        )
+        return query, None
+
+class SqliteFtsBackend(LikeSearchBackend):
+    """SQLite FTS5 后端"""
+
+    name = 'sqlite_fts5'
+    TABLE = 'workflow_search_fts'
+
+    def is_empty(self, session):
+        return session.execute(text(f"SELECT rowid FROM {self.TABLE} LIMIT 1")).first() is None
+
+    def index_workflow(self, session, workflow):
+        fields = {key: ' '.join(ngram_tokens(value)) for key, value in _document_fields(workflow).items()}
+        session.execute(text(f"DELETE FROM {self.TABLE} WHERE rowid = :id"), {'id': workflow.id})
+        session.execute(text(
+            f"INSERT INTO {self.TABLE} (rowid, name, description, tags) "
+            f"VALUES (:id, :name, :description, :tags)"
+        ), {'id': workflow.id, **fields})
+
+    def remove_workflow(self, session, workflow_id):
+        session.execute(text(f"DELETE FROM {self.TABLE} WHERE rowid = :id"), {'id': workflow_id})
+
+    def apply(self, query, search_text):
+        tokens = ngram_tokens(search_text, for_query=True)
+        if not tokens:
+            # 只有标点等无法检索的字符，不匹配任何工作流
+            return query.filter(false()), None
+
+        fts = table(self.TABLE, column('rowid'))
+        query = query.join(fts, fts.c.rowid == Workflow.id) \
+            .filter(text(f"{self.TABLE} MATCH :search_query")) \
+            .params(search_query=fts_query(tokens))
+
+        weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+        # bm25() 越小越相关
+        return query, text(f"bm25({self.TABLE}, {weights}) ASC")
+
+class MysqlFulltextBackend(LikeSearchBackend):
+    """MySQL FULLTEXT + ngram 解析器后端"""
+
+    name = 'mysql_fulltext'
+    TABLE = 'workflow_search_documents'
+    MATCH = f"MATCH ({TABLE}.name, {TABLE}.description, {TABLE}.tags) AGAINST (:search_query IN NATURAL LANGUAGE MODE)"
+
+    def is_empty(self, session):
+        return session.execute(text(f"SELECT workflow_id FROM {self.TABLE} LIMIT 1")).first() is None
+
+    def index_workflow(self, session, workflow):
+        session.execute(text(
+            f"REPLACE INTO {self.TABLE} (workflow_id, name, description, tags) "
+            f"VALUES (:id, :name, :description, :tags)"
+        ), {'id': workflow.id, **_document_fields(workflow)})
+
+    def remove_workflow(self, session, workflow_id):
+        session.execute(text(f"DELETE FROM {self.TABLE} WHERE workflow_id = :id"), {'id': workflow_id})
+
+    def apply(self, query, search_text):
+        documents = table(self.TABLE, column('workflow_id'))
+        query = query.join(documents, documents.c.workflow_id == Workflow.id) \
+            .filter(text(f"{self.MATCH} > 0")) \
+            .params(search_query=search_text)
+        return query, text(f"{self.MATCH} DESC")
+
+FULLTEXT_BACKENDS = {
+    'sqlite': SqliteFtsBackend,
+    'mysql': MysqlFulltextBackend
+}
+
+_backends = weakref.WeakKeyDictionary()
+
+def _create_backend(session, dialect):
+    """按方言选择全文检索后端，迁移尚未创建索引表时退化为 LIKE 查询"""
+    backend_class = FULLTEXT_BACKENDS.get(dialect)
+    if backend_class is None:
+        return LikeSearchBackend()
+
+    # 在会话自己的连接上检查，不另取连接，也不打断会话中的事务
+    if not inspect(session.connection()).has_table(backend_class.TABLE):
+        logger.warning(f"Search table {backend_class.TABLE} not found (migration 012 not applied), falling back to LIKE")
+        return LikeSearchBackend()
+    return backend_class()
+
+def get_search_backend(session):
+    """获取当前数据库的检索后端（每个数据库引擎一个实例，首次使用时检查索引表）"""
+    engine = session.get_bind()
+    backend = _backends.get(engine)
+    if backend is None:
+        backend = _backends[engine] = _create_backend(session, engine.dialect.name)
+    return backend
+
+def rebuild_search_index(session, batch_size=500):
+    """为全部未删除的工作流重建检索索引"""
+    backend = get_search_backend(session)
+    workflows = session.query(Workflow).filter(Workflow.status != WorkflowStatus.DELETED).yield_per(batch_size)
+
+    count = 0
+    for workflow in workflows:
+        backend.index_workflow(session, workflow)
+        count += 1
+    session.commit()
+
+    logger.info(f"Rebuilt {backend.name} search index for {count} workflows")
+    return count
+
+def init_search_index(app, session):
+    """启动时检查全文索引表，索引为空时回填（SQLite 的中文切词在应用内完成，无法在迁移中回填）"""
+    try:
+        with app.app_context():
+            backend = get_search_backend(session)
+            if backend.is_empty(session):
+                rebuild_search_index(session)
+    except Exception as e:
+        session.rollback()
+        logger.warning(f"Full-text search unavailable, falling back to LIKE: {str(e)}")
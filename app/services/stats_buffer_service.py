@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流行为计数缓冲
+
+浏览、点赞、分享事件先在进程内按工作流聚合，由后台线程每隔几秒用一条
+批量执行的 UPDATE workflow_stats SET x = x + n 语句写回，读接口本身不写库，
+热门工作流的统计行也不会因为每次浏览被加锁。各进程的增量互相独立，
+多进程部署下同样可以直接相加。模板使用次数用同样的方式缓冲。
+
+整批写回失败时逐行重试，只把失败的行放回缓冲；同一行连续失败
+MAX_FLUSH_ATTEMPTS 次后丢弃并记录日志，不会拖住其他行的写回。
+数据库连接断开时不计失败次数，剩余的行原样等待下次写回。
+"""
+
+from collections import Counter
+from datetime import datetime
+import atexit
+import logging
+import threading
+import time
+
+from sqlalchemy import bindparam, func
+
+from app.models.workflow import WorkflowStats, ActionType
+from app.models.template import WorkflowTemplate
+from app.services.workflow_stats_service import WorkflowStatsService
+from app.services.execution_stats_service import purge_stats_buckets
+from app.utils.bloom_filter import RotatingBloomFilter
+
+logger = logging.getLogger(__name__)
+
+# 可缓冲的行为类型及其对应的统计列
+BUFFERED_COLUMNS = {
+    ActionType.VIEW.value: 'view_count',
+    ActionType.LIKE.value: 'like_count',
+    ActionType.SHARE.value: 'share_count'
+}
+
+# 同一行连续写回失败的次数上限，超过后丢弃该行的增量
+MAX_FLUSH_ATTEMPTS = 5
+
+def _execute_isolated(session, statement, params, prepare=None):
+    """
+    批量执行语句；整批失败时逐行重试，把写不进去的行隔离出来
+
+    Args:
+        session: 数据库会话
+        statement: 按行参数批量执行的语句
+        params: {键: 该行的语句参数}
+        prepare: 执行前调用的 prepare(session, 键列表)，可选
+
+    Returns:
+        (写回的键列表, {键: 异常}, 因连接断开未写回的键列表)
+    """
+    def execute(keys):
+        if prepare is not None:
+            prepare(session, keys)
+        session.execute(statement, [params[key] for key in keys])
+        session.commit()
+
+    keys = list(params)
+    try:
+        execute(keys)
+        return keys, {}, []
+    except Exception as e:
+        session.rollback()
+        if getattr(e, 'connection_invalidated', False):
+            raise
+        logger.warning(f"Batched flush failed, retrying row by row: {str(e)}")
+
+    flushed, failed = [], {}
+    for index, key in enumerate(keys):
+        try:
+            execute([key])
+        except Exception as e:
+            session.rollback()
+            if getattr(e, 'connection_invalidated', False):
+                return flushed, failed, keys[index:]
+            failed[key] = e
+        else:
+            flushed.append(key)
+    return flushed, failed, []
+
+class _FailureTracker:
+    """按键记录连续写回失败的次数"""
+
+    def __init__(self):
+        self._attempts = Counter()
+
+    def succeeded(self, keys):
+        for key in keys:
+            self._attempts.pop(key, None)
+
+    def should_retry(self, key, error, label):
+        """记一次失败；未达到上限时返回 True，否则丢弃并记录日志"""
+        self._attempts[key] += 1
+        if self._attempts[key] < MAX_FLUSH_ATTEMPTS:
+            return True
+        del self._attempts[key]
+        logger.error(f"Dropping buffered counts for {label} {key} after {MAX_FLUSH_ATTEMPTS} failed flushes: {str(error)}")
+        return False
+
+class StatsCounterBuffer:
+    """进程内的行为计数缓冲"""
+
+    def __init__(self, dedup_window=1800):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._failures = _FailureTracker()
+        self.configure(dedup_window)
+
+    def configure(self, dedup_window):
+        """设置去重窗口(秒)，0表示不去重"""
+        self._dedup = RotatingBloomFilter(dedup_window) if dedup_window else None
+
+    def record(self, workflow_id, action, viewer_key=None):
+        """
+        记录一次行为事件
+
+        Args:
+            workflow_id: 工作流ID
+            action: 行为类型（浏览、点赞或分享）
+            viewer_key: 用户ID或会话标识，提供时同一用户在去重窗口内的重复事件被忽略
+
+        Returns:
+            事件是否被计入
+        """
+        action = action.value if isinstance(action, ActionType) else action
+        column = BUFFERED_COLUMNS.get(action)
+        if column is None:
+            raise ValueError(f'不支持的行为类型: {action}')
+
+        if viewer_key is not None and self._dedup is not None \
+                and self._dedup.seen(f'{workflow_id}:{action}:{viewer_key}'):
+            return False
+
+        with self._lock:
+            self._pending.setdefault(workflow_id, Counter())[column] += 1
+        return True
+
+    def pending_count(self):
+        """待写回的工作流数"""
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self, session):
+        """把缓冲的增量批量写回 workflow_stats，返回写回的工作流数"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        table = WorkflowStats.__table__
+        values = {
+            column: func.coalesce(table.c[column], 0) + bindparam(f'delta_{column}')
+            for column in BUFFERED_COLUMNS.values()
+        }
+        values['updated_at'] = bindparam('flushed_at')
+        statement = table.update().where(table.c.workflow_id == bindparam('target_workflow_id')).values(**values)
+
+        flushed_at = datetime.utcnow()
+        params = {}
+        for workflow_id, deltas in pending.items():
+            row = {f'delta_{column}': deltas[column] for column in BUFFERED_COLUMNS.values()}
+            row['target_workflow_id'] = workflow_id
+            row['flushed_at'] = flushed_at
+            params[workflow_id] = row
+
+        try:
+            flushed, failed, deferred = _execute_isolated(session, statement, params, self._ensure_rows)
+        except Exception:
+            self._requeue(pending)
+            raise
+
+        with self._lock:
+            self._failures.succeeded(flushed)
+            retry = {
+                workflow_id: pending[workflow_id] for workflow_id, error in failed.items()
+                if self._failures.should_retry(workflow_id, error, 'workflow')
+            }
+        retry.update((workflow_id, pending[workflow_id]) for workflow_id in deferred)
+        self._requeue(retry)
+
+        logger.debug(f"Flushed buffered stats for {len(flushed)} workflows")
+        return len(flushed)
+
+    def _ensure_rows(self, session, workflow_ids):
+        """为还没有统计行的工作流补建统计行"""
+        existing = {
+            workflow_id for (workflow_id,) in session.query(WorkflowStats.workflow_id).filter(
+                WorkflowStats.workflow_id.in_(list(workflow_ids))
+            )
+        }
+        missing = [workflow_id for workflow_id in workflow_ids if workflow_id not in existing]
+        if missing:
+            stats_service = WorkflowStatsService(session)
+            for workflow_id in missing:
+                stats_service.get_or_create(workflow_id)
+            session.flush()
+
+    def _requeue(self, pending):
+        """把没有写回的增量放回缓冲，等待下次重试"""
+        with self._lock:
+            for workflow_id, deltas in pending.items():
+                self._pending.setdefault(workflow_id, Counter()).update(deltas)
+
+class TemplateUsageBuffer:
+    """进程内的模板使用次数缓冲"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._failures = _FailureTracker()
+
+    def record(self, template_id, count=1):
+        """记录模板被使用 count 次"""
+        with self._lock:
+            self._pending[template_id] += count
+
+    def pending_count(self):
+        """待写回的模板数"""
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self, session):
+        """把缓冲的增量批量写回 workflow_templates.usage_count，返回写回的模板数"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return 0
+
+        # 使用次数不是对模板内容的修改，不改变 updated_at
+        table = WorkflowTemplate.__table__
+        statement = table.update().where(table.c.id == bindparam('target_template_id')).values(
+            usage_count=func.coalesce(table.c.usage_count, 0) + bindparam('delta'),
+            updated_at=table.c.updated_at
+        )
+        params = {
+            template_id: {'target_template_id': template_id, 'delta': delta}
+            for template_id, delta in pending.items()
+        }
+
+        try:
+            flushed, failed, deferred = _execute_isolated(session, statement, params)
+        except Exception:
+            with self._lock:
+                self._pending.update(pending)
+            raise
+
+        with self._lock:
+            self._failures.succeeded(flushed)
+            for template_id, error in failed.items():
+                if self._failures.should_retry(template_id, error, 'template'):
+                    self._pending[template_id] += pending[template_id]
+            for template_id in deferred:
+                self._pending[template_id] += pending[template_id]
+
+        logger.debug(f"Flushed buffered usage for {len(flushed)} templates")
+        return len(flushed)
+
+# 全局计数缓冲（每个进程一份）
+stats_buffer = StatsCounterBuffer()
+template_usage_buffer = TemplateUsageBuffer()
+
+def init_stats_buffer(app, session):
+    """按配置启动计数缓冲的定期写回线程，该线程同时定期清理过期的执行统计时间桶"""
+    stats_buffer.configure(app.config.get('STATS_DEDUP_WINDOW', 1800))
+
+    interval = app.config.get('STATS_FLUSH_INTERVAL', 5)
+    if not interval:
+        return
+
+    def flush():
+        try:
+            with app.app_context():
+                stats_buffer.flush(session)
+                template_usage_buffer.flush(session)
+        except Exception as e:
+            logger.error(f"Error flushing buffered stats: {str(e)}")
+
+    purge_interval = app.config.get('STATS_BUCKET_PURGE_INTERVAL', 3600)
+
+    def flush_loop():
+        last_purge = time.monotonic()
+        while True:
+            time.sleep(interval)
+            flush()
+            if purge_interval and time.monotonic() - last_purge >= purge_interval:
+                purge_stats_buckets(app, session)
+                last_purge = time.monotonic()
+
+    thread = threading.Thread(target=flush_loop, name='stats-buffer-flush', daemon=True)
+    thread.start()
+
+    # 进程退出前写回剩余的增量
+    atexit.register(flush)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流标签服务
+
+标签规范化存储在 workflow_tags + workflow_tag_links 中，Workflow.tags 只保留
+逗号分隔的展示副本。关联行和 WorkflowTag.usage_count 在调用方的同一事务中
+维护，使用次数用 UPDATE ... SET usage_count = usage_count ± 1 原子增减。
+按标签筛选走 (tag_id, workflow_id) 复合索引：每个标签是一段有序的
+workflow_id 区间，多标签"全部包含"按 workflow_id 分组计数求交集。
+"""
+
+import logging
+from collections import Counter
+
+from sqlalchemy import func, select, false
+from sqlalchemy.exc import IntegrityError
+
+from app.models.workflow import Workflow, WorkflowTag, WorkflowTagLink
+
+logger = logging.getLogger(__name__)
+
+# 与 WorkflowTag.name 列长度一致
+TAG_NAME_MAX_LENGTH = 50
+
+# 多标签筛选方式：all 为同时包含全部标签，any 为包含任一标签
+TAG_MATCH_MODES = ('all', 'any')
+
+def normalize_tags(tags):
+    """把标签参数（列表或逗号分隔字符串）解析为去重后的标签名列表，保持原有顺序"""
+    if not tags:
+        return []
+    if isinstance(tags, str):
+        tags = tags.split(',')
+
+    names = []
+    for tag in tags:
+        name = (tag or '').strip()
+        if not name or name in names:
+            continue
+        if len(name) > TAG_NAME_MAX_LENGTH:
+            raise ValueError(f'标签长度不能超过{TAG_NAME_MAX_LENGTH}个字符: {name}')
+        names.append(name)
+    return names
+
+class TagService:
+    """工作流标签服务"""
+
+    def __init__(self, session):
+        self.session = session
+
+    def set_workflow_tags(self, workflow_id, names):
+        """
+        把工作流的标签替换为 names（不提交事务）
+
+        只增删有变化的关联行，并同步调整对应标签的使用次数。
+        """
+        current = dict(
+            self.session.query(WorkflowTag.name, WorkflowTagLink.tag_id)
+            .join(WorkflowTagLink, WorkflowTagLink.tag_id == WorkflowTag.id)
+            .filter(WorkflowTagLink.workflow_id == workflow_id)
+            .all()
+        )
+
+        removed_ids = [tag_id for name, tag_id in current.items() if name not in names]
+        if removed_ids:
+            self.session.query(WorkflowTagLink).filter(
+                WorkflowTagLink.workflow_id == workflow_id,
+                WorkflowTagLink.tag_id.in_(removed_ids)
+            ).delete(synchronize_session=False)
+            self._adjust_usage(removed_ids, -1)
+
+        added_ids = [self.get_or_create(name).id for name in names if name not in current]
+        if added_ids:
+            self.session.execute(
+                WorkflowTagLink.__table__.insert(),
+                [{'workflow_id': workflow_id, 'tag_id': tag_id} for tag_id in added_ids]
+            )
+            self._adjust_usage(added_ids, 1)
+
+        return names
+
+    def add_tags_bulk(self, names_by_workflow):
+        """
+        为一批新建的工作流添加标签（不提交事务）
+
+        每个标签只查找或创建一次，关联行一次批量插入，使用次数按标签合并增减。
+
+        Args:
+            names_by_workflow: {workflow_id: 标签名列表}
+        """
+        tag_ids = {}
+        links = []
+        for workflow_id, names in names_by_workflow.items():
+            for name in names:
+                if name not in tag_ids:
+                    tag_ids[name] = self.get_or_create(name).id
+                links.append({'workflow_id': workflow_id, 'tag_id': tag_ids[name]})
+        if not links:
+            return
+
+        self.session.execute(WorkflowTagLink.__table__.insert(), links)
+        usage = Counter(link['tag_id'] for link in links)
+        for delta in set(usage.values()):
+            self._adjust_usage([tag_id for tag_id, count in usage.items() if count == delta], delta)
+
+    def clear_workflow_tags(self, workflow_id):
+        """移除工作流的全部标签关联（不提交事务）"""
+        return self.set_workflow_tags(workflow_id, [])
+
+    def get_or_create(self, name):
+        """获取（必要时创建）标签"""
+        query = self.session.query(WorkflowTag).filter_by(name=name)
+        tag = query.first()
+        if tag:
+            return tag
+
+        tag = WorkflowTag(name=name, usage_count=0)
+        try:
+            with self.session.begin_nested():
+                self.session.add(tag)
+        except IntegrityError:
+            # 并发创建时以已存在的标签为准
+            tag = query.one()
+        return tag
+
+    def filter_workflows(self, query, tags, match='all'):
+        """
+        按标签筛选工作流查询
+
+        Args:
+            query: Workflow 查询
+            tags: 标签列表或逗号分隔字符串
+            match: all 为同时包含全部标签，any 为包含任一标签
+
+        Returns:
+            加上筛选条件的查询
+        """
+        if match not in TAG_MATCH_MODES:
+            raise ValueError(f'无效的标签匹配方式: {match}')
+
+        names = normalize_tags(tags)
+        if not names:
+            return query
+
+        tag_ids = [tag_id for (tag_id,) in self.session.query(WorkflowTag.id).filter(WorkflowTag.name.in_(names))]
+        if not tag_ids or (match == 'all' and len(tag_ids) < len(names)):
+            return query.filter(false())
+
+        matched = select(WorkflowTagLink.workflow_id).where(WorkflowTagLink.tag_id.in_(tag_ids))
+        if match == 'all' and len(tag_ids) > 1:
+            matched = matched.group_by(WorkflowTagLink.workflow_id).having(func.count() == len(tag_ids))
+        return query.filter(Workflow.id.in_(matched))
+
+    def _adjust_usage(self, tag_ids, delta):
+        """原子增减标签使用次数"""
+        self.session.query(WorkflowTag).filter(WorkflowTag.id.in_(tag_ids)).update(
+            {WorkflowTag.usage_count: func.coalesce(WorkflowTag.usage_count, 0) + delta},
+            synchronize_session=False
+        )
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流模板服务
+
+模板保存时预编译一次：template_data（前端画布的 nodes / edges 格式）被解析、
+校验并规范化为图快照，模板记录快照ID和结构哈希。由模板创建工作流时不再解析
+和校验 JSON，也不逐行插入节点和连接，新工作流只引用模板的快照（与复制工作流
+相同的写时复制），第一次修改或执行时才物化。模板使用次数经进程内缓冲批量写回。
+"""
+
+from datetime import datetime
+
+from app.models.template import WorkflowTemplate
+from app.models.node import Node, Connection, serialize_node, serialize_connection
+from app.services.graph_loader import WorkflowGraphLoader
+from app.services.graph_plan import structural_hash, validate_graph
+from app.services.graph_snapshot import GraphSnapshotService, snapshot_content
+from app.services.tag_service import normalize_tags
+
+def _edge_data(edge):
+    """画布连线（sourceHandle 等驼峰字段）-> 连接数据"""
+    return {
+        'source_handle': edge.get('source_handle', edge.get('sourceHandle')),
+        'target_handle': edge.get('target_handle', edge.get('targetHandle')),
+        'condition': edge.get('condition', (edge.get('data') or {}).get('condition')),
+        'is_enabled': edge.get('is_enabled', True)
+    }
+
+def compile_template_graph(template_data):
+    """
+    解析并校验模板图
+
+    节点为 {id, type, position, data: {label, config, ...}}，也接受工作流接口的
+    节点格式；连线取 edges（或 connections）。
+
+    Returns:
+        (nodes, connections)，serialize_node / serialize_connection 格式，
+        节点ID为模板中的节点ID
+    """
+    if not isinstance(template_data, dict):
+        raise ValueError('模板数据格式错误')
+    nodes_data = template_data.get('nodes') or []
+    edges_data = template_data.get('edges', template_data.get('connections')) or []
+    if not isinstance(nodes_data, list) or not isinstance(edges_data, list):
+        raise ValueError('模板数据格式错误')
+
+    nodes = []
+    for node_data in nodes_data:
+        node_id = node_data.get('id')
+        if node_id is None:
+            raise ValueError('模板节点缺少ID')
+        data = node_data.get('data') or {}
+        node = serialize_node(Node.from_data(None, {
+            **data,
+            **node_data,
+            'name': node_data.get('name') or data.get('label')
+        }))
+        node['id'] = str(node_id)
+        nodes.append(node)
+    if len({node['id'] for node in nodes}) != len(nodes):
+        raise ValueError('模板节点ID重复')
+
+    connections = []
+    for index, edge in enumerate(edges_data):
+        source = edge.get('source', edge.get('source_node_id'))
+        target = edge.get('target', edge.get('target_node_id'))
+        connection = serialize_connection(Connection.from_data(
+            None, None if source is None else str(source), None if target is None else str(target), _edge_data(edge)
+        ))
+        connection['id'] = edge.get('id', index)
+        connections.append(connection)
+
+    errors = validate_graph(nodes, connections)
+    if errors:
+        raise ValueError(f'模板校验失败: {errors[0]}')
+    return nodes, connections
+
+class TemplateService:
+    """工作流模板服务"""
+
+    def __init__(self, session):
+        self.session = session
+        self.snapshot_service = GraphSnapshotService(session, WorkflowGraphLoader(session))
+
+    def create_template(self, data, author_id=None):
+        """创建模板并预编译（不提交事务）"""
+        name = (data.get('name') or '').strip()
+        if not name:
+            raise ValueError('模板名称不能为空')
+
+        template = WorkflowTemplate(
+            name=name,
+            description=data.get('description'),
+            category=data.get('category'),
+            tags=','.join(normalize_tags(data.get('tags'))) or None,
+            template_data=data.get('template_data'),
+            preview_image=data.get('preview_image'),
+            is_featured=bool(data.get('is_featured', False)),
+            is_public=bool(data.get('is_public', True)),
+            author_id=author_id
+        )
+        self.compile_template(template)
+        self.session.add(template)
+        self.session.flush()
+        return template
+
+    def compile_template(self, template):
+        """校验 template_data，写入（或复用）图快照并记录在模板上（不提交事务）"""
+        nodes, connections = compile_template_graph(template.template_data)
+        template.graph_snapshot_id = self.snapshot_service.get_or_create(snapshot_content(nodes, connections))
+        template.graph_hash = structural_hash(nodes, connections)
+        template.compiled_at = datetime.utcnow()
+        return template
+
+    def get_compiled_template(self, template_id, user_id=None):
+        """获取可用的模板，旧数据尚未编译时编译一次"""
+        try:
+            template_id = int(template_id)
+        except (TypeError, ValueError):
+            raise ValueError('模板不存在')
+
+        template = self.session.get(WorkflowTemplate, template_id)
+        if template is None or not (template.is_public or str(template.author_id) == str(user_id)):
+            raise ValueError('模板不存在')
+
+        if not template.graph_snapshot_id:
+            self.compile_template(template)
+            self.session.flush()
+        return template
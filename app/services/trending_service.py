@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流热度排行索引
+
+查看、点赞、复制、评论、分享和执行事件按权重累加为指数衰减的热度分数，
+按 (时间范围, 分类) 保存在进程内的有序结构中，热门列表直接从内存读取。
+
+衰减采用"前向衰减"：事件在时刻 t 贡献 w * 2^((t - t0) / half_life)，
+所有工作流共享同一个参考时间 t0，因此分数只增不减、排序无需随时间重算；
+指数过大时整体乘以同一个系数并前移 t0（排序不变）。
+
+多进程部署时每个进程各有一份索引，共享的 workflow_trending_scores 表是合并
+后的分数：每个进程定期把自上次检查点以来本进程记录的增量合并进表（已有行
+先衰减到当前时刻再累加），再用表中的分数重建自己的索引。因此排行反映所有
+进程截至各自最近一次检查点的事件，加上本进程此后的新事件，进程间最多相差
+一个检查点间隔。进程重启时从表恢复。
+
+检查点和恢复不读整张表，只读本次合并的行和每个排行榜可能进入前
+TOP_CAPACITY 的行；不在榜上的工作流在两次检查点之间只累计本进程的增量，
+下次检查点读回合并后的分数。只有已发布的公开工作流计入热度（由调用方过滤）。
+"""
+
+from bisect import bisect_left, insort
+from datetime import datetime
+import calendar
+import heapq
+import logging
+import threading
+import time
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import IntegrityError
+
+from app.models.workflow import Workflow, WorkflowStatus, WorkflowStats, ActionType
+from app.models.trending import TrendingScore
+
+logger = logging.getLogger(__name__)
+
+# 各时间范围对应的半衰期(秒)
+TRENDING_HALF_LIVES = {
+    '24h': 6 * 3600,
+    '7d': 2 * 86400,
+    '30d': 7 * 86400
+}
+
+# 各类事件的热度权重
+ACTION_WEIGHTS = {
+    ActionType.VIEW.value: 1.0,
+    ActionType.LIKE.value: 3.0,
+    ActionType.FORK.value: 5.0,
+    ActionType.COMMENT.value: 2.0,
+    ActionType.SHARE.value: 3.0,
+    'execution': 2.0
+}
+
+# 每个排行榜在内存中维护的有序条目数，也是单次可读取的上限
+TOP_CAPACITY = 200
+
+# 指数超过该值时重设参考时间，避免浮点溢出
+REBASE_EXPONENT = 32
+
+# 衰减后低于该分数的条目在重设参考时间时被清理
+MIN_SCORE = 1e-3
+
+# 检查点表清理过期行的最短间隔(秒)
+EXPIRE_INTERVAL = 3600
+
+# 按年龄分档清理：超过 age 个半衰期未更新、分数低于 MIN_SCORE * 2^age 的行已衰减到 MIN_SCORE 以下
+EXPIRY_AGES = (4, 8, 16, 32, 64)
+
+def _to_epoch(moment):
+    """把UTC naive datetime转换为时间戳"""
+    return calendar.timegm(moment.utctimetuple()) + moment.microsecond / 1e6
+
+def _decay(half_life, since, now):
+    """从 since 到 now 的衰减系数"""
+    return 2 ** (-(now - since) / half_life)
+
+class TrendingBoard:
+    """单个排行榜：全部分数 + 按分数降序排列的前 TOP_CAPACITY 条"""
+
+    def __init__(self, capacity=TOP_CAPACITY):
+        self.capacity = capacity
+        self.scores = {}
+        self._top = []
+        self._members = set()
+
+    def add(self, workflow_id, delta):
+        """累加分数；前向衰减下分数只增不减，只需和榜尾比较"""
+        old = self.scores.get(workflow_id, 0.0)
+        new = old + delta
+        self.scores[workflow_id] = new
+
+        if workflow_id in self._members:
+            del self._top[bisect_left(self._top, (-old, workflow_id))]
+            insort(self._top, (-new, workflow_id))
+        elif len(self._top) < self.capacity or new > -self._top[-1][0]:
+            insort(self._top, (-new, workflow_id))
+            self._members.add(workflow_id)
+            if len(self._top) > self.capacity:
+                _, evicted = self._top.pop()
+                self._members.discard(evicted)
+
+    def pop(self, workflow_id):
+        """移除条目并返回其分数"""
+        score = self.scores.pop(workflow_id, None)
+        if workflow_id in self._members:
+            self._rebuild_top()
+        return score
+
+    def top(self, limit):
+        """返回前 limit 条 (workflow_id, 前向分数)"""
+        return [(workflow_id, -negative) for negative, workflow_id in self._top[:limit]]
+
+    def scale(self, factor, min_score):
+        """所有分数乘以同一系数，并清理过小的条目"""
+        self.scores = {
+            workflow_id: score * factor
+            for workflow_id, score in self.scores.items()
+            if score * factor >= min_score
+        }
+        self._rebuild_top()
+
+    def _rebuild_top(self):
+        """从全部分数重建有序榜单"""
+        largest = heapq.nlargest(self.capacity, self.scores.items(), key=lambda item: item[1])
+        self._top = sorted((-score, workflow_id) for workflow_id, score in largest)
+        self._members = {workflow_id for _, workflow_id in self._top}
+
+class TrendingIndex:
+    """进程内的热度排行索引"""
+
+    def __init__(self, half_lives=None):
+        self.half_lives = dict(half_lives or TRENDING_HALF_LIVES)
+        self._lock = threading.Lock()
+        self._categories = {}
+        # 自上次检查点以来本进程的增量 {时间范围: {workflow_id: 前向分数}}，以及下架、改分类的工作流
+        self._pending = {time_range: {} for time_range in self.half_lives}
+        self._removed = set()
+        self._moved = {}
+        self._expired_at = 0.0
+        self._reset(time.time())
+
+    def record_event(self, workflow_id, category, action, weight=1.0, at=None):
+        """记录一次行为事件"""
+        action = action.value if isinstance(action, ActionType) else action
+        delta = ACTION_WEIGHTS.get(action, 0.0) * weight
+        if delta <= 0:
+            return
+
+        now = at or time.time()
+        with self._lock:
+            self._categories[workflow_id] = category
+            self._removed.discard(workflow_id)
+            for time_range in self.half_lives:
+                forward = self._add(time_range, workflow_id, category, delta, now)
+                pending = self._pending[time_range]
+                pending[workflow_id] = pending.get(workflow_id, 0.0) + forward
+
+    def top(self, category=None, time_range='7d', limit=20, now=None):
+        """读取热门工作流，返回 [(workflow_id, 当前衰减分数)]"""
+        if time_range not in self.half_lives:
+            raise ValueError(f'不支持的时间范围: {time_range}')
+
+        now = now or time.time()
+        with self._lock:
+            board = self._boards[time_range].get(category)
+            if board is None:
+                return []
+            ranked = board.top(min(limit, TOP_CAPACITY))
+            decay = _decay(self.half_lives[time_range], self._reference[time_range], now)
+
+        return [(workflow_id, score * decay) for workflow_id, score in ranked]
+
+    def remove(self, workflow_id):
+        """工作流删除或下架时移出所有排行榜，下次检查点时从表中删除"""
+        with self._lock:
+            category = self._categories.pop(workflow_id, None)
+            self._removed.add(workflow_id)
+            self._moved.pop(workflow_id, None)
+            for time_range, boards in self._boards.items():
+                self._pending[time_range].pop(workflow_id, None)
+                boards[None].pop(workflow_id)
+                if category in boards:
+                    boards[category].pop(workflow_id)
+
+    def move_category(self, workflow_id, old_category, new_category):
+        """工作流分类变更时把分数迁移到新分类的排行榜"""
+        with self._lock:
+            # 不在内存中的工作流也可能有检查点行，同样在下次检查点时改写分类
+            self._moved[workflow_id] = new_category
+            if workflow_id not in self._categories:
+                return
+            self._categories[workflow_id] = new_category
+            for boards in self._boards.values():
+                score = boards[old_category].pop(workflow_id) if old_category in boards else None
+                if score:
+                    boards.setdefault(new_category, TrendingBoard()).add(workflow_id, score)
+
+    def checkpoint(self, session):
+        """
+        把本进程的增量合并进检查点表，再按表中合并后的分数重建索引
+
+        同一行由多个进程同时首次插入时违反唯一约束，本次检查点回滚，增量
+        放回，下次检查点再合并。
+
+        Returns:
+            合并的增量条数
+        """
+        now = time.time()
+        checkpoint_at = datetime.utcfromtimestamp(now)
+
+        with self._lock:
+            deltas = {}
+            for time_range, pending in self._pending.items():
+                decay = _decay(self.half_lives[time_range], self._reference[time_range], now)
+                for workflow_id, forward in pending.items():
+                    deltas[(workflow_id, time_range)] = forward * decay
+            categories = {workflow_id: self._categories.get(workflow_id) for workflow_id, _ in deltas}
+            removed, moved = self._removed, self._moved
+            self._pending = {time_range: {} for time_range in self.half_lives}
+            self._removed, self._moved = set(), {}
+
+        try:
+            merged = self._merge(session, deltas, categories, removed, moved, now, checkpoint_at)
+            self._expire(session, now)
+            rows = self._live_rows(session, now, merged)
+            session.commit()
+        except Exception:
+            session.rollback()
+            self._requeue(deltas, removed, moved, now)
+            raise
+
+        with self._lock:
+            self._load(rows, now)
+
+        logger.info(f"Trending index checkpointed: {len(deltas)} merged, {len(rows)} scores")
+        return len(deltas)
+
+    def _merge(self, session, deltas, categories, removed, moved, now, checkpoint_at):
+        """
+        按 (工作流, 时间范围) 合并增量：已有行衰减到当前时刻后累加，没有的行插入
+
+        Returns:
+            本次合并涉及的检查点行
+        """
+        if removed:
+            session.query(TrendingScore).filter(TrendingScore.workflow_id.in_(list(removed))) \
+                .delete(synchronize_session=False)
+
+        workflow_ids = {workflow_id for workflow_id, _ in deltas} | set(moved)
+        existing = {}
+        if workflow_ids:
+            rows = session.query(TrendingScore).filter(
+                TrendingScore.workflow_id.in_(list(workflow_ids))
+            ).with_for_update().all()
+            existing = {(row.workflow_id, row.time_range): row for row in rows}
+
+        for (workflow_id, time_range), row in existing.items():
+            if workflow_id in moved:
+                row.category = moved[workflow_id]
+
+        merged = list(existing.values())
+        for key, delta in deltas.items():
+            workflow_id, time_range = key
+            row = existing.get(key)
+            if row is None:
+                row = TrendingScore(
+                    workflow_id=workflow_id,
+                    category=categories[workflow_id],
+                    time_range=time_range,
+                    score=delta,
+                    checkpoint_at=checkpoint_at
+                )
+                session.add(row)
+                merged.append(row)
+                continue
+            half_life = self.half_lives[time_range]
+            row.score = row.score * _decay(half_life, _to_epoch(row.checkpoint_at), now) + delta
+            row.checkpoint_at = checkpoint_at
+            row.category = categories[workflow_id]
+        session.flush()
+        return merged
+
+    def _expire(self, session, now):
+        """按年龄分档删除已衰减到 MIN_SCORE 以下的行（每 EXPIRE_INTERVAL 秒最多一次）"""
+        if now - self._expired_at < EXPIRE_INTERVAL:
+            return
+        conditions = [TrendingScore.time_range.notin_(list(self.half_lives))]
+        for time_range, half_life in self.half_lives.items():
+            for age in EXPIRY_AGES:
+                conditions.append(and_(
+                    TrendingScore.time_range == time_range,
+                    TrendingScore.checkpoint_at < datetime.utcfromtimestamp(now - age * half_life),
+                    TrendingScore.score < MIN_SCORE * 2 ** age
+                ))
+        session.query(TrendingScore).filter(or_(*conditions)).delete(synchronize_session=False)
+        self._expired_at = now
+
+    def _live_rows(self, session, now, merged=()):
+        """
+        读取重建索引需要的检查点行：本次合并的行，加上每个排行榜可能进入前
+        TOP_CAPACITY 的行
+
+        表中的分数是各行检查点时刻的值，此后只会衰减。先按表中分数取每个
+        (时间范围, 分类) 的前 TOP_CAPACITY 行，算出其中第 TOP_CAPACITY 名的
+        当前分数 T；当前分数不低于 T 的行表中分数也不低于 T，再补读这些行。
+        总榜的前 TOP_CAPACITY 名一定在各分类的前 TOP_CAPACITY 名之中。
+        """
+        rank = func.row_number().over(
+            partition_by=(TrendingScore.time_range, TrendingScore.category),
+            order_by=TrendingScore.score.desc()
+        ).label('rank')
+        ranked = session.query(TrendingScore.id, rank).subquery()
+        candidates = session.query(TrendingScore).join(ranked, ranked.c.id == TrendingScore.id) \
+            .filter(ranked.c.rank <= TOP_CAPACITY).all()
+
+        groups = {}
+        for row in candidates:
+            half_life = self.half_lives.get(row.time_range)
+            if half_life is not None:
+                current = row.score * _decay(half_life, _to_epoch(row.checkpoint_at), now)
+                groups.setdefault((row.time_range, row.category), []).append(current)
+
+        conditions = []
+        for (time_range, category), scores in groups.items():
+            if len(scores) < TOP_CAPACITY:
+                # 该分类的行已经全部读出
+                continue
+            conditions.append(and_(
+                TrendingScore.time_range == time_range,
+                TrendingScore.category == category if category is not None else TrendingScore.category.is_(None),
+                TrendingScore.score >= min(scores)
+            ))
+        if conditions:
+            candidates += session.query(TrendingScore).filter(or_(*conditions)).all()
+
+        rows = {row.id: row for row in candidates}
+        rows.update((row.id, row) for row in merged)
+        return list(rows.values())
+
+    def _requeue(self, deltas, removed, moved, now):
+        """检查点失败时把增量放回，等待下次合并"""
+        with self._lock:
+            for (workflow_id, time_range), delta in deltas.items():
+                if workflow_id in self._removed:
+                    continue
+                forward = delta / _decay(self.half_lives[time_range], self._reference[time_range], now)
+                pending = self._pending[time_range]
+                pending[workflow_id] = pending.get(workflow_id, 0.0) + forward
+            self._removed |= removed
+            self._moved = {**moved, **self._moved}
+
+    def restore(self, session):
+        """从检查点表恢复；表为空时用 WorkflowStats 的累计数据冷启动并写入表"""
+        now = time.time()
+        seeded = session.query(TrendingScore.id).first() is None
+        rows = self._seed_from_stats(session, now) if seeded else self._live_rows(session, now)
+
+        with self._lock:
+            self._load(rows, now)
+
+        if not seeded:
+            logger.info(f"Trending index restored from {len(rows)} checkpoint scores")
+        return len(rows)
+
+    def _seed_from_stats(self, session, now):
+        """
+        按累计统计生成检查点行，以统计的更新时间作为事件时间
+
+        多个进程同时冷启动时只有一个写入成功，其余进程读取它写入的行。
+        """
+        results = session.query(WorkflowStats, Workflow.category).join(
+            Workflow, Workflow.id == WorkflowStats.workflow_id
+        ).filter(
+            Workflow.status == WorkflowStatus.PUBLISHED,
+            Workflow.is_public.is_(True)
+        ).all()
+
+        checkpoint_at = datetime.utcfromtimestamp(now)
+        rows = []
+        for stats, category in results:
+            weight = (
+                (stats.view_count or 0) * ACTION_WEIGHTS[ActionType.VIEW.value]
+                + (stats.like_count or 0) * ACTION_WEIGHTS[ActionType.LIKE.value]
+                + (stats.fork_count or 0) * ACTION_WEIGHTS[ActionType.FORK.value]
+                + (stats.share_count or 0) * ACTION_WEIGHTS[ActionType.SHARE.value]
+                + (stats.execution_count or 0) * ACTION_WEIGHTS['execution']
+            )
+            if weight <= 0:
+                continue
+            at = min(_to_epoch(stats.updated_at), now) if stats.updated_at else now
+            for time_range, half_life in self.half_lives.items():
+                score = weight * _decay(half_life, at, now)
+                if score >= MIN_SCORE:
+                    rows.append(TrendingScore(
+                        workflow_id=stats.workflow_id,
+                        category=category,
+                        time_range=time_range,
+                        score=score,
+                        checkpoint_at=checkpoint_at
+                    ))
+
+        try:
+            session.add_all(rows)
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            return self._live_rows(session, now)
+
+        logger.info(f"Trending index seeded from {len(results)} workflow stats")
+        return rows
+
+    def _load(self, rows, now):
+        """在持有锁的情况下按检查点行重建索引，再叠加尚未合并的本进程增量"""
+        references, categories = self._reference, self._categories
+        self._reset(now)
+        for row in rows:
+            if row.time_range not in self.half_lives or row.workflow_id in self._removed:
+                continue
+            score = row.score * _decay(self.half_lives[row.time_range], _to_epoch(row.checkpoint_at), now)
+            if score < MIN_SCORE:
+                continue
+            category = self._moved.get(row.workflow_id, row.category)
+            self._categories[row.workflow_id] = category
+            self._add(row.time_range, row.workflow_id, category, score, now)
+
+        for time_range, pending in self._pending.items():
+            decay = _decay(self.half_lives[time_range], references[time_range], now)
+            for workflow_id, forward in pending.items():
+                category = self._categories.setdefault(workflow_id, categories.get(workflow_id))
+                pending[workflow_id] = self._add(time_range, workflow_id, category, forward * decay, now)
+
+    def _reset(self, now):
+        """清空索引"""
+        self._reference = {time_range: now for time_range in self.half_lives}
+        self._boards = {time_range: {None: TrendingBoard()} for time_range in self.half_lives}
+        self._categories = {}
+
+    def _add(self, time_range, workflow_id, category, delta, now):
+        """在持有锁的情况下累加前向分数，返回累加的前向分数"""
+        half_life = self.half_lives[time_range]
+        exponent = (now - self._reference[time_range]) / half_life
+        if exponent > REBASE_EXPONENT:
+            self._rebase(time_range, now)
+            exponent = 0.0
+
+        forward = delta * 2 ** exponent
+        boards = self._boards[time_range]
+        boards[None].add(workflow_id, forward)
+        if category is not None:
+            boards.setdefault(category, TrendingBoard()).add(workflow_id, forward)
+        return forward
+
+    def _rebase(self, time_range, now):
+        """把参考时间前移到 now，所有分数（包括未合并的增量）同比例缩小"""
+        factor = _decay(self.half_lives[time_range], self._reference[time_range], now)
+        for board in self._boards[time_range].values():
+            board.scale(factor, MIN_SCORE)
+        pending = self._pending[time_range]
+        for workflow_id in pending:
+            pending[workflow_id] *= factor
+        self._reference[time_range] = now
+
+# 全局热度索引（每个进程一份）
+trending_index = TrendingIndex()
+
+def init_trending(app, session):
+    """启动时恢复热度索引，并按配置启动定期检查点线程"""
+    try:
+        with app.app_context():
+            trending_index.restore(session)
+    except Exception as e:
+        logger.warning(f"Failed to restore trending index: {str(e)}")
+
+    interval = app.config.get('TRENDING_CHECKPOINT_INTERVAL', 60)
+    if not interval:
+        return
+
+    def checkpoint_loop():
+        while True:
+            time.sleep(interval)
+            try:
+                with app.app_context():
+                    trending_index.checkpoint(session)
+            except Exception as e:
+                logger.error(f"Error checkpointing trending index: {str(e)}")
+
+    thread = threading.Thread(target=checkpoint_loop, name='trending-checkpoint', daemon=True)
+    thread.start()
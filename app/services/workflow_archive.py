@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流批量导入导出
+
+归档是 gzip 压缩的 NDJSON，两个方向都流式处理：
+    第一行为头部 {"format": "vwb-archive", "version": 1}
+    之后每行一条记录，kind 为 workflow 或 template
+
+工作流记录中的图与图快照同一格式（见 graph_snapshot）：节点不带ID，连接
+端点为节点在列表中的下标，归档与数据库ID无关。导出按批读取工作流，每批
+节点和连接各一条查询（未物化的复制品读取快照）。导入按批校验记录，
+节点、连接、统计行各一次批量插入，节点ID的映射在内存中完成；整个
+归档在一个事务中导入，任何一条记录无效都不会留下部分数据。
+"""
+
+from collections import defaultdict
+
+from sqlalchemy import select, or_
+from sqlalchemy.orm import Load
+
+from app.models.workflow import Workflow, WorkflowStatus, WorkflowCategory, WorkflowStats
+from app.models.template import WorkflowTemplate
+from app.models.user import User, UserRole
+from app.models.node import Node, Connection, serialize_node, serialize_connection
+from app.services.graph_loader import WorkflowGraphLoader
+from app.services.graph_plan import structural_hash
+from app.services.graph_snapshot import SNAPSHOT_NODE_FIELDS, SNAPSHOT_CONNECTION_FIELDS, snapshot_content
+from app.services.search_service import get_search_backend
+from app.services.tag_service import TagService, normalize_tags
+from app.services.template_service import TemplateService
+from app.utils.json_provider import dumps_bytes
+from app.utils.streaming import gzip_chunks, iter_ndjson
+
+ARCHIVE_FORMAT = 'vwb-archive'
+ARCHIVE_VERSION = 1
+
+# 每批导出或导入的工作流数
+ARCHIVE_BATCH_SIZE = 200
+
+# 单次导出的ID数上限
+MAX_EXPORT_IDS = 10000
+
+# 归档中保存的工作流和模板字段
+WORKFLOW_ARCHIVE_FIELDS = (
+    'name', 'description', 'category', 'tags', 'canvas_config', 'global_variables',
+    'execution_timeout', 'max_concurrent_executions', 'is_public'
+)
+TEMPLATE_ARCHIVE_FIELDS = (
+    'name', 'description', 'category', 'tags', 'template_data', 'preview_image', 'is_featured', 'is_public'
+)
+
+def parse_id_list(value, label='ID'):
+    """解析逗号分隔的ID列表（去重，保持顺序）"""
+    if not value:
+        return []
+    ids = []
+    for item in str(value).split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            item = int(item)
+        except ValueError:
+            raise ValueError(f'无效的{label}: {item}')
+        if item not in ids:
+            ids.append(item)
+    if len(ids) > MAX_EXPORT_IDS:
+        raise ValueError(f'单次最多导出 {MAX_EXPORT_IDS} 个{label}')
+    return ids
+
+def _batches(items, size=ARCHIVE_BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _workflow_record(workflow, graph):
+    record = {'kind': 'workflow', 'ref': workflow.id}
+    for field in WORKFLOW_ARCHIVE_FIELDS:
+        value = getattr(workflow, field)
+        record[field] = value.value if isinstance(value, WorkflowCategory) else value
+    record['graph'] = graph
+    return record
+
+def _template_record(template):
+    record = {'kind': 'template', 'ref': template.id}
+    record.update((field, getattr(template, field)) for field in TEMPLATE_ARCHIVE_FIELDS)
+    return record
+
+class WorkflowArchiveService:
+    """工作流批量导入导出服务"""
+
+    def __init__(self, session):
+        self.session = session
+        self.graph_loader = WorkflowGraphLoader(session)
+        self.tag_service = TagService(session)
+        self.template_service = TemplateService(session)
+
+    # ---------- 导出 ----------
+
+    def export_archive(self, workflow_ids, template_ids, user_id):
+        """
+        校验要导出的工作流和模板（当前用户可见），返回 gzip 归档的字节块生成器
+
+        校验在开始输出前完成，生成器本身只读取数据。
+        """
+        if not workflow_ids and not template_ids:
+            raise ValueError('请指定要导出的工作流或模板')
+
+        visible = set(self.session.scalars(
+            select(Workflow.id).where(
+                Workflow.id.in_(workflow_ids),
+                Workflow.status != WorkflowStatus.DELETED,
+                or_(Workflow.is_public.is_(True), Workflow.user_id == user_id)
+            )
+        )) if workflow_ids else set()
+        missing = [workflow_id for workflow_id in workflow_ids if workflow_id not in visible]
+        if missing:
+            raise ValueError(f"工作流不存在: {', '.join(map(str, missing[:10]))}")
+
+        visible = set(self.session.scalars(
+            select(WorkflowTemplate.id).where(
+                WorkflowTemplate.id.in_(template_ids),
+                or_(WorkflowTemplate.is_public.is_(True), WorkflowTemplate.author_id == user_id)
+            )
+        )) if template_ids else set()
+        missing = [template_id for template_id in template_ids if template_id not in visible]
+        if missing:
+            raise ValueError(f"模板不存在: {', '.join(map(str, missing[:10]))}")
+
+        return gzip_chunks(dumps_bytes(record) + b'\n' for record in self.iter_records(workflow_ids, template_ids))
+
+    def iter_records(self, workflow_ids, template_ids):
+        """按批生成归档记录（头部、工作流、模板）"""
+        yield {'format': ARCHIVE_FORMAT, 'version': ARCHIVE_VERSION}
+
+        for batch in _batches(workflow_ids):
+            workflows = {
+                workflow.id: workflow for workflow in self.session.query(Workflow)
+                .options(Load(Workflow).undefer_group('content'))
+                .filter(Workflow.id.in_(batch))
+            }
+            graphs = {
+                workflow_id: snapshot_content(nodes, connections)
+                for workflow_id, (nodes, connections) in self.graph_loader.load_graphs(list(workflows.values())).items()
+            }
+            for workflow_id in batch:
+                # 校验后才被删除的工作流不再输出
+                if workflow_id in workflows:
+                    yield _workflow_record(workflows[workflow_id], graphs[workflow_id])
+
+        for batch in _batches(template_ids):
+            templates = {
+                template.id: template
+                for template in self.session.query(WorkflowTemplate).filter(WorkflowTemplate.id.in_(batch))
+            }
+            for template_id in batch:
+                if template_id in templates:
+                    yield _template_record(templates[template_id])
+
+    # ---------- 导入 ----------
+
+    def import_archive(self, stream, user_id):
+        """
+        从字节流导入归档，工作流归当前用户所有、状态为草稿
+
+        Returns:
+            {'workflows': 数量, 'templates': 数量,
+             'workflow_ids': {归档ID: 新ID}, 'template_ids': {归档ID: 新ID}}
+        """
+        workflow_ids, template_ids = {}, {}
+        batch = []
+        records = iter_ndjson(stream)
+
+        try:
+            line_number, header = next(records, (0, None))
+            if not isinstance(header, dict) or header.get('format') != ARCHIVE_FORMAT:
+                raise ValueError('不是有效的工作流归档')
+            if header.get('version') != ARCHIVE_VERSION:
+                raise ValueError(f"不支持的归档版本: {header.get('version')}")
+
+            for line_number, record in records:
+                kind = record.get('kind') if isinstance(record, dict) else None
+                if kind == 'workflow':
+                    batch.append((line_number, record))
+                    if len(batch) >= ARCHIVE_BATCH_SIZE:
+                        workflow_ids.update(self._import_workflows(batch, user_id))
+                        batch = []
+                elif kind == 'template':
+                    template_ids.update(self._import_template(line_number, record, user_id))
+                else:
+                    raise ValueError(f'第 {line_number} 行: 未知的记录类型')
+            if batch:
+                workflow_ids.update(self._import_workflows(batch, user_id))
+
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        return {
+            'workflows': len(workflow_ids),
+            'templates': len(template_ids),
+            'workflow_ids': workflow_ids,
+            'template_ids': template_ids
+        }
+
+    def _import_workflows(self, batch, user_id):
+        """导入一批工作流记录，返回 {归档ID: 新ID}"""
+        prepared = [self._prepare_workflow(line_number, record, user_id) for line_number, record in batch]
+
+        workflows = [workflow for workflow, _, _ in prepared]
+        self.session.add_all(workflows)
+        self.session.flush()
+
+        # 节点和连接用 Core executemany 批量插入，不需要逐行取回自增ID（MySQL
+        # 没有 RETURNING，ORM 会退化为逐行 INSERT）。新工作流此前没有节点，
+        # 按 (workflow_id, id) 读回的节点ID与插入顺序一一对应。
+        node_rows = [
+            {
+                'workflow_id': workflow.id, 'grid_x': node.grid_x, 'grid_y': node.grid_y,
+                **{field: getattr(node, field) for field in SNAPSHOT_NODE_FIELDS}
+            }
+            for workflow, nodes, _ in prepared for node in nodes
+        ]
+        node_ids = defaultdict(list)
+        if node_rows:
+            self.session.execute(Node.__table__.insert(), node_rows)
+            for workflow_id, node_id in self.session.execute(
+                select(Node.workflow_id, Node.id)
+                .where(Node.workflow_id.in_([workflow.id for workflow in workflows]))
+                .order_by(Node.workflow_id, Node.id)
+            ):
+                node_ids[workflow_id].append(node_id)
+
+        # 节点ID映射在内存中完成：连接端点是节点在本工作流列表中的下标
+        connection_rows = [
+            {
+                'workflow_id': workflow.id,
+                'source_node_id': node_ids[workflow.id][source],
+                'target_node_id': node_ids[workflow.id][target],
+                **{field: getattr(connection, field) for field in SNAPSHOT_CONNECTION_FIELDS}
+            }
+            for workflow, _, connections in prepared for connection, source, target in connections
+        ]
+        if connection_rows:
+            self.session.execute(Connection.__table__.insert(), connection_rows)
+
+        self.session.execute(WorkflowStats.__table__.insert(), [
+            {
+                'workflow_id': workflow.id, 'view_count': 0, 'like_count': 0, 'fork_count': 0, 'share_count': 0,
+                'execution_count': 0, 'success_count': 0, 'success_rate': 0.0, 'avg_execution_time': 0.0,
+                'timed_execution_count': 0
+            }
+            for workflow in workflows
+        ])
+
+        self.tag_service.add_tags_bulk({workflow.id: normalize_tags(workflow.tags) for workflow in workflows})
+        search_backend = get_search_backend(self.session)
+        for workflow in workflows:
+            search_backend.index_workflow(self.session, workflow)
+
+        return {record.get('ref', line_number): workflow.id
+                for (line_number, record), workflow in zip(batch, workflows)}
+
+    def _prepare_workflow(self, line_number, record, user_id):
+        """校验工作流记录并构造工作流、节点和连接对象（尚未关联ID）"""
+        try:
+            name = (record.get('name') or '').strip()
+            if not name:
+                raise ValueError('工作流名称不能为空')
+            category = record.get('category') or WorkflowCategory.OTHER.value
+            try:
+                category = WorkflowCategory(category)
+            except ValueError:
+                raise ValueError(f'无效的工作流分类: {category}')
+
+            graph = record.get('graph') or {}
+            nodes_data = graph.get('nodes') or []
+            connections_data = graph.get('connections') or []
+            if not isinstance(nodes_data, list) or not isinstance(connections_data, list):
+                raise ValueError('图格式错误')
+
+            nodes = [Node.from_data(None, node_data) for node_data in nodes_data]
+            connections = []
+            for connection_data in connections_data:
+                source, target = connection_data.get('source'), connection_data.get('target')
+                if not all(isinstance(end, int) and 0 <= end < len(nodes) for end in (source, target)):
+                    raise ValueError('连接引用了不存在的节点')
+                connections.append((Connection.from_data(None, source, target, connection_data), source, target))
+        except (AttributeError, TypeError):
+            raise ValueError(f'第 {line_number} 行: 工作流记录格式错误')
+        except ValueError as e:
+            raise ValueError(f'第 {line_number} 行: {e}')
+
+        # 结构哈希按下标计算，与写入后按节点ID计算的结果一致
+        graph_hash = structural_hash(
+            [{**serialize_node(node), 'id': index} for index, node in enumerate(nodes)],
+            [serialize_connection(connection) for connection, _, _ in connections]
+        )
+        workflow = Workflow(
+            name=name,
+            description=record.get('description'),
+            category=category,
+            tags=','.join(normalize_tags(record.get('tags'))) or None,
+            canvas_config=record.get('canvas_config'),
+            global_variables=record.get('global_variables'),
+            execution_timeout=record.get('execution_timeout', 300),
+            max_concurrent_executions=record.get('max_concurrent_executions', 1),
+            is_public=bool(record.get('is_public', False)),
+            status=WorkflowStatus.DRAFT,
+            user_id=user_id,
+            graph_hash=graph_hash
+        )
+        return workflow, nodes, connections
+
+    def _import_template(self, line_number, record, user_id):
+        """
+        导入一条模板记录（保存时预编译），返回 {归档ID: 新ID}
+
+        模板进入共享的模板广场，只有管理员可以导入；导入的模板与工作流一样
+        默认不公开，也不会被设为推荐。
+        """
+        user = self.session.get(User, user_id)
+        if user is None or user.role != UserRole.ADMIN:
+            raise ValueError(f'第 {line_number} 行: 只有管理员可以导入模板')
+
+        data = {field: record.get(field) for field in TEMPLATE_ARCHIVE_FIELDS if field in record}
+        data['is_public'] = bool(record.get('is_public', False))
+        data['is_featured'] = False
+        try:
+            template = self.template_service.create_template(data, author_id=user_id)
+        except ValueError as e:
+            raise ValueError(f'第 {line_number} 行: {e}')
+        return {record.get('ref', line_number): template.id}
@@ -0,0 +1,929 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流管理服务
+"""
+
+from datetime import datetime
+import logging
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
+
+from app.models.workflow import (
+    Workflow, WorkflowStatus, WorkflowCategory, WorkflowReview, WorkflowStats, WorkflowLike, ActionType
+)
+from app.models.node import Node, Connection, serialize_node, serialize_connection
+from app.models.workflow_execution import WorkflowExecution, ExecutionStatus, TriggerType
+from app.services.workflow_stats_service import WorkflowStatsService
+from app.services.marketplace_stats_service import MarketplaceStatsService, listing_state
+from app.services.trending_service import trending_index
+from app.services.stats_buffer_service import stats_buffer, template_usage_buffer
+from app.services.search_service import get_search_backend
+from app.services.tag_service import TagService, normalize_tags
+from app.services.graph_loader import WorkflowGraphLoader
+from app.services.graph_patch import GraphPatcher, is_layout_only
+from app.services.graph_layout import GraphLayoutService, LAYOUT_MODES
+from app.services.graph_plan import GraphPlanService, structural_hash
+from app.services.graph_snapshot import GraphSnapshotService
+from app.services.graph_viewport import GraphViewportService, parse_bbox
+from app.services.template_service import TemplateService
+from app.utils.pagination import paginate
+from app.utils.response_cache import response_cache, workflow_tag
+from app.utils.http_cache import make_etag
+
+logger = logging.getLogger(__name__)
+
+# 允许通过更新接口修改的字段
+UPDATABLE_FIELDS = (
+    'name', 'description', 'canvas_config', 'global_variables',
+    'execution_timeout', 'max_concurrent_executions', 'is_public'
+)
+
+# 搜索接口支持的排序字段
+SORT_COLUMNS = {
+    'created_at': Workflow.created_at,
+    'updated_at': Workflow.updated_at,
+    'published_at': Workflow.published_at,
+    'name': Workflow.name,
+    'view_count': func.coalesce(WorkflowStats.view_count, 0),
+    'like_count': func.coalesce(WorkflowStats.like_count, 0),
+    'fork_count': func.coalesce(WorkflowStats.fork_count, 0),
+    'execution_count': func.coalesce(WorkflowStats.execution_count, 0)
+}
+
+# 需要关联 workflow_stats 的排序字段
+STATS_SORT_FIELDS = ('view_count', 'like_count', 'fork_count', 'execution_count')
+
+# 列表项中附加统计信息的字段名
+STATS_FIELD = 'stats'
+
+# 批量读取的ID数上限、批量操作数上限及支持的操作
+MAX_BATCH_GET = 100
+MAX_BATCH_OPERATIONS = 50
+BATCH_OPERATIONS = ('publish', 'archive', 'delete')
+
+class WorkflowService:
+    """工作流管理服务"""
+
+    def __init__(self, session):
+        self.session = session
+        self.stats_service = WorkflowStatsService(session)
+        self.marketplace_service = MarketplaceStatsService(session)
+        self.tag_service = TagService(session)
+        self.graph_loader = WorkflowGraphLoader(session)
+        self.snapshot_service = GraphSnapshotService(session, self.graph_loader)
+        self.graph_patcher = GraphPatcher(session, self.snapshot_service)
+        self.plan_service = GraphPlanService(session, self.graph_loader)
+        self.viewport_service = GraphViewportService(session, self.graph_loader)
+        self.layout_service = GraphLayoutService(session)
+        self.template_service = TemplateService(session)
+
+    def get_workflows(self, page=1, size=20, category=None, status=None, cursor=None, fields=None):
+        """获取工作流列表"""
+        query = self.session.query(Workflow).filter(Workflow.status != WorkflowStatus.DELETED)
+
+        if category:
+            query = query.filter(Workflow.category == self._parse_category(category))
+        if status:
+            query = query.filter(Workflow.status == self._parse_status(status))
+
+        return self._paginate(query, [(Workflow.created_at, True), (Workflow.id, True)], page, size, cursor,
+                              fields=fields)
+
+    def search_workflows(self, query='', category=None, tags=None, sort_by='created_at', order='desc', page=1, size=20,
+                         tag_match='all', cursor=None, fields=None):
+        """
+        搜索工作流广场中已发布的公开工作流
+
+        sort_by 为 relevance 时按全文检索相关度排序；tag_match 为 all 时要求包含全部标签，为 any 时包含任一标签即可。
+        """
+        db_query = self.session.query(Workflow).filter(
+            Workflow.status == WorkflowStatus.PUBLISHED,
+            Workflow.is_public.is_(True)
+        )
+
+        relevance = None
+        if query:
+            db_query, relevance = get_search_backend(self.session).apply(db_query, query)
+        if category:
+            db_query = db_query.filter(Workflow.category == self._parse_category(category))
+        db_query = self.tag_service.filter_workflows(db_query, tags, tag_match)
+
+        if sort_by == 'relevance' and relevance is not None:
+            # 相关度不能作为游标键，游标退化为偏移量
+            return self._paginate(db_query, [(relevance, None), (Workflow.id, True)], page, size, cursor,
+                                  sort_key='relevance', keyset=False, fields=fields)
+
+        if sort_by not in SORT_COLUMNS:
+            sort_by = 'created_at'
+        if sort_by in STATS_SORT_FIELDS:
+            db_query = db_query.outerjoin(WorkflowStats, WorkflowStats.workflow_id == Workflow.id)
+
+        descending = order != 'asc'
+        order_by = [(SORT_COLUMNS[sort_by], descending), (Workflow.id, descending)]
+        return self._paginate(db_query, order_by, page, size, cursor, sort_key=f'{sort_by}:{order}', fields=fields)
+
+    def get_user_workflows(self, user_id, page=1, size=20, cursor=None, fields=None):
+        """获取用户自己的工作流"""
+        query = self.session.query(Workflow).filter(
+            Workflow.user_id == user_id,
+            Workflow.status != WorkflowStatus.DELETED
+        )
+
+        return self._paginate(query, [(Workflow.updated_at, True), (Workflow.id, True)], page, size, cursor,
+                              fields=fields)
+
+    def get_workflow_detail(self, workflow_id, user_id=None, viewer_key=None):
+        """
+        获取工作流详情（含节点、连接和统计），浏览计数只写入内存缓冲
+
+        已发布的公开工作流详情（不含统计）读穿响应缓存，更新、发布、删除时按工作流标签失效；
+        统计信息每次单独读取。
+        """
+        workflow_id = self._parse_id(workflow_id)
+        loaded = {}
+
+        def load_detail():
+            # 未命中时统计行随工作流一起读出，总共三条查询
+            workflow, stats = self.graph_loader.load_workflow(workflow_id)
+            self._check_visible(workflow, user_id)
+            loaded['stats'] = stats.to_dict() if stats else None
+            return self.graph_loader.to_detail(workflow, include_stats=False)
+
+        data = response_cache.get_or_load(
+            f'workflow:{workflow_id}:detail',
+            [workflow_tag(workflow_id)],
+            load_detail,
+            cacheable=lambda detail: detail['status'] == WorkflowStatus.PUBLISHED.value and detail['is_public']
+        )
+
+        is_listed = data['status'] == WorkflowStatus.PUBLISHED.value and bool(data['is_public'])
+        self.record_view(workflow_id, data['category'], is_listed, user_id, viewer_key)
+
+        if 'stats' in loaded:
+            data['stats'] = loaded['stats']
+        else:
+            data['stats'] = self.stats_service.get_stats_map([workflow_id]).get(workflow_id)
+        return data
+
+    def record_view(self, workflow_id, category, is_listed, user_id=None, viewer_key=None):
+        """
+        记录一次浏览（同一用户或会话在去重窗口内只计一次）
+
+        详情接口返回304时同样调用，客户端缓存命中的浏览也计入统计和热度；
+        只有已发布的公开工作流计入热度。
+        """
+        workflow_id = self._parse_id(workflow_id)
+        if stats_buffer.record(workflow_id, ActionType.VIEW, user_id or viewer_key) and is_listed:
+            category = WorkflowCategory(category) if category else None
+            trending_index.record_event(workflow_id, category, ActionType.VIEW)
+
+    def get_workflow_viewport(self, workflow_id, bbox, user_id=None):
+        """
+        按视口获取大型工作流的节点和连接，其余部分以网格汇总表示
+
+        Args:
+            bbox: 视口 "x1,y1,x2,y2"（画布坐标）
+        """
+        bbox = parse_bbox(bbox)
+        workflow = self._get_visible_workflow(self._parse_id(workflow_id), user_id)
+
+        data = self.viewport_service.get_viewport(workflow, bbox)
+        data['workflow_id'] = workflow.id
+        data['version'] = workflow.version
+        return data
+
+    def get_workflow_etag(self, workflow_id, user_id=None):
+        """
+        计算工作流详情的 ETag，只读取版本相关的几列，不加载画布配置和节点
+
+        ETag 只由ID、版本号和更新时间决定，不随浏览、点赞等计数的写回变化；
+        详情中附带的统计是加载时的值，最新计数见 get_workflow_stats。
+
+        Returns:
+            (etag, 是否为已发布的公开工作流, 分类)
+        """
+        workflow_id = self._parse_id(workflow_id)
+        row = self.session.query(
+            Workflow.id, Workflow.version, Workflow.updated_at, Workflow.status, Workflow.is_public, Workflow.user_id,
+            Workflow.category
+        ).filter(Workflow.id == workflow_id).first()
+        self._check_visible(row, user_id)
+
+        etag = make_etag('workflow', row.id, row.version, row.updated_at)
+        return etag, row.status == WorkflowStatus.PUBLISHED and bool(row.is_public), row.category
+
+    def get_workflow_stats(self, workflow_id, user_id=None):
+        """
+        工作流的统计计数，一条查询
+
+        Returns:
+            (统计字典，没有统计行时为 None, 是否为已发布的公开工作流)
+        """
+        workflow_id = self._parse_id(workflow_id)
+        row = self.session.query(Workflow.status, Workflow.is_public, Workflow.user_id, WorkflowStats) \
+            .outerjoin(WorkflowStats, WorkflowStats.workflow_id == Workflow.id) \
+            .filter(Workflow.id == workflow_id) \
+            .first()
+        self._check_visible(row, user_id)
+
+        stats = row.WorkflowStats.to_dict() if row.WorkflowStats else None
+        return stats, row.status == WorkflowStatus.PUBLISHED and bool(row.is_public)
+
+    def create_workflow(self, data, user_id):
+        """创建工作流"""
+        name = (data.get('name') or '').strip()
+        if not name:
+            raise ValueError('工作流名称不能为空')
+        tags = normalize_tags(data.get('tags'))
+
+        workflow = Workflow(
+            name=name,
+            description=data.get('description'),
+            category=self._parse_category(data.get('category') or WorkflowCategory.OTHER.value),
+            tags=','.join(tags) or None,
+            canvas_config=data.get('canvas_config'),
+            global_variables=data.get('global_variables'),
+            execution_timeout=data.get('execution_timeout', 300),
+            max_concurrent_executions=data.get('max_concurrent_executions', 1),
+            is_public=bool(data.get('is_public', False)),
+            status=WorkflowStatus.DRAFT,
+            user_id=user_id
+        )
+
+        try:
+            self.session.add(workflow)
+            self.session.flush()
+            self._save_graph(workflow, data.get('nodes') or [], data.get('connections') or [])
+            self.tag_service.set_workflow_tags(workflow.id, tags)
+            self.stats_service.get_or_create(workflow.id)
+            get_search_backend(self.session).index_workflow(self.session, workflow)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        return self.graph_loader.to_detail(workflow, include_stats=False)
+
+    def update_workflow(self, workflow_id, data, user_id):
+        """更新工作流"""
+        workflow = self._get_owned_workflow(workflow_id, user_id)
+        old_category = workflow.category
+        before = listing_state(workflow)
+
+        for field in UPDATABLE_FIELDS:
+            if field in data:
+                setattr(workflow, field, data[field])
+        if 'category' in data:
+            workflow.category = self._parse_category(data['category'])
+        tags = normalize_tags(data['tags']) if 'tags' in data else None
+        if tags is not None:
+            workflow.tags = ','.join(tags) or None
+
+        try:
+            if tags is not None:
+                self.tag_service.set_workflow_tags(workflow.id, tags)
+            if 'nodes' in data or 'connections' in data:
+                self._replace_graph(workflow, data.get('nodes') or [], data.get('connections') or [])
+            workflow.version = self._bump_version(workflow.version)
+            self.marketplace_service.record_listing_change(before, listing_state(workflow))
+            get_search_backend(self.session).index_workflow(self.session, workflow)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        response_cache.invalidate(workflow_tag(workflow.id))
+        if workflow.category != old_category:
+            trending_index.move_category(workflow.id, old_category, workflow.category)
+
+        return self.graph_loader.to_detail(workflow, include_stats=False)
+
+    def patch_workflow_graph(self, workflow_id, data, user_id):
+        """
+        增量修改工作流的节点和连接
+
+        Args:
+            data: {'version': 客户端持有的版本号, 'operations': [...]}，操作格式见 graph_patch
+
+        Returns:
+            新版本号、更新时间及新增对象的临时ID映射
+        """
+        if data.get('version') is None:
+            raise ValueError('缺少工作流版本号')
+        workflow = self._get_owned_workflow(workflow_id, user_id)
+        expected_version = str(data['version'])
+
+        try:
+            ids = self.graph_patcher.apply(
+                workflow, expected_version, data.get('operations'), self._bump_version(expected_version)
+            )
+            # 拖动、改名不影响结构哈希，不必重新读取整张图
+            if not is_layout_only(data['operations']):
+                self.plan_service.refresh_hash(workflow)
+            # 提交后属性会过期，先取出响应需要的值
+            result = {
+                'id': workflow.id,
+                'version': workflow.version,
+                'updated_at': workflow.updated_at.isoformat(),
+                **ids
+            }
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        response_cache.invalidate(workflow_tag(result['id']))
+        return result
+
+    def layout_workflow(self, workflow_id, data, user_id):
+        """
+        在服务端自动布局工作流并批量写回节点坐标
+
+        Args:
+            data: {'version': 客户端持有的版本号, 'mode': incremental | full,
+                   'node_ids': 增量布局时需要放置的节点ID（可选）}
+
+        Returns:
+            新版本号、更新时间、坐标有变化的节点及物化产生的占位ID映射
+        """
+        if data.get('version') is None:
+            raise ValueError('缺少工作流版本号')
+        mode = data.get('mode') or 'incremental'
+        if mode not in LAYOUT_MODES:
+            raise ValueError(f'无效的布局方式: {mode}')
+        node_ids = data.get('node_ids')
+        if node_ids is not None:
+            if not isinstance(node_ids, list):
+                raise ValueError('节点ID列表格式错误')
+            node_ids = [self._parse_node_id(node_id) for node_id in node_ids]
+        workflow = self._get_owned_workflow(workflow_id, user_id)
+        expected_version = str(data['version'])
+
+        try:
+            aliases = self.graph_patcher.claim(workflow, expected_version, self._bump_version(expected_version))
+            if node_ids is not None:
+                node_ids = [aliases['nodes'].get(node_id, node_id) for node_id in node_ids]
+            # 只改变坐标，结构哈希不变
+            placed = self.layout_service.layout(workflow, mode, node_ids)
+            result = {
+                'id': workflow.id,
+                'version': workflow.version,
+                'updated_at': workflow.updated_at.isoformat(),
+                'positions': [{'id': node_id, 'x': x, 'y': y} for node_id, (x, y) in placed.items()],
+                'node_ids': {str(alias): node_id for alias, node_id in aliases['nodes'].items()}
+            }
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        response_cache.invalidate(workflow_tag(result['id']))
+        return result
+
+    def delete_workflow(self, workflow_id, user_id):
+        """删除工作流（软删除）"""
+        workflow = self._get_owned_workflow(workflow_id, user_id)
+
+        try:
+            result = self._delete(workflow)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        self._after_commit('delete', [workflow.id])
+        return result
+
+    def publish_workflow(self, workflow_id, user_id):
+        """发布工作流到工作流广场"""
+        workflow = self._get_owned_workflow(workflow_id, user_id)
+
+        try:
+            self._publish(workflow)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        self._after_commit('publish', [workflow.id])
+        return workflow.to_dict()
+
+    def get_workflows_batch(self, workflow_ids, user_id=None, include_graph=True):
+        """
+        批量获取工作流详情
+
+        请求中的ID去重后合并为一条 IN 查询读取工作流和统计，节点、连接（及快照）
+        再各一条查询，查询数与ID个数无关。批量读取用于列表页等场景，不计入浏览数。
+
+        Returns:
+            与请求顺序一致的逐项结果 [{'id', 'success', 'data' | 'error'}]
+        """
+        self._check_batch(workflow_ids, MAX_BATCH_GET, '工作流ID')
+
+        keys = []
+        for workflow_id in workflow_ids:
+            try:
+                keys.append(self._parse_id(workflow_id))
+            except ValueError:
+                keys.append(None)
+
+        loaded = self.graph_loader.load_workflows({key for key in keys if key is not None})
+        visible = {}
+        for key, (workflow, stats) in loaded.items():
+            try:
+                visible[key] = (self._check_visible(workflow, user_id), stats)
+            except ValueError:
+                continue
+        graphs = self.graph_loader.load_graphs([workflow for workflow, _ in visible.values()]) if include_graph else {}
+
+        results = []
+        for workflow_id, key in zip(workflow_ids, keys):
+            if key not in visible:
+                results.append({'id': workflow_id, 'success': False, 'error': '工作流不存在'})
+                continue
+            workflow, stats = visible[key]
+            data = workflow.to_dict()
+            if include_graph:
+                data['nodes'], data['connections'] = graphs[key]
+            data['stats'] = stats.to_dict() if stats else None
+            results.append({'id': workflow_id, 'success': True, 'data': data})
+        return results
+
+    def batch_update_workflows(self, operations, user_id, atomic=False):
+        """
+        在一个事务中批量发布、归档或删除工作流
+
+        目标工作流用一条 IN 查询预先载入会话；每项操作在各自的保存点中执行，
+        失败只回滚该项并记录错误，其余操作一起提交。atomic 为真时任何一项失败
+        都回滚全部操作。缓存失效等副作用在提交后统一执行。
+
+        Args:
+            operations: [{'op': 'publish' | 'archive' | 'delete', 'id': 工作流ID}, ...]
+
+        Returns:
+            {'results': 逐项结果, 'succeeded': 成功数, 'failed': 失败数}
+        """
+        self._check_batch(operations, MAX_BATCH_OPERATIONS, '操作')
+        if not all(isinstance(operation, dict) for operation in operations):
+            raise ValueError('操作格式错误')
+
+        ids = set()
+        for operation in operations:
+            try:
+                ids.add(self._parse_id(operation.get('id')))
+            except ValueError:
+                continue
+        # 载入身份映射，逐项操作中的 session.get 不再查询
+        self.session.query(Workflow).filter(Workflow.id.in_(ids)).all()
+
+        results, changed = [], []
+        try:
+            for index, operation in enumerate(operations):
+                op = operation.get('op')
+                try:
+                    if op not in BATCH_OPERATIONS:
+                        raise ValueError(f'无效的操作类型: {op}')
+                    with self.session.begin_nested():
+                        workflow = self._get_owned_workflow(self._parse_id(operation.get('id')), user_id)
+                        data = getattr(self, f'_{op}')(workflow)
+                        self.session.flush()
+                        data = data or workflow.to_dict()
+                except ValueError as e:
+                    if atomic:
+                        raise ValueError(f'第 {index + 1} 项操作失败: {e}')
+                    results.append({'id': operation.get('id'), 'op': op, 'success': False, 'error': str(e)})
+                    continue
+                results.append({'id': operation.get('id'), 'op': op, 'success': True, 'data': data})
+                changed.append((op, workflow.id))
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        for op in BATCH_OPERATIONS:
+            self._after_commit(op, [workflow_id for changed_op, workflow_id in changed if changed_op == op])
+
+        succeeded = sum(1 for result in results if result['success'])
+        return {'results': results, 'succeeded': succeeded, 'failed': len(results) - succeeded}
+
+    def fork_workflow(self, workflow_id, user_id):
+        """复制工作流到当前用户名下"""
+        source = self._get_visible_workflow(workflow_id, user_id)
+
+        fork = Workflow(
+            name=f'{source.name} (副本)',
+            description=source.description,
+            category=source.category,
+            tags=source.tags,
+            canvas_config=source.canvas_config,
+            global_variables=source.global_variables,
+            execution_timeout=source.execution_timeout,
+            max_concurrent_executions=source.max_concurrent_executions,
+            is_public=False,
+            status=WorkflowStatus.DRAFT,
+            user_id=user_id,
+            graph_materialized=False
+        )
+
+        try:
+            # 写时复制：复制品只引用源工作流图的快照，不复制节点和连接
+            fork.graph_snapshot_id = self.snapshot_service.snapshot_of(source)
+            fork.graph_hash = self.plan_service.graph_hash_of(source)
+            self.session.add(fork)
+            self.session.flush()
+            self.tag_service.set_workflow_tags(fork.id, normalize_tags(source.tags))
+            self.stats_service.get_or_create(fork.id)
+
+            source_stats = self.stats_service.get_or_create(source.id, lock=True)
+            source_stats.fork_count = (source_stats.fork_count or 0) + 1
+            self.marketplace_service.record_fork()
+            get_search_backend(self.session).index_workflow(self.session, fork)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        self._record_trending(source, ActionType.FORK)
+
+        return self.graph_loader.to_detail(fork, include_stats=False)
+
+    def instantiate_template(self, template_id, user_id, data=None):
+        """由工作流模板创建工作流"""
+        data = data or {}
+        template = self.template_service.get_compiled_template(template_id, user_id)
+        name = (data.get('name') or template.name).strip()
+        if not name:
+            raise ValueError('工作流名称不能为空')
+        tags = normalize_tags(data['tags'] if 'tags' in data else template.tags)
+
+        workflow = Workflow(
+            name=name,
+            description=data.get('description', template.description),
+            category=self._parse_category(data.get('category') or self._template_category(template)),
+            tags=','.join(tags) or None,
+            is_public=bool(data.get('is_public', False)),
+            status=WorkflowStatus.DRAFT,
+            user_id=user_id,
+            # 模板已预编译为快照，不再解析模板数据或逐行插入节点
+            graph_materialized=False,
+            graph_snapshot_id=template.graph_snapshot_id,
+            graph_hash=template.graph_hash
+        )
+
+        try:
+            self.session.add(workflow)
+            self.session.flush()
+            self.tag_service.set_workflow_tags(workflow.id, tags)
+            self.stats_service.get_or_create(workflow.id)
+            get_search_backend(self.session).index_workflow(self.session, workflow)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        template_usage_buffer.record(template.id)
+
+        return self.graph_loader.to_detail(workflow, include_stats=False)
+
+    def rate_workflow(self, workflow_id, user_id, rating, comment=''):
+        """评价工作流"""
+        try:
+            rating = int(rating)
+        except (TypeError, ValueError):
+            raise ValueError('评分必须是1到5之间的整数')
+        if not 1 <= rating <= 5:
+            raise ValueError('评分必须是1到5之间的整数')
+
+        workflow = self._get_visible_workflow(workflow_id, user_id)
+
+        review = WorkflowReview(workflow_id=workflow.id, user_id=user_id, rating=rating, comment=comment)
+        self.session.add(review)
+        self.session.commit()
+
+        self._record_trending(workflow, ActionType.COMMENT)
+
+        return review.to_dict()
+
+    def record_action(self, workflow_id, action, user_id=None, viewer_key=None):
+        """
+        记录点赞、分享等行为，计数经缓冲批量写回
+
+        点赞需要登录，每个用户对每个工作流只计一次（以 workflow_likes 的主键为准）；
+        分享按用户或访问者在去重窗口内只计一次。
+        """
+        try:
+            action = ActionType(action)
+        except ValueError:
+            raise ValueError(f'不支持的行为类型: {action}')
+        if action not in (ActionType.LIKE, ActionType.SHARE):
+            raise ValueError(f'不支持的行为类型: {action.value}')
+        if action == ActionType.LIKE and user_id is None:
+            raise ValueError('点赞需要登录')
+
+        workflow = self._get_visible_workflow(workflow_id, user_id)
+
+        if action == ActionType.LIKE:
+            accepted = self._add_like(workflow.id, user_id)
+            if accepted:
+                stats_buffer.record(workflow.id, action)
+        else:
+            accepted = stats_buffer.record(workflow.id, action, user_id or viewer_key)
+        if accepted:
+            self._record_trending(workflow, action)
+
+        return {
+            'workflow_id': workflow.id,
+            'action': action.value,
+            'accepted': accepted
+        }
+
+    def _record_trending(self, workflow, action):
+        """只有已发布的公开工作流计入热度，草稿和私有工作流不占用排行榜名额"""
+        if listing_state(workflow).listed:
+            trending_index.record_event(workflow.id, workflow.category, action)
+
+    def _add_like(self, workflow_id, user_id):
+        """写入点赞行并提交，已经点过赞时返回 False"""
+        try:
+            with self.session.begin_nested():
+                self.session.add(WorkflowLike(workflow_id=workflow_id, user_id=user_id))
+        except IntegrityError:
+            # 保存点已回滚，外层事务不受影响
+            return False
+        self.session.commit()
+        return True
+
+    def get_trending_workflows(self, category=None, time_range='7d', limit=20, fields=None):
+        """获取热门工作流（由内存中的热度排行索引提供）"""
+        category = self._parse_category(category) if category else None
+        fields = self._parse_fields(fields)
+        ranked = trending_index.top(category, time_range, limit)
+        if not ranked:
+            return []
+
+        workflow_ids = [workflow_id for workflow_id, _ in ranked]
+        query = self.session.query(Workflow).filter(
+            Workflow.id.in_(workflow_ids),
+            Workflow.status == WorkflowStatus.PUBLISHED,
+            Workflow.is_public.is_(True)
+        )
+        workflows = {workflow.id: workflow for workflow in self._project(query, fields)}
+        items = dict(zip(workflows.keys(), self._serialize_list(workflows.values(), fields)))
+
+        result = []
+        for workflow_id, score in ranked:
+            item = items.get(workflow_id)
+            if item is None:
+                continue
+            item['trending_score'] = round(score, 4)
+            result.append(item)
+        return result
+
+    def get_marketplace_stats(self):
+        """获取工作流广场统计信息（读取物化计数器）"""
+        return self.marketplace_service.get_marketplace_stats()
+
+    def test_workflow(self, workflow_id, user_id, data=None):
+        """校验工作流结构"""
+        workflow = self._get_owned_workflow(workflow_id, user_id)
+        plan = self.plan_service.get_plan(workflow)
+
+        return {
+            'workflow_id': workflow.id,
+            'valid': plan['valid'],
+            'errors': plan['errors'],
+            'node_count': plan['node_count'],
+            'connection_count': plan['connection_count']
+        }
+
+    def execute_workflow(self, workflow_id, user_id, data=None):
+        """创建工作流执行记录"""
+        workflow = self._get_visible_workflow(workflow_id, user_id)
+        # 结构相同的工作流共用已缓存的计划，命中时不读取节点和连接
+        plan = self.plan_service.get_plan(workflow)
+        if not plan['valid']:
+            raise ValueError(f'工作流校验失败: {plan["errors"][0]}')
+
+        # 节点执行记录引用节点ID，执行前需要物化；物化改变节点ID，版本号随之递增
+        materialized = self.snapshot_service.materialize(workflow, self._bump_version(workflow.version)) is not None
+
+        data = data or {}
+        input_data = data.get('input_data', {})
+        execution = WorkflowExecution(
+            workflow_id=workflow.id,
+            user_id=user_id,
+            trigger_type=TriggerType(data.get('trigger_type', TriggerType.MANUAL.value)),
+            input_data=input_data,
+            variables=self.plan_service.render_variables(workflow, input_data),
+            status=ExecutionStatus.PENDING,
+            node_count=plan['node_count'],
+            started_at=datetime.utcnow()
+        )
+        self.session.add(execution)
+        self.session.commit()
+
+        if materialized:
+            response_cache.invalidate(workflow_tag(workflow.id))
+        self._record_trending(workflow, 'execution')
+
+        return execution.to_dict()
+
+    def _publish(self, workflow):
+        """发布工作流（不提交事务）"""
+        if not self.plan_service.get_plan(workflow)['node_count']:
+            raise ValueError('工作流没有节点，无法发布')
+
+        before = listing_state(workflow)
+        workflow.status = WorkflowStatus.PUBLISHED
+        workflow.is_public = True
+        workflow.published_at = datetime.utcnow()
+        self.marketplace_service.record_listing_change(before, listing_state(workflow))
+
+    def _archive(self, workflow):
+        """归档工作流，从工作流广场下架（不提交事务）"""
+        before = listing_state(workflow)
+        workflow.status = WorkflowStatus.ARCHIVED
+        self.marketplace_service.record_listing_change(before, listing_state(workflow))
+
+    def _delete(self, workflow):
+        """软删除工作流（不提交事务）"""
+        before = listing_state(workflow)
+        workflow.status = WorkflowStatus.DELETED
+        workflow.is_public = False
+
+        self.marketplace_service.record_listing_change(before, None)
+        self.tag_service.clear_workflow_tags(workflow.id)
+        get_search_backend(self.session).remove_workflow(self.session, workflow.id)
+        return {'id': workflow.id, 'status': workflow.status.value}
+
+    def _after_commit(self, op, workflow_ids):
+        """状态变更提交后使缓存失效，删除的工作流移出热度排行"""
+        if not workflow_ids:
+            return
+        response_cache.invalidate(*(workflow_tag(workflow_id) for workflow_id in workflow_ids))
+        if op == 'delete':
+            for workflow_id in workflow_ids:
+                trending_index.remove(workflow_id)
+
+    def _check_batch(self, items, limit, label):
+        """校验批量请求的列表参数"""
+        if not isinstance(items, list) or not items:
+            raise ValueError(f'{label}列表不能为空')
+        if len(items) > limit:
+            raise ValueError(f'单次最多 {limit} 个{label}')
+
+    def _paginate(self, query, order_by, page, size, cursor=None, sort_key='default', keyset=True, fields=None):
+        """分页（页码或游标）并按 fields 投影、序列化工作流列表"""
+        fields = self._parse_fields(fields)
+        workflows, meta = paginate(self._project(query, fields), order_by, page, size, cursor, sort_key, keyset)
+        return {'items': self._serialize_list(workflows, fields), **meta}
+
+    def _parse_fields(self, fields):
+        """解析 fields 稀疏字段参数，未提供时使用不含大字段的列表字段"""
+        if not fields:
+            return Workflow.LIST_FIELDS + (STATS_FIELD,)
+        if isinstance(fields, str):
+            fields = fields.split(',')
+
+        # id 始终输出
+        parsed = ['id']
+        for field in fields:
+            field = field.strip()
+            if not field or field in parsed:
+                continue
+            if field not in Workflow.FIELDS and field != STATS_FIELD:
+                raise ValueError(f'不支持的字段: {field}')
+            parsed.append(field)
+        return tuple(parsed)
+
+    def _project(self, query, fields):
+        """只从数据库读取 fields 需要的列"""
+        columns = [getattr(Workflow, field) for field in fields if field in Workflow.FIELDS]
+        return query.options(load_only(*columns))
+
+    def _serialize_list(self, workflows, fields):
+        """按 fields 序列化工作流列表，需要时批量附加统计信息"""
+        workflows = list(workflows)
+        workflow_fields = [field for field in fields if field != STATS_FIELD]
+
+        stats_map = None
+        if STATS_FIELD in fields:
+            stats_map = self.stats_service.get_stats_map([workflow.id for workflow in workflows])
+
+        items = []
+        for workflow in workflows:
+            item = workflow.to_dict(fields=workflow_fields)
+            if stats_map is not None:
+                item[STATS_FIELD] = stats_map.get(workflow.id)
+            items.append(item)
+        return items
+
+    def _get_workflow(self, workflow_id):
+        """获取未删除的工作流"""
+        workflow = self.session.get(Workflow, workflow_id)
+        if not workflow or workflow.status == WorkflowStatus.DELETED:
+            raise ValueError('工作流不存在')
+        return workflow
+
+    def _get_visible_workflow(self, workflow_id, user_id):
+        """获取当前用户可见的工作流（公开或本人创建）"""
+        return self._check_visible(self.session.get(Workflow, workflow_id), user_id)
+
+    def _check_visible(self, workflow, user_id):
+        """检查工作流未删除且对当前用户可见"""
+        if not workflow or workflow.status == WorkflowStatus.DELETED:
+            raise ValueError('工作流不存在')
+        if not workflow.is_public and str(workflow.user_id) != str(user_id):
+            raise ValueError('工作流不存在')
+        return workflow
+
+    def _get_owned_workflow(self, workflow_id, user_id):
+        """获取当前用户创建的工作流"""
+        workflow = self._get_workflow(workflow_id)
+        if str(workflow.user_id) != str(user_id):
+            raise ValueError('无权操作该工作流')
+        return workflow
+
+    def _save_graph(self, workflow, nodes_data, connections_data):
+        """根据请求数据创建节点和连接，连接中的节点ID可以是前端的临时ID"""
+        node_map = {}
+        nodes, connections = [], []
+        for node_data in nodes_data:
+            node = Node.from_data(workflow.id, node_data)
+            self.session.add(node)
+            nodes.append(node)
+            if node_data.get('id') is not None:
+                node_map[str(node_data['id'])] = node
+
+        self.session.flush()
+
+        for connection_data in connections_data:
+            source = node_map.get(str(connection_data.get('source_node_id', connection_data.get('source'))))
+            target = node_map.get(str(connection_data.get('target_node_id', connection_data.get('target'))))
+            if source is None or target is None:
+                raise ValueError('连接引用了不存在的节点')
+
+            connection = Connection.from_data(workflow.id, source.id, target.id, connection_data)
+            self.session.add(connection)
+            connections.append(connection)
+
+        workflow.graph_hash = structural_hash(
+            [serialize_node(node) for node in nodes], [serialize_connection(connection) for connection in connections]
+        )
+        self.session.flush()
+
+    def _replace_graph(self, workflow, nodes_data, connections_data):
+        """用请求数据整体替换工作流的节点和连接"""
+        self.session.query(Connection).filter_by(workflow_id=workflow.id).delete(synchronize_session=False)
+        self.session.query(Node).filter_by(workflow_id=workflow.id).delete(synchronize_session=False)
+        self.session.expire(workflow, ['nodes', 'connections'])
+        self._save_graph(workflow, nodes_data, connections_data)
+        # 整体替换后图已写入表中，与原快照不再一致
+        workflow.graph_materialized = True
+        workflow.graph_snapshot_id = None
+
+    def _parse_id(self, workflow_id):
+        """解析工作流ID，保证缓存键和标签使用统一的整数形式"""
+        try:
+            return int(workflow_id)
+        except (TypeError, ValueError):
+            raise ValueError('工作流不存在')
+
+    def _parse_node_id(self, node_id):
+        """解析节点ID（数据库ID，或未物化复制品的占位ID）"""
+        try:
+            return int(node_id)
+        except (TypeError, ValueError):
+            raise ValueError(f'节点不存在: {node_id}')
+
+    def _parse_category(self, category):
+        """解析工作流分类"""
+        try:
+            return WorkflowCategory(category)
+        except ValueError:
+            raise ValueError(f'无效的工作流分类: {category}')
+
+    def _template_category(self, template):
+        """模板分类不是工作流分类时归为其他"""
+        if template.category in {category.value for category in WorkflowCategory}:
+            return template.category
+        return WorkflowCategory.OTHER.value
+
+    def _parse_status(self, status):
+        """解析工作流状态"""
+        try:
+            return WorkflowStatus(status)
+        except ValueError:
+            raise ValueError(f'无效的工作流状态: {status}')
+
+    def _bump_version(self, version):
+        """递增修订版本号，例如 1.0.0 -> 1.0.1"""
+        parts = (version or '1.0.0').split('.')
+        try:
+            parts[-1] = str(int(parts[-1]) + 1)
+        except ValueError:
+            return version
+        return '.'.join(parts)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流统计服务
+
+WorkflowStats 的执行次数、成功率、平均时长和P50/P95/P99在每次执行
+结束时以O(1)代价增量更新，读取时按 workflow_id 唯一索引直接命中。
+"""
+
+import logging
+
+from sqlalchemy.exc import IntegrityError
+
+from app.models.workflow import WorkflowStats
+from app.models.workflow_execution import ExecutionStatus
+
+logger = logging.getLogger(__name__)
+
+class WorkflowStatsService:
+    """工作流统计服务"""
+
+    def __init__(self, session):
+        self.session = session
+
+    def record_execution(self, execution):
+        """执行结束时增量更新工作流统计"""
+        stats = self.get_or_create(execution.workflow_id, lock=True)
+        stats.record_execution(
+            succeeded=execution.status == ExecutionStatus.COMPLETED,
+            duration=execution.duration
+        )
+        return stats
+
+    def get_or_create(self, workflow_id, lock=False):
+        """获取（必要时创建）工作流统计行"""
+        query = self.session.query(WorkflowStats).filter_by(workflow_id=workflow_id)
+        if lock:
+            query = query.with_for_update()
+
+        stats = query.first()
+        if stats:
+            return stats
+
+        stats = WorkflowStats(
+            workflow_id=workflow_id,
+            view_count=0,
+            like_count=0,
+            fork_count=0,
+            share_count=0,
+            execution_count=0,
+            success_count=0,
+            success_rate=0.0,
+            avg_execution_time=0.0,
+            timed_execution_count=0
+        )
+        try:
+            with self.session.begin_nested():
+                self.session.add(stats)
+        except IntegrityError:
+            # 并发创建时以已存在的统计行为准
+            stats = query.one()
+        return stats
+
+    def get_stats_map(self, workflow_ids):
+        """批量读取统计，返回 {workflow_id: stats_dict}，每个工作流只命中一次唯一索引"""
+        workflow_ids = list(set(workflow_ids))
+        if not workflow_ids:
+            return {}
+
+        rows = self.session.query(WorkflowStats).filter(WorkflowStats.workflow_id.in_(workflow_ids)).all()
+        return {stats.workflow_id: stats.to_dict() for stats in rows}
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+布隆过滤器
+
+用于按用户/会话对浏览、点赞等行为事件去重。只会误判"已见过"（概率
+由 error_rate 控制），不会漏判，内存占用与容量成正比而与键长度无关。
+"""
+
+import hashlib
+import math
+import threading
+import time
+
+class BloomFilter:
+    """定长位数组的布隆过滤器"""
+
+    def __init__(self, capacity=100000, error_rate=0.01):
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError('capacity 必须为正数，error_rate 必须在 (0, 1) 之间')
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bit_count = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.bit_count / capacity * math.log(2)))
+        self.bits = bytearray((self.bit_count + 7) // 8)
+        self.count = 0
+
+    def add(self, key):
+        """加入键，返回加入前是否可能已存在"""
+        present = True
+        for position in self._positions(key):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not self.bits[byte] & mask:
+                present = False
+                self.bits[byte] |= mask
+        if not present:
+            self.count += 1
+        return present
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def _positions(self, key):
+        """双重哈希生成 hash_count 个位下标"""
+        digest = hashlib.blake2b(str(key).encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * second) % self.bit_count for index in range(self.hash_count)]
+
+class RotatingBloomFilter:
+    """按时间窗口轮换的布隆过滤器
+
+    同时保留当前和上一个窗口的过滤器，键在 window 到 2 * window 秒内被视为重复，
+    过期窗口整体丢弃，无需逐个删除键。
+    """
+
+    def __init__(self, window=1800, capacity=100000, error_rate=0.01):
+        self.window = window
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._current = BloomFilter(capacity, error_rate)
+        self._previous = BloomFilter(capacity, error_rate)
+        self._rotated_at = time.time()
+
+    def seen(self, key, now=None):
+        """检查并记录键，返回该键在去重窗口内是否已出现过"""
+        now = now or time.time()
+        with self._lock:
+            if now - self._rotated_at >= self.window or self._current.count >= self.capacity:
+                self._previous = self._current
+                self._current = BloomFilter(self.capacity, self.error_rate)
+                self._rotated_at = now
+
+            if key in self._previous:
+                self._current.add(key)
+                return True
+            return self._current.add(key)
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP 条件请求
+
+由资源的版本号和更新时间算出 ETag，请求带有匹配的 If-None-Match 时
+直接返回 304，不再读取和序列化资源本身。响应中附带了不参与 ETag 计算的
+内容（例如工作流详情中的统计计数）时使用弱 ETag。
+
+频繁变化、允许短暂过期的计数类资源不用 ETag 重新验证，而是给出较短的
+max-age，由客户端和共享缓存直接复用。
+"""
+
+import hashlib
+import json
+
+from flask import request, Response
+
+# 公开资源：允许共享缓存保存，但每次使用前都要用 ETag 重新验证
+PUBLIC_REVALIDATE = 'public, no-cache'
+
+# 私有资源：只允许浏览器缓存，每次使用前重新验证
+PRIVATE_REVALIDATE = 'private, no-cache'
+
+def short_lived(is_public, max_age):
+    """计数类资源的 Cache-Control：max_age 秒内直接使用缓存"""
+    return f"{'public' if is_public else 'private'}, max-age={int(max_age)}"
+
+def make_etag(*parts):
+    """由资源的版本信息生成 ETag（不含引号）"""
+    raw = json.dumps(parts, separators=(',', ':'), default=str, ensure_ascii=False)
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+def etag_matches(etag):
+    """当前请求的 If-None-Match 是否与 etag 匹配（If-None-Match 按弱比较）"""
+    return request.if_none_match.contains_weak(etag)
+
+def not_modified(etag, cache_control, weak=False):
+    """304 响应"""
+    response = Response(status=304)
+    return with_etag(response, etag, cache_control, weak)
+
+def with_etag(response, etag, cache_control, weak=False):
+    """给响应加上 ETag 和 Cache-Control"""
+    response.set_etag(etag, weak)
+    response.headers['Cache-Control'] = cache_control
+    return response
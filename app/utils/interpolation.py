@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+{{变量}} 模板插值
+
+节点配置和全局变量中的字符串可以引用变量和上游节点的输出：
+    "你好，{{vars.name}}"            全局变量
+    "{{input.query}}"                本次执行的输入
+    "{{nodes.检索.output.items.0}}"  上游节点的输出（列表下标也用点号或 [0]）
+    "{{name}}"                        不带命名空间时视为 vars.name
+
+配置树每个版本只需编译一次，编译结果是由元组组成的普通数据，可以放进
+响应缓存：
+    (LITERAL, 值)                       不含变量的子树，渲染时原样返回
+    (REFERENCE, 路径)                   整个字符串就是一个占位符，返回原始值（保留类型）
+    (TEXT, (片段, ...))                 字面量片段为 str，占位符为路径元组
+    (MAPPING, ((键, 子模板), ...))
+    (SEQUENCE, (子模板, ...))
+渲染只沿编译结果取值并 join，不再扫描字符串；整棵不含变量的配置编译为
+LITERAL，调用方用 is_static 判断后可以完全跳过渲染。
+
+取不到的值在 REFERENCE 中为 None，在 TEXT 中为空字符串；没有闭合的 {{ 按字面量保留。
+
+与每次用正则扫描配置的渲染方式的对比见 benchmarks/interpolation.py。
+"""
+
+import json
+import re
+
+LITERAL, REFERENCE, TEXT, MAPPING, SEQUENCE = range(5)
+
+# 模板中可以使用的命名空间
+TEMPLATE_NAMESPACES = ('vars', 'input', 'nodes')
+
+# 不带命名空间的引用所属的命名空间
+DEFAULT_NAMESPACE = 'vars'
+
+PLACEHOLDER_PATTERN = re.compile(r'\{\{\s*([^{}]*?)\s*\}\}')
+INDEX_PATTERN = re.compile(r'\[(\d+)\]')
+
+def parse_path(expression):
+    """占位符内的表达式 -> 路径元组，格式不对时返回 None"""
+    keys = tuple(key.strip() for key in INDEX_PATTERN.sub(r'.\1', expression).split('.'))
+    if not keys or not all(keys):
+        return None
+    if keys[0] not in TEMPLATE_NAMESPACES:
+        keys = (DEFAULT_NAMESPACE,) + keys
+    return keys
+
+def _compile_string(value):
+    segments = []
+    position = 0
+    for match in PLACEHOLDER_PATTERN.finditer(value):
+        path = parse_path(match.group(1))
+        if path is None:
+            continue
+        if match.start() > position:
+            segments.append(value[position:match.start()])
+        segments.append(path)
+        position = match.end()
+    if not segments:
+        return None
+    if position < len(value):
+        segments.append(value[position:])
+
+    if len(segments) == 1:
+        return (REFERENCE, segments[0])
+    # 相邻的字面量（跳过的无效占位符造成）合并为一段
+    merged = []
+    for segment in segments:
+        if isinstance(segment, str) and merged and isinstance(merged[-1], str):
+            merged[-1] += segment
+        else:
+            merged.append(segment)
+    return (TEXT, tuple(merged))
+
+def compile_template(value):
+    """
+    编译配置树（JSON 值）
+
+    Returns:
+        编译结果；整棵树不含变量时为 (LITERAL, value)
+    """
+    if isinstance(value, str):
+        return _compile_string(value) or (LITERAL, value)
+    if isinstance(value, dict):
+        items = tuple((key, compile_template(item)) for key, item in value.items())
+        if all(compiled[0] == LITERAL for _, compiled in items):
+            return (LITERAL, value)
+        return (MAPPING, items)
+    if isinstance(value, (list, tuple)):
+        items = tuple(compile_template(item) for item in value)
+        if all(compiled[0] == LITERAL for compiled in items):
+            return (LITERAL, value)
+        return (SEQUENCE, items)
+    return (LITERAL, value)
+
+def is_static(compiled):
+    """编译结果是否不含变量（渲染结果就是原值）"""
+    return compiled is None or compiled[0] == LITERAL
+
+def resolve(context, path):
+    """按路径在上下文中取值，取不到时返回 None"""
+    value = context
+    for key in path:
+        if isinstance(value, dict):
+            value = value.get(key)
+        elif isinstance(value, (list, tuple)):
+            try:
+                value = value[int(key)]
+            except (ValueError, IndexError):
+                return None
+        else:
+            return None
+        if value is None:
+            return None
+    return value
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str)
+    return str(value)
+
+def render(compiled, context):
+    """
+    渲染编译结果
+
+    LITERAL 部分返回的是原对象本身，调用方不要就地修改渲染结果。
+
+    Args:
+        compiled: compile_template 的结果
+        context: {'vars': ..., 'input': ..., 'nodes': ...}
+    """
+    kind, body = compiled
+    if kind == LITERAL:
+        return body
+    if kind == TEXT:
+        return ''.join([segment if segment.__class__ is str else _text(resolve(context, segment)) for segment in body])
+    if kind == REFERENCE:
+        return resolve(context, body)
+    if kind == MAPPING:
+        return {key: item[1] if item[0] == LITERAL else render(item, context) for key, item in body}
+    return [item[1] if item[0] == LITERAL else render(item, context) for item in body]
+
+def make_context(variables=None, input_data=None, node_outputs=None):
+    """渲染上下文：全局变量（已渲染）、本次执行的输入、上游节点的输出（按节点名称）"""
+    return {'vars': variables or {}, 'input': input_data or {}, 'nodes': node_outputs or {}}
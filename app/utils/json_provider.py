@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基于 orjson 的 Flask JSON provider
+
+datetime/date、枚举（WorkflowStatus、ExecutionStatus 等 str 枚举）、UUID、
+dataclass 由 orjson 原生序列化，Decimal 按字符串输出以保留精度；响应体
+直接使用 orjson 生成的 UTF-8 字节，不经过 str 再编码。
+
+与标准库 json 的吞吐对比见 benchmarks/json_provider.py。
+"""
+
+import decimal
+
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+# 允许非字符串键（与标准库 json 一致，整数键输出为字符串）
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+def _default(value):
+    """orjson 不能原生处理的类型"""
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return DefaultJSONProvider.default(value)
+
+def dumps_bytes(obj, sort_keys=False):
+    """序列化为 UTF-8 字节（供流式响应等不经过 app.json 的场景）"""
+    option = ORJSON_OPTIONS | orjson.OPT_SORT_KEYS if sort_keys else ORJSON_OPTIONS
+    return orjson.dumps(obj, default=_default, option=option)
+
+class OrjsonProvider(DefaultJSONProvider):
+    """orjson JSON provider"""
+
+    # 保持 to_dict 中的字段顺序，不再逐个响应排序键
+    sort_keys = False
+    mimetype = 'application/json; charset=utf-8'
+
+    def dumps(self, obj, **kwargs):
+        return dumps_bytes(obj, kwargs.get('sort_keys', self.sort_keys)).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj, self.sort_keys), mimetype=self.mimetype)
+
+def init_json_provider(app):
+    """为应用启用 orjson JSON provider"""
+    app.json = OrjsonProvider(app)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列表分页
+
+除 page/size 外支持游标(keyset)分页：游标记录上一页最后一行的排序键，
+下一页用 WHERE (k1, ..., id) < (v1, ..., vn) 直接从复合索引定位，翻到
+多深代价都与第一页相同。游标对客户端不透明（base64 编码的 JSON），
+并带有排序方式标识，换了排序方式的旧游标会被拒绝。
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import DateTime, and_, literal, or_, tuple_
+
+# 单页最大条数
+MAX_PAGE_SIZE = 100
+
+def clamp_size(size):
+    """把每页条数限制在 1 ~ MAX_PAGE_SIZE 之间"""
+    return min(max(int(size), 1), MAX_PAGE_SIZE)
+
+def encode_cursor(state):
+    """把游标状态编码为不透明的字符串"""
+    raw = json.dumps(state, separators=(',', ':'), default=_encode_value).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """解码游标字符串"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        state = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError('无效的分页游标')
+    if not isinstance(state, dict):
+        raise ValueError('无效的分页游标')
+    return state
+
+def paginate(query, order_by, page=1, size=20, cursor=None, sort_key='default', keyset=True):
+    """
+    分页查询
+
+    Args:
+        query: 未排序的查询
+        order_by: [(排序表达式, 是否降序)]，最后一项必须唯一（通常为主键）；
+            是否降序为 None 表示表达式已带排序方向（只能用于 keyset=False）
+        page: 页码，未提供 cursor 时使用（OFFSET 分页，兼容旧接口）
+        size: 每页条数
+        cursor: 上一页返回的 next_cursor，提供时按游标分页且不再统计总数
+        sort_key: 排序方式标识，写入游标
+        keyset: 排序表达式不能作为游标键时（如全文检索相关度）为 False，游标退化为偏移量
+
+    Returns:
+        (当前页的行, 分页信息)；单实体查询返回实体，多列查询返回列元组
+    """
+    size = clamp_size(size)
+    width = len(query.column_descriptions)
+    expressions = [expression for expression, _ in order_by]
+    ordering = [
+        expression if descending is None else expression.desc() if descending else expression.asc()
+        for expression, descending in order_by
+    ]
+
+    offset = 0
+    if cursor:
+        state = decode_cursor(cursor)
+        if state.get('s') != sort_key:
+            raise ValueError('分页游标与当前排序方式不匹配')
+        if keyset and 'k' in state:
+            query = query.filter(_after(order_by, _load_values(expressions, state['k'])))
+        else:
+            offset = max(int(state.get('o', 0)), 0)
+        meta = {'size': size}
+    else:
+        page = max(int(page), 1)
+        offset = (page - 1) * size
+        # 统计总数时只选出唯一键，不读取整行
+        total = query.order_by(None).with_entities(expressions[-1]).count()
+        meta = {'total': total, 'page': page, 'size': size}
+
+    if keyset:
+        query = query.add_columns(*(expression.label(f'cursor_key_{index}') for index, expression in enumerate(expressions)))
+
+    # 多取一行判断是否还有下一页
+    rows = query.order_by(*ordering).offset(offset).limit(size + 1).all()
+    has_more = len(rows) > size
+    rows = rows[:size]
+
+    next_cursor = None
+    if has_more:
+        if keyset:
+            next_cursor = encode_cursor({'s': sort_key, 'k': list(rows[-1][width:])})
+        else:
+            next_cursor = encode_cursor({'s': sort_key, 'o': offset + size})
+
+    meta['has_more'] = has_more
+    meta['next_cursor'] = next_cursor
+    if keyset:
+        # 去掉末尾附加的游标键列
+        rows = [row[0] for row in rows] if width == 1 else [row[:width] for row in rows]
+    return rows, meta
+
+def _after(order_by, values):
+    """排在游标之后的行的条件"""
+    if len(values) != len(order_by):
+        raise ValueError('无效的分页游标')
+
+    directions = {descending for _, descending in order_by}
+    if len(directions) == 1:
+        # 排序方向一致时用行值比较，数据库可直接在复合索引上做范围扫描
+        left = tuple_(*(expression for expression, _ in order_by))
+        right = tuple_(*(literal(value, expression.type) for (expression, _), value in zip(order_by, values)))
+        return left < right if directions.pop() else left > right
+
+    clauses = []
+    for index, (expression, descending) in enumerate(order_by):
+        equal = [order_by[prior][0] == values[prior] for prior in range(index)]
+        clauses.append(and_(*equal, expression < values[index] if descending else expression > values[index]))
+    return or_(*clauses)
+
+def _load_values(expressions, values):
+    """按排序表达式的类型还原游标中的值"""
+    if not isinstance(values, list) or len(values) != len(expressions):
+        raise ValueError('无效的分页游标')
+
+    loaded = []
+    for expression, value in zip(expressions, values):
+        if value is None:
+            raise ValueError('无效的分页游标')
+        if isinstance(expression.type, DateTime):
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise ValueError('无效的分页游标')
+        loaded.append(value)
+    return loaded
+
+def _encode_value(value):
+    """JSON 编码游标中的日期时间"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'无法编码的游标值: {value!r}')
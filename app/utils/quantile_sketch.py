@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+可合并的分位数草图
+
+采用 DDSketch 的对数分桶方式：数值 x 落入下标为 ceil(log_gamma(x)) 的桶，
+任意分位数的相对误差不超过 relative_accuracy。桶计数可以直接相加，
+因此多个草图（例如不同工作流、不同时间段）可以无损合并。
+"""
+
+import math
+
+# 小于该值的数据统一计入零值桶
+MIN_INDEXABLE_VALUE = 1e-9
+
+class QuantileSketch:
+    """对数分桶的可合并分位数草图"""
+
+    def __init__(self, relative_accuracy=0.01, max_bins=512):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError('relative_accuracy 必须在 (0, 1) 之间')
+
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value, count=1):
+        """加入一个数据点"""
+        if value < MIN_INDEXABLE_VALUE:
+            self.zero_count += count
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + count
+            if len(self.bins) > self.max_bins:
+                self._collapse_lowest()
+        self.count += count
+
+    def merge(self, other):
+        """合并另一个草图（两者精度必须一致）"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('只能合并相同精度的分位数草图')
+
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+        while len(self.bins) > self.max_bins:
+            self._collapse_lowest()
+        return self
+
+    def quantile(self, q):
+        """返回分位数 q (0-1) 的近似值，草图为空时返回 None"""
+        if self.count == 0:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if rank < seen:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def to_dict(self):
+        """序列化为可存入JSON列的字典"""
+        return {
+            'a': self.relative_accuracy,
+            'n': self.count,
+            'z': self.zero_count,
+            'b': {str(key): count for key, count in self.bins.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data, relative_accuracy=0.01):
+        """从 to_dict 的结果恢复，data 为空时返回新的空草图"""
+        if not data:
+            return cls(relative_accuracy)
+
+        sketch = cls(data.get('a', relative_accuracy))
+        sketch.count = data.get('n', 0)
+        sketch.zero_count = data.get('z', 0)
+        sketch.bins = {int(key): count for key, count in data.get('b', {}).items()}
+        return sketch
+
+    def _collapse_lowest(self):
+        """桶数超限时把最低的两个桶合并，牺牲低分位精度以保证高分位精度"""
+        lowest, second = sorted(self.bins)[:2]
+        self.bins[second] += self.bins.pop(lowest)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+响应缓存
+
+基于 Flask-Caching，后端由 CACHE_TYPE 配置决定：默认 simple（进程内），
+多进程部署可切换为 RedisCache（CACHE_REDIS_URL）。
+
+缓存条目按实体打标签（如 workflow:42）。每个标签在缓存中有一个
+随机令牌，条目写入时记下各标签的当前令牌，读取时令牌不一致即视为失效；
+写操作提交后删除相关标签的令牌即可让所有关联条目一次性失效，无需记录
+标签下有哪些键。令牌在加载数据之前读取，加载期间发生的失效不会被写回的
+旧数据覆盖。
+"""
+
+import logging
+import uuid
+
+from flask_caching import Cache
+
+logger = logging.getLogger(__name__)
+
+cache = Cache()
+
+TAG_PREFIX = 'cache-tag:'
+
+def workflow_tag(workflow_id):
+    """工作流实体标签"""
+    return f'workflow:{workflow_id}'
+
+class ResponseCache:
+    """带标签失效的读穿缓存"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or cache
+
+    def get_or_load(self, key, tags, loader, timeout=None, cacheable=None):
+        """
+        读穿缓存
+
+        Args:
+            key: 缓存键
+            tags: 条目关联的实体标签
+            loader: 未命中时调用，返回要缓存的值
+            timeout: 过期时间(秒)，None 使用 CACHE_DEFAULT_TIMEOUT
+            cacheable: 可选的判断函数，返回 False 时本次结果不写入缓存
+
+        Returns:
+            缓存或新加载的值
+        """
+        try:
+            entry = self.backend.get(key)
+            tokens = self._tokens(tags)
+        except Exception as e:
+            logger.warning(f"Response cache unavailable: {str(e)}")
+            return loader()
+
+        if entry is not None and entry.get('tokens') == tokens:
+            return entry['value']
+
+        value = loader()
+        if cacheable is None or cacheable(value):
+            try:
+                self.backend.set(key, {'tokens': tokens, 'value': value}, timeout=timeout)
+            except Exception as e:
+                logger.warning(f"Failed to write response cache {key}: {str(e)}")
+        return value
+
+    def invalidate(self, *tags):
+        """使带有这些标签的全部缓存条目失效"""
+        if not tags:
+            return
+        try:
+            self.backend.delete_many(*(TAG_PREFIX + tag for tag in tags))
+        except Exception as e:
+            logger.error(f"Failed to invalidate response cache tags {tags}: {str(e)}")
+
+    def _tokens(self, tags):
+        """读取标签的当前令牌，缺失的标签生成新令牌"""
+        if not tags:
+            return []
+
+        keys = [TAG_PREFIX + tag for tag in tags]
+        tokens = self.backend.get_many(*keys)
+        for index, token in enumerate(tokens):
+            if token is None:
+                # add 只在键不存在时写入，并发生成时以先写入的为准
+                self.backend.add(keys[index], uuid.uuid4().hex, timeout=0)
+                tokens[index] = self.backend.get(keys[index])
+        return tokens
+
+response_cache = ResponseCache()
+
+def init_cache(app):
+    """初始化响应缓存后端"""
+    cache.init_app(app)
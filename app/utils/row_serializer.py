@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列表读路径的行序列化
+
+热点列表不再构造 ORM 实例（实例状态、属性字典、身份映射登记）再逐字段
+to_dict，而是只选出需要的列，把结果元组直接装进 __slots__ 数据类。列映射
+在模块加载时按模型预先生成一次；数据类由 orjson JSON provider 原生序列化，
+字段顺序即列映射顺序，输出与模型 to_dict 一致。
+"""
+
+from dataclasses import make_dataclass
+
+class RowSerializer:
+    """模型的预编译列映射及对应的 __slots__ 行对象"""
+
+    def __init__(self, model, fields=None, name=None):
+        """
+        Args:
+            model: ORM 模型
+            fields: 要选出的属性名（按输出顺序），默认为模型的全部列
+            name: 行对象类名，默认 <模型名>Row
+        """
+        # 读取表列而不是 mapper 属性，模型模块加载时尚不能配置 mapper
+        columns = [column.key for column in model.__table__.columns]
+        if fields is None:
+            fields = columns
+        unknown = [field for field in fields if field not in columns]
+        if unknown:
+            raise ValueError(f"{model.__name__} 没有这些列: {', '.join(unknown)}")
+
+        self.model = model
+        self.fields = tuple(fields)
+        self.columns = tuple(getattr(model, field) for field in self.fields)
+        self.row_class = make_dataclass(name or f'{model.__name__}Row', self.fields, slots=True, eq=False)
+        self.row_class.__module__ = model.__module__
+
+    def query(self, session):
+        """只选出映射列的查询"""
+        return session.query(*self.columns)
+
+    def build(self, row):
+        """查询行 -> 行对象"""
+        return self.row_class(*row)
+
+    def build_all(self, rows):
+        """查询行列表 -> 行对象列表"""
+        row_class = self.row_class
+        return [row_class(*row) for row in rows]
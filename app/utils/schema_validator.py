@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON Schema 编译为校验闭包
+
+节点的输入输出模式在每次调用时都要检查，逐次解释模式太慢。这里把模式
+（JSON Schema 的常用子集）编译一次，得到嵌套的 Python 闭包：
+    check(value) -> None（通过）或 (路径元组, 错误信息)
+
+支持的关键字：type、enum、const、properties、required、additionalProperties、
+items、minItems、maxItems、minimum、maximum、exclusiveMinimum、exclusiveMaximum、
+minLength、maxLength、pattern、allOf、anyOf、oneOf、not。title、description、
+format、default 等注解忽略；$ref 不支持，编译时报错。
+
+类型按精确类判断（值来自 JSON 解析）：number 接受 int 和 float，integer 接受
+int 和整数值的 float（JSON Schema 中 1.0 也是整数），布尔值不算数字。只有类型
+约束的属性和数组元素在父级闭包中直接比较类，不再调用子闭包；不施加任何约束
+的模式编译结果为 None，调用方可以直接跳过。
+
+单次校验和编译耗时的基准见 benchmarks/schema_validator.py。
+"""
+
+import re
+
+TYPE_CLASSES = {
+    'object': (dict,),
+    'array': (list, tuple),
+    'string': (str,),
+    'integer': (int, float),
+    'number': (int, float),
+    'boolean': (bool,),
+    'null': (type(None),)
+}
+
+MISSING = object()
+
+class SchemaError(ValueError):
+    """模式本身无效或使用了不支持的关键字"""
+
+class SchemaValidationError(ValueError):
+    """值不符合模式"""
+
+    def __init__(self, label, path, message):
+        location = '.'.join(str(key) for key in path)
+        super().__init__(f'{label}{"." + location if location else ""}: {message}')
+        self.path = path
+        self.message = message
+
+def _type_classes(types):
+    """type 关键字 -> (允许的类集合, 错误信息, 浮点数是否必须是整数值)"""
+    names = [types] if isinstance(types, str) else types
+    if not isinstance(names, list) or not names:
+        raise SchemaError(f'无效的类型: {types}')
+    allowed = set()
+    for name in names:
+        if name not in TYPE_CLASSES:
+            raise SchemaError(f'无效的类型: {name}')
+        allowed.update(TYPE_CLASSES[name])
+    integral = 'integer' in names and 'number' not in names
+    return frozenset(allowed), f'类型应为 {"/".join(names)}', integral
+
+def _integral_check(type_error):
+    """integer 允许 float 类，但值必须是整数"""
+    def check(value):
+        if value.__class__ is float and not value.is_integer():
+            return (), type_error
+        return None
+    return check
+
+def _chain(checks):
+    """依次执行多个检查，返回第一个错误"""
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+    checks = tuple(checks)
+
+    def check_all(value):
+        for check in checks:
+            error = check(value)
+            if error is not None:
+                return error
+        return None
+    return check_all
+
+def _compile(schema):
+    """
+    编译模式
+
+    Returns:
+        (允许的类集合或 None, 类型错误信息, 其余约束的检查闭包或 None)
+    """
+    if schema is None or schema is True:
+        return None, None, None
+    if schema is False:
+        return None, None, lambda value: ((), '不允许任何值')
+    if not isinstance(schema, dict):
+        raise SchemaError('模式必须是对象')
+    if '$ref' in schema:
+        raise SchemaError('不支持 $ref')
+
+    allowed, type_error, integral = None, None, False
+    if 'type' in schema:
+        allowed, type_error, integral = _type_classes(schema['type'])
+
+    checks = []
+    if integral:
+        checks.append(_integral_check(type_error))
+    if 'enum' in schema:
+        checks.append(_enum_check(schema['enum']))
+    if 'const' in schema:
+        checks.append(_enum_check([schema['const']]))
+    checks.extend(_number_checks(schema))
+    checks.extend(_string_checks(schema))
+    if any(key in schema for key in ('properties', 'required', 'additionalProperties')):
+        checks.append(_object_check(schema))
+    if any(key in schema for key in ('items', 'minItems', 'maxItems')):
+        checks.append(_array_check(schema))
+    checks.extend(_combinator_checks(schema))
+    return allowed, type_error, _chain(checks)
+
+def compile_schema(schema):
+    """
+    编译模式为单个闭包
+
+    Returns:
+        check(value) -> None | (路径元组, 错误信息)；模式不施加约束时为 None
+    """
+    allowed, type_error, check = _compile(schema)
+    if allowed is None:
+        return check
+    if check is None:
+        return lambda value: None if value.__class__ in allowed else ((), type_error)
+
+    def check_typed(value):
+        if value.__class__ not in allowed:
+            return (), type_error
+        return check(value)
+    return check_typed
+
+def _enum_check(options):
+    if not isinstance(options, list):
+        raise SchemaError('enum 必须是数组')
+    options = tuple(options)
+    message = f'取值应为 {list(options)} 之一'
+
+    def check(value):
+        # 布尔值与 0/1 相等，需要同时比较是否为布尔
+        for option in options:
+            if value == option and (value.__class__ is bool) == (option.__class__ is bool):
+                return None
+        return (), message
+    return check
+
+def _number_checks(schema):
+    limits = {}
+    for key in ('minimum', 'maximum', 'exclusiveMinimum', 'exclusiveMaximum'):
+        if key in schema:
+            if schema[key].__class__ not in (int, float):
+                raise SchemaError(f'{key} 必须是数字')
+            limits[key] = schema[key]
+    if not limits:
+        return []
+    minimum, maximum = limits.get('minimum'), limits.get('maximum')
+    above, below = limits.get('exclusiveMinimum'), limits.get('exclusiveMaximum')
+
+    def check(value):
+        if value.__class__ is not int and value.__class__ is not float:
+            return None
+        if minimum is not None and value < minimum:
+            return (), f'不能小于 {minimum}'
+        if maximum is not None and value > maximum:
+            return (), f'不能大于 {maximum}'
+        if above is not None and value <= above:
+            return (), f'应大于 {above}'
+        if below is not None and value >= below:
+            return (), f'应小于 {below}'
+        return None
+    return [check]
+
+def _string_checks(schema):
+    min_length, max_length = schema.get('minLength'), schema.get('maxLength')
+    pattern = schema.get('pattern')
+    if min_length is None and max_length is None and pattern is None:
+        return []
+    try:
+        search = re.compile(pattern).search if pattern is not None else None
+    except re.error as e:
+        raise SchemaError(f'无效的 pattern: {e}')
+
+    def check(value):
+        if value.__class__ is not str:
+            return None
+        if min_length is not None and len(value) < min_length:
+            return (), f'长度不能小于 {min_length}'
+        if max_length is not None and len(value) > max_length:
+            return (), f'长度不能大于 {max_length}'
+        if search is not None and search(value) is None:
+            return (), f'不匹配 {pattern}'
+        return None
+    return [check]
+
+def _object_check(schema):
+    properties = schema.get('properties') or {}
+    required = schema.get('required') or []
+    if not isinstance(properties, dict) or not isinstance(required, list):
+        raise SchemaError('properties 必须是对象，required 必须是数组')
+
+    # (属性名, 允许的类, 类型错误, 其余检查)，没有任何约束的属性不参与
+    fields = []
+    for key, subschema in properties.items():
+        allowed, type_error, check = _compile(subschema)
+        if allowed is not None or check is not None:
+            fields.append((key, allowed, type_error, check))
+    fields = tuple(fields)
+    required = tuple(required)
+
+    additional = schema.get('additionalProperties', True)
+    known = frozenset(properties)
+    if additional is True:
+        extra_check = None
+    elif additional is False:
+        extra_check = False
+    else:
+        extra_check = compile_schema(additional)
+
+    def check(value):
+        if value.__class__ is not dict:
+            return None
+        for key in required:
+            if key not in value:
+                return (key,), '缺少必填字段'
+        for key, allowed, type_error, field_check in fields:
+            item = value.get(key, MISSING)
+            if item is MISSING:
+                continue
+            if allowed is not None and item.__class__ not in allowed:
+                return (key,), type_error
+            if field_check is not None:
+                error = field_check(item)
+                if error is not None:
+                    return (key,) + error[0], error[1]
+        if extra_check is not None:
+            for key in value.keys() - known:
+                if extra_check is False:
+                    return (key,), '不允许的字段'
+                error = extra_check(value[key])
+                if error is not None:
+                    return (key,) + error[0], error[1]
+        return None
+    return check
+
+def _array_check(schema):
+    allowed, type_error, item_check = _compile(schema.get('items'))
+    min_items, max_items = schema.get('minItems'), schema.get('maxItems')
+
+    def check(value):
+        if value.__class__ is not list and value.__class__ is not tuple:
+            return None
+        if min_items is not None and len(value) < min_items:
+            return (), f'元素个数不能少于 {min_items}'
+        if max_items is not None and len(value) > max_items:
+            return (), f'元素个数不能多于 {max_items}'
+        if allowed is None and item_check is None:
+            return None
+        for index, item in enumerate(value):
+            if allowed is not None and item.__class__ not in allowed:
+                return (index,), type_error
+            if item_check is not None:
+                error = item_check(item)
+                if error is not None:
+                    return (index,) + error[0], error[1]
+        return None
+    return check
+
+def _combinator_checks(schema):
+    checks = []
+    for key in ('allOf', 'anyOf', 'oneOf'):
+        if key not in schema:
+            continue
+        if not isinstance(schema[key], list) or not schema[key]:
+            raise SchemaError(f'{key} 必须是非空数组')
+        # 不施加约束的分支视为总是通过
+        branches = tuple(compile_schema(subschema) or (lambda value: None) for subschema in schema[key])
+        checks.append(_combinator(key, branches))
+    if 'not' in schema:
+        negated = compile_schema(schema['not']) or (lambda value: None)
+        checks.append(lambda value: ((), '不应符合 not 模式') if negated(value) is None else None)
+    return checks
+
+def _combinator(key, branches):
+    if key == 'allOf':
+        return _chain(list(branches))
+    if key == 'anyOf':
+        def check_any(value):
+            for branch in branches:
+                if branch(value) is None:
+                    return None
+            return (), '不符合 anyOf 中的任何模式'
+        return check_any
+
+    def check_one(value):
+        matched = sum(1 for branch in branches if branch(value) is None)
+        return None if matched == 1 else ((), f'应恰好符合 oneOf 中的一个模式（符合 {matched} 个）')
+    return check_one
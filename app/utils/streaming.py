@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式导出
+
+查询以 yield_per 分批从服务端游标读取，每批序列化后立即写出，已写出的行
+不再被引用，进程内存与总行数无关。支持两种格式：
+    ndjson: 每行一个 JSON 对象（application/x-ndjson）
+    json:   分块输出的 JSON 数组
+导入方向按块读取请求体（可为 gzip 压缩），逐行解析 NDJSON。
+"""
+
+import zlib
+
+import orjson
+from flask import Response, stream_with_context
+
+from app.utils.json_provider import dumps_bytes
+
+# 每批从数据库读取的行数
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FORMATS = ('ndjson', 'json')
+
+NDJSON_MIMETYPE = 'application/x-ndjson; charset=utf-8'
+JSON_MIMETYPE = 'application/json; charset=utf-8'
+GZIP_MIMETYPE = 'application/gzip'
+
+# 读取请求体的块大小
+READ_CHUNK_SIZE = 64 * 1024
+
+# 单行 NDJSON 记录的上限，防止没有换行的输入占满内存
+MAX_RECORD_BYTES = 16 * 1024 * 1024
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+def parse_export_format(value):
+    """校验导出格式，默认 ndjson"""
+    value = (value or 'ndjson').lower()
+    if value not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {value}，可选 {', '.join(EXPORT_FORMATS)}")
+    return value
+
+def iter_batches(query, batch_size=EXPORT_BATCH_SIZE):
+    """按批读取查询结果（服务端游标，不一次性载入全部行）"""
+    batch = []
+    for row in query.yield_per(batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _ndjson_chunks(query, serialize, batch_size):
+    for batch in iter_batches(query, batch_size):
+        yield b''.join(dumps_bytes(serialize(row)) + b'\n' for row in batch)
+
+def _json_chunks(query, serialize, batch_size, key):
+    """JSON 数组；给定 key 时包装为 {key: [...], "total": n}，total 在末尾输出"""
+    yield b'{' + dumps_bytes(key) + b':[' if key else b'['
+    total = 0
+    for batch in iter_batches(query, batch_size):
+        chunk = b','.join(dumps_bytes(serialize(row)) for row in batch)
+        yield chunk if total == 0 else b',' + chunk
+        total += len(batch)
+    yield b'],"total":' + str(total).encode('ascii') + b'}' if key else b']'
+
+def gzip_chunks(chunks, level=6):
+    """把字节块流压缩为 gzip 流"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def _read_body(stream, chunk_size):
+    """
+    按块读取请求体，gzip 压缩的输入（按魔数识别）边读边解压
+
+    每次解压的输出不超过 chunk_size 字节，剩余输入留在 unconsumed_tail 中下次
+    继续，高压缩比的输入不会一次展开到内存里。首尾相接的多个 gzip 成员
+    依次解压，成员之后不是 gzip 数据时视为损坏。
+    """
+    chunk = stream.read(chunk_size)
+    if chunk[:2] != GZIP_MAGIC:
+        while chunk:
+            yield chunk
+            chunk = stream.read(chunk_size)
+        return
+
+    decompressor = zlib.decompressobj(31)
+    pending, drained = chunk, True
+    try:
+        while True:
+            if decompressor.eof:
+                if not pending:
+                    pending = stream.read(chunk_size)
+                    if not pending:
+                        return
+                # 下一个 gzip 成员
+                decompressor = zlib.decompressobj(31)
+            elif not pending and drained:
+                pending = stream.read(chunk_size)
+                if not pending:
+                    raise ValueError('压缩数据不完整')
+
+            data = decompressor.decompress(pending, chunk_size)
+            # 输出达到上限时解压器内部可能还有没有输出的数据
+            drained = len(data) < chunk_size
+            pending = decompressor.unconsumed_tail or decompressor.unused_data
+            if data:
+                yield data
+    except zlib.error as e:
+        raise ValueError(f'压缩数据损坏: {e}')
+
+def iter_ndjson(stream, chunk_size=READ_CHUNK_SIZE, max_record_bytes=MAX_RECORD_BYTES):
+    """
+    按块读取 NDJSON 输入并逐行解析，gzip 压缩的输入按魔数自动识别
+
+    Args:
+        stream: 可 read(size) 的字节流（如 request.stream）
+        chunk_size: 每次读取（及解压输出）的字节数
+        max_record_bytes: 单行记录的上限
+
+    Yields:
+        (行号, 解析后的对象)
+    """
+    buffer = bytearray()
+    line_number = 0
+
+    def parse(lines):
+        nonlocal line_number
+        for line in lines:
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                yield line_number, orjson.loads(line)
+            except orjson.JSONDecodeError:
+                raise ValueError(f'第 {line_number} 行不是有效的 JSON')
+
+    for data in _read_body(stream, chunk_size):
+        buffer += data
+        # 本块没有换行时不重复切分尚未结束的长行
+        if b'\n' in data:
+            lines = buffer.split(b'\n')
+            buffer = lines.pop()
+        else:
+            lines = []
+        if len(buffer) > max_record_bytes:
+            raise ValueError(f'第 {line_number + len(lines) + 1} 行超过 {max_record_bytes} 字节')
+        yield from parse(lines)
+
+    yield from parse([buffer])
+
+def stream_response(chunks, mimetype, filename=None):
+    """流式 Response（可作为附件下载），禁止反向代理缓冲"""
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    if filename:
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    # 禁止反向代理缓冲整个响应
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def stream_query(query, serialize, fmt='ndjson', key=None, filename=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    流式输出查询结果
+
+    Args:
+        query: 已排序的查询
+        serialize: 行 -> 可 JSON 序列化的对象
+        fmt: ndjson 或 json
+        key: json 格式下的包装键，None 表示输出裸数组
+        filename: 作为附件下载时的文件名
+        batch_size: 每批读取的行数
+
+    Returns:
+        流式 Response
+    """
+    if fmt == 'ndjson':
+        chunks, mimetype = _ndjson_chunks(query, serialize, batch_size), NDJSON_MIMETYPE
+    else:
+        chunks, mimetype = _json_chunks(query, serialize, batch_size, key), JSON_MIMETYPE
+
+    if filename:
+        filename = f"{filename}.{'ndjson' if fmt == 'ndjson' else 'json'}"
+    return stream_response(chunks, mimetype, filename)
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+匿名访问者标识
+
+浏览和分享计数按访问者去重。登录用户按用户ID去重；匿名访问者优先使用
+客户端提供的会话ID（X-Session-ID），没有时用客户端地址、User-Agent 和
+Accept-Language 的摘要，同一 NAT 出口后的不同浏览器不会共用一个标识。
+标识带有前缀，不会与用户ID相同。
+"""
+
+import hashlib
+
+from flask import request
+
+def get_viewer_key():
+    """获取当前请求的匿名访问者去重标识"""
+    session_id = request.headers.get('X-Session-ID')
+    if session_id:
+        return f'session:{session_id}'
+
+    fingerprint = '|'.join((
+        request.remote_addr or '',
+        request.headers.get('User-Agent', ''),
+        request.headers.get('Accept-Language', '')
+    ))
+    return f'client:{hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:16]}'
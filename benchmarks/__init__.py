@@ -0,0 +1,5 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能基准脚本（不属于应用代码），在仓库根目录以 python -m benchmarks.<模块名> 运行
+"""
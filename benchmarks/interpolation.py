@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模板插值基准：编译后渲染与每次用正则扫描整棵配置树的吞吐对比
+
+在仓库根目录运行：
+    python -m benchmarks.interpolation --fields 50 --rounds 20000
+"""
+
+import argparse
+import time
+
+from app.utils.interpolation import (
+    PLACEHOLDER_PATTERN, compile_template, is_static, parse_path, render, resolve, _text
+)
+
+def _sample_config(fields):
+    """基准用的节点配置：少量变量混在大量静态字段中"""
+    return {
+        'model': 'gpt-4',
+        'temperature': 0.7,
+        'prompt': '请根据 {{input.query}} 和 {{nodes.检索.output.summary}} 回答，语气：{{tone}}',
+        'headers': {'Authorization': 'Bearer {{vars.token}}', 'Accept': 'application/json'},
+        'items': '{{nodes.检索.output.items}}',
+        'options': {f'option_{index}': {'enabled': True, 'label': f'选项 {index}'} for index in range(fields)}
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='模板插值基准')
+    parser.add_argument('--fields', type=int, default=50, help='配置中静态字段的数量')
+    parser.add_argument('--rounds', type=int, default=20000, help='渲染次数')
+    args = parser.parse_args()
+
+    config = _sample_config(args.fields)
+    static_config = {key: value for key, value in config.items() if key == 'options'}
+    context = {
+        'vars': {'token': 'secret', 'tone': '正式'},
+        'input': {'query': '示例问题'},
+        'nodes': {'检索': {'output': {'summary': '摘要', 'items': [1, 2, 3]}}}
+    }
+
+    def scan_render(value):
+        # 每次执行都遍历整棵配置树并用正则替换
+        if isinstance(value, str):
+            whole = PLACEHOLDER_PATTERN.fullmatch(value)
+            if whole:
+                return resolve(context, parse_path(whole.group(1)))
+            return PLACEHOLDER_PATTERN.sub(lambda match: _text(resolve(context, parse_path(match.group(1)))), value)
+        if isinstance(value, dict):
+            return {key: scan_render(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [scan_render(item) for item in value]
+        return value
+
+    compiled = compile_template(config)
+    compiled_static = compile_template(static_config)
+    assert render(compiled, context) == scan_render(config)
+
+    def run(label, function):
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            function()
+        elapsed = time.perf_counter() - start
+        print(f"{label:<24} {args.rounds / elapsed:12.0f} 次/秒")
+
+    print(f"静态字段数: {args.fields}, 渲染次数: {args.rounds}")
+    run('正则扫描（每次）', lambda: scan_render(config))
+    run('编译后渲染', lambda: render(compiled, context))
+    run('正则扫描（无变量配置）', lambda: scan_render(static_config))
+    run('编译后（无变量，跳过）', lambda: is_static(compiled_static) or render(compiled_static, context))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON 序列化吞吐基准：标准库 json（含原 to_dict 的逐字段转换）与 orjson provider
+
+在仓库根目录运行：
+    python -m benchmarks.json_provider --nodes 500 --rounds 20
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from enum import Enum
+
+from app.models.workflow_execution import ExecutionStatus, TriggerType
+from app.utils.json_provider import dumps_bytes
+
+def _sample_execution(node_count):
+    """构造一个与 WorkflowExecution.to_dict(include_nodes=True) 结构相同的执行详情"""
+    started = datetime(2026, 1, 1, 8, 0, 0, 123456)
+    node_executions = []
+    for index in range(node_count):
+        node_started = started + timedelta(seconds=index)
+        node_executions.append({
+            'id': index + 1,
+            'workflow_execution_id': 1,
+            'node_id': index + 1,
+            'status': ExecutionStatus.COMPLETED,
+            'input_data': {'items': [{'id': item, 'name': f'item-{item}', 'score': item * 0.5} for item in range(10)]},
+            'output_data': {'result': f'节点 {index} 的输出', 'values': list(range(20)), 'ok': True},
+            'error_message': None,
+            'retry_count': 0,
+            'started_at': node_started,
+            'completed_at': node_started + timedelta(milliseconds=250),
+            'duration': 0.25,
+            'created_at': node_started,
+            'updated_at': node_started
+        })
+
+    return {
+        'id': 1,
+        'workflow_id': 1,
+        'user_id': 1,
+        'trigger_type': TriggerType.MANUAL,
+        'input_data': {'query': '示例输入'},
+        'output_data': {'summary': '示例输出'},
+        'status': ExecutionStatus.COMPLETED,
+        'progress': 100.0,
+        'error_message': None,
+        'started_at': started,
+        'completed_at': started + timedelta(seconds=node_count),
+        'duration': float(node_count),
+        'node_count': node_count,
+        'completed_nodes': node_count,
+        'failed_nodes': 0,
+        'created_at': started,
+        'updated_at': started,
+        'node_executions': node_executions
+    }
+
+def _stdlib_ready(value):
+    """按原 to_dict 的方式逐字段转换日期时间和枚举，供标准库 json 序列化"""
+    if isinstance(value, dict):
+        return {key: _stdlib_ready(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_stdlib_ready(item) for item in value]
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+def main():
+    parser = argparse.ArgumentParser(description='JSON 序列化吞吐基准')
+    parser.add_argument('--nodes', type=int, default=500, help='每个执行详情包含的节点执行数')
+    parser.add_argument('--rounds', type=int, default=20, help='序列化轮数')
+    args = parser.parse_args()
+
+    payload = _sample_execution(args.nodes)
+    converted = _stdlib_ready(payload)
+
+    def stdlib_dumps(obj):
+        # 原 Flask 默认 provider 的参数
+        return json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+    def run(label, encode):
+        body = encode()
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            encode()
+        elapsed = time.perf_counter() - start
+        print(f"{label:<30} {args.rounds / elapsed:10.1f} 次/秒 {len(body) * args.rounds / elapsed / 1e6:10.1f} MB/秒")
+
+    print(f"节点执行数: {args.nodes}, 轮数: {args.rounds}")
+    run('stdlib json（含 to_dict 转换）', lambda: stdlib_dumps(_stdlib_ready(payload)))
+    run('stdlib json（仅编码）', lambda: stdlib_dumps(converted))
+    run('orjson provider', lambda: dumps_bytes(payload))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模式校验基准：编译后的校验闭包单次校验和编译的耗时
+
+在仓库根目录运行：
+    python -m benchmarks.schema_validator --rounds 200000
+"""
+
+import argparse
+import time
+
+from app.utils.schema_validator import compile_schema
+
+def main():
+    parser = argparse.ArgumentParser(description='模式校验基准')
+    parser.add_argument('--rounds', type=int, default=200000, help='校验次数')
+    args = parser.parse_args()
+
+    # init_db 中 http_request 节点类型的输入模式和典型输入
+    schema = {
+        'type': 'object',
+        'properties': {
+            'url': {'type': 'string'},
+            'headers': {'type': 'object'},
+            'data': {'type': 'object'}
+        },
+        'required': ['url']
+    }
+    payload = {'url': 'https://example.com/api', 'headers': {'Accept': 'application/json'}, 'data': {'q': 1}}
+    nested_schema = {
+        'type': 'object',
+        'properties': {
+            'status_code': {'type': 'integer', 'minimum': 100, 'maximum': 599},
+            'items': {'type': 'array', 'items': {'type': 'object', 'properties': {'id': {'type': 'integer'}}}}
+        },
+        'required': ['status_code']
+    }
+    nested_payload = {'status_code': 200, 'items': [{'id': index} for index in range(5)]}
+
+    def run(label, check, value):
+        assert check(value) is None
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            check(value)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<28} {elapsed / args.rounds * 1e9:8.0f} 纳秒/次")
+
+    print(f"校验次数: {args.rounds}")
+    run('http_request 输入', compile_schema(schema), payload)
+    run('嵌套输出（5 个数组元素）', compile_schema(nested_schema), nested_payload)
+    start = time.perf_counter()
+    for _ in range(1000):
+        compile_schema(nested_schema)
+    print(f"{'编译嵌套模式':<28} {(time.perf_counter() - start) / 1000 * 1e6:8.1f} 微秒/次")
+
+if __name__ == '__main__':
+    main()
@@ -15,8 +15,10 @@ class Config:
         'max_overflow': 20
     }
     
-    # 缓存配置 - 使用简单缓存
-    CACHE_TYPE = 'simple'
+    # 缓存配置 - 默认使用进程内缓存，多进程部署设置 CACHE_TYPE=RedisCache 和 CACHE_REDIS_URL 共享缓存和失效
+    CACHE_TYPE = os.environ.get('CACHE_TYPE') or 'simple'
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+    CACHE_KEY_PREFIX = 'vwb:'
     CACHE_DEFAULT_TIMEOUT = 300
     
     # Celery 配置 - 暂时禁用
@@ -26,6 +28,23 @@ class Config:
     # SocketIO 配置
     SOCKETIO_ASYNC_MODE = 'threading'
     
+    # 热度排行检查点间隔(秒)，0表示不启动检查点线程
+    TRENDING_CHECKPOINT_INTERVAL = 60
+    
+    # 行为计数写回间隔(秒)和按用户/会话去重的窗口(秒)，0表示关闭
+    STATS_FLUSH_INTERVAL = 5
+    STATS_DEDUP_WINDOW = 1800
+    
+    # 工作流统计计数接口的缓存时间(秒)，计数不参与详情的 ETag
+    STATS_MAX_AGE = 5
+    
+    # 过期执行统计时间桶的清理间隔(秒)，在计数写回线程中执行，0表示不清理
+    STATS_BUCKET_PURGE_INTERVAL = 3600
+    
+    # 节点输入输出的模式校验：full 每次校验，sampled 按比例抽样，off 不校验
+    NODE_SCHEMA_VALIDATION = os.environ.get('NODE_SCHEMA_VALIDATION') or 'full'
+    NODE_SCHEMA_SAMPLE_RATE = float(os.environ.get('NODE_SCHEMA_SAMPLE_RATE') or 0.1)
+    
     # 通义千问模型配置
     QWEN_BASE_URL = "https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions"
     QWEN_API_KEY = os.environ.get('QWEN_API_KEY') or 'your-qwen-api-key-here'
@@ -51,12 +70,15 @@ class ProductionConfig(Config):
     """生产环境配置"""
     DEBUG = False
     TESTING = False
+    NODE_SCHEMA_VALIDATION = os.environ.get('NODE_SCHEMA_VALIDATION') or 'sampled'
     
 class TestingConfig(Config):
     """测试环境配置"""
     DEBUG = True
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TRENDING_CHECKPOINT_INTERVAL = 0
+    STATS_FLUSH_INTERVAL = 0
     
 config = {
     'development': DevelopmentConfig,
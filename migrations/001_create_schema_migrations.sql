@@ -0,0 +1,8 @@
+-- 描述: 创建迁移版本记录表
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(50) NOT NULL PRIMARY KEY,
+    description VARCHAR(255),
+    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT INTO schema_migrations (version, description) VALUES ('001', '创建迁移版本记录表');
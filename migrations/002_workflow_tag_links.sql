@@ -0,0 +1,44 @@
+-- 描述: 工作流标签规范化为 workflow_tag_links 关联表并回填
+CREATE TABLE IF NOT EXISTS workflow_tag_links (
+    workflow_id BIGINT NOT NULL,
+    tag_id BIGINT NOT NULL,
+    created_at DATETIME,
+    PRIMARY KEY (workflow_id, tag_id),
+    KEY ix_workflow_tag_links_tag (tag_id, workflow_id),
+    CONSTRAINT fk_workflow_tag_links_workflow FOREIGN KEY (workflow_id) REFERENCES workflows (id) ON DELETE CASCADE,
+    CONSTRAINT fk_workflow_tag_links_tag FOREIGN KEY (tag_id) REFERENCES workflow_tags (id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 拆分未删除工作流的逗号分隔标签，补建缺失的标签
+INSERT IGNORE INTO workflow_tags (name, usage_count, created_at)
+WITH RECURSIVE split (workflow_id, tag, rest) AS (
+    SELECT id, CAST('' AS CHAR(500)), CAST(CONCAT(tags, ',') AS CHAR(501))
+    FROM workflows
+    WHERE tags IS NOT NULL AND tags != '' AND status != 'DELETED'
+    UNION ALL
+    SELECT workflow_id, LEFT(TRIM(SUBSTRING_INDEX(rest, ',', 1)), 50), SUBSTRING(rest, LOCATE(',', rest) + 1)
+    FROM split
+    WHERE rest != ''
+)
+SELECT DISTINCT tag, 0, NOW() FROM split WHERE tag != '';
+
+-- 回填关联行
+INSERT IGNORE INTO workflow_tag_links (workflow_id, tag_id, created_at)
+WITH RECURSIVE split (workflow_id, tag, rest) AS (
+    SELECT id, CAST('' AS CHAR(500)), CAST(CONCAT(tags, ',') AS CHAR(501))
+    FROM workflows
+    WHERE tags IS NOT NULL AND tags != '' AND status != 'DELETED'
+    UNION ALL
+    SELECT workflow_id, LEFT(TRIM(SUBSTRING_INDEX(rest, ',', 1)), 50), SUBSTRING(rest, LOCATE(',', rest) + 1)
+    FROM split
+    WHERE rest != ''
+)
+SELECT DISTINCT split.workflow_id, workflow_tags.id, NOW()
+FROM split
+JOIN workflow_tags ON workflow_tags.name = split.tag
+WHERE split.tag != '';
+
+-- 按关联行重算标签使用次数
+UPDATE workflow_tags SET usage_count = (
+    SELECT COUNT(*) FROM workflow_tag_links WHERE workflow_tag_links.tag_id = workflow_tags.id
+);
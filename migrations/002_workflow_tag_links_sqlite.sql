@@ -0,0 +1,45 @@
+-- 描述: 工作流标签规范化为 workflow_tag_links 关联表并回填
+CREATE TABLE IF NOT EXISTS workflow_tag_links (
+    workflow_id INTEGER NOT NULL,
+    tag_id INTEGER NOT NULL,
+    created_at DATETIME,
+    PRIMARY KEY (workflow_id, tag_id),
+    FOREIGN KEY (workflow_id) REFERENCES workflows (id) ON DELETE CASCADE,
+    FOREIGN KEY (tag_id) REFERENCES workflow_tags (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS ix_workflow_tag_links_tag ON workflow_tag_links (tag_id, workflow_id);
+
+-- 拆分未删除工作流的逗号分隔标签，补建缺失的标签
+INSERT OR IGNORE INTO workflow_tags (name, usage_count, created_at)
+WITH RECURSIVE split (workflow_id, tag, rest) AS (
+    SELECT id, '', tags || ','
+    FROM workflows
+    WHERE tags IS NOT NULL AND tags != '' AND status != 'DELETED'
+    UNION ALL
+    SELECT workflow_id, SUBSTR(TRIM(SUBSTR(rest, 1, INSTR(rest, ',') - 1)), 1, 50), SUBSTR(rest, INSTR(rest, ',') + 1)
+    FROM split
+    WHERE rest != ''
+)
+SELECT DISTINCT tag, 0, CURRENT_TIMESTAMP FROM split WHERE tag != '';
+
+-- 回填关联行
+INSERT OR IGNORE INTO workflow_tag_links (workflow_id, tag_id, created_at)
+WITH RECURSIVE split (workflow_id, tag, rest) AS (
+    SELECT id, '', tags || ','
+    FROM workflows
+    WHERE tags IS NOT NULL AND tags != '' AND status != 'DELETED'
+    UNION ALL
+    SELECT workflow_id, SUBSTR(TRIM(SUBSTR(rest, 1, INSTR(rest, ',') - 1)), 1, 50), SUBSTR(rest, INSTR(rest, ',') + 1)
+    FROM split
+    WHERE rest != ''
+)
+SELECT DISTINCT split.workflow_id, workflow_tags.id, CURRENT_TIMESTAMP
+FROM split
+JOIN workflow_tags ON workflow_tags.name = split.tag
+WHERE split.tag != '';
+
+-- 按关联行重算标签使用次数
+UPDATE workflow_tags SET usage_count = (
+    SELECT COUNT(*) FROM workflow_tag_links WHERE workflow_tag_links.tag_id = workflow_tags.id
+);
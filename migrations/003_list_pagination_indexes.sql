@@ -0,0 +1,6 @@
+-- 描述: 为列表游标分页添加 (排序键, id) 复合索引
+CREATE INDEX ix_workflows_created_id ON workflows (created_at, id);
+CREATE INDEX ix_workflows_user_updated_id ON workflows (user_id, updated_at, id);
+CREATE INDEX ix_workflows_listing_created_id ON workflows (status, is_public, created_at, id);
+CREATE INDEX ix_workflow_executions_user_created_id ON workflow_executions (user_id, created_at, id);
+CREATE INDEX ix_workflow_executions_workflow_created_id ON workflow_executions (workflow_id, created_at, id);
@@ -0,0 +1,16 @@
+-- 描述: 工作流图快照表，工作流记录快照ID与物化状态（写时复制的复制品）
+CREATE TABLE IF NOT EXISTS workflow_graph_snapshots (
+    id CHAR(64) NOT NULL,
+    nodes JSON NOT NULL,
+    connections JSON NOT NULL,
+    node_count INT DEFAULT 0,
+    connection_count INT DEFAULT 0,
+    created_at DATETIME,
+    PRIMARY KEY (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 已有工作流的节点和连接都在表中，视为已物化
+ALTER TABLE workflows
+    ADD COLUMN graph_snapshot_id CHAR(64) NULL COMMENT '与当前图内容一致的快照（图修改后清空）',
+    ADD COLUMN graph_materialized TINYINT(1) NOT NULL DEFAULT 1 COMMENT '节点和连接是否已写入 nodes / connections 表',
+    ADD CONSTRAINT fk_workflows_graph_snapshot FOREIGN KEY (graph_snapshot_id) REFERENCES workflow_graph_snapshots (id);
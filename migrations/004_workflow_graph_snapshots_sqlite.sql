@@ -0,0 +1,13 @@
+-- 描述: 工作流图快照表，工作流记录快照ID与物化状态（写时复制的复制品）
+CREATE TABLE IF NOT EXISTS workflow_graph_snapshots (
+    id VARCHAR(64) NOT NULL PRIMARY KEY,
+    nodes JSON NOT NULL,
+    connections JSON NOT NULL,
+    node_count INTEGER DEFAULT 0,
+    connection_count INTEGER DEFAULT 0,
+    created_at DATETIME
+);
+
+-- 已有工作流的节点和连接都在表中，视为已物化
+ALTER TABLE workflows ADD COLUMN graph_snapshot_id VARCHAR(64) REFERENCES workflow_graph_snapshots (id);
+ALTER TABLE workflows ADD COLUMN graph_materialized BOOLEAN NOT NULL DEFAULT 1;
@@ -0,0 +1,6 @@
+-- 描述: 工作流图结构哈希，结构相同的工作流共用执行计划
+-- 已有工作流留空，首次校验或执行时计算
+ALTER TABLE workflows
+    ADD COLUMN graph_hash CHAR(64) NULL COMMENT '图结构哈希（忽略名称、位置和ID）';
+
+CREATE INDEX ix_workflows_graph_hash ON workflows (graph_hash);
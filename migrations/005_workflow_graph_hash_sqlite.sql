@@ -0,0 +1,5 @@
+-- 描述: 工作流图结构哈希，结构相同的工作流共用执行计划
+-- 已有工作流留空，首次校验或执行时计算
+ALTER TABLE workflows ADD COLUMN graph_hash VARCHAR(64);
+
+CREATE INDEX IF NOT EXISTS ix_workflows_graph_hash ON workflows (graph_hash);
@@ -0,0 +1,7 @@
+-- 描述: 工作流模板预编译结果（图快照ID、结构哈希），由模板创建工作流时直接引用快照
+-- 已有模板留空，首次使用时编译
+ALTER TABLE workflow_templates
+    ADD COLUMN graph_snapshot_id CHAR(64) NULL COMMENT '预编译的图快照（模板数据修改后清空）',
+    ADD COLUMN graph_hash CHAR(64) NULL COMMENT '图结构哈希',
+    ADD COLUMN compiled_at DATETIME NULL COMMENT '预编译时间',
+    ADD CONSTRAINT fk_workflow_templates_graph_snapshot FOREIGN KEY (graph_snapshot_id) REFERENCES workflow_graph_snapshots (id);
@@ -0,0 +1,5 @@
+-- 描述: 工作流模板预编译结果（图快照ID、结构哈希），由模板创建工作流时直接引用快照
+-- 已有模板留空，首次使用时编译
+ALTER TABLE workflow_templates ADD COLUMN graph_snapshot_id VARCHAR(64) REFERENCES workflow_graph_snapshots (id);
+ALTER TABLE workflow_templates ADD COLUMN graph_hash VARCHAR(64);
+ALTER TABLE workflow_templates ADD COLUMN compiled_at DATETIME;
@@ -0,0 +1,10 @@
+-- 描述: 节点空间网格列（坐标 / 512 向下取整）及 (workflow_id, grid_x, grid_y) 索引，用于按视口读取节点
+ALTER TABLE nodes
+    ADD COLUMN grid_x INT DEFAULT 0 COMMENT '空间网格列（随X坐标维护）',
+    ADD COLUMN grid_y INT DEFAULT 0 COMMENT '空间网格行（随Y坐标维护）';
+
+UPDATE nodes
+SET grid_x = FLOOR(COALESCE(position_x, 0) / 512),
+    grid_y = FLOOR(COALESCE(position_y, 0) / 512);
+
+CREATE INDEX ix_nodes_workflow_grid ON nodes (workflow_id, grid_x, grid_y);
@@ -0,0 +1,12 @@
+-- 描述: 节点空间网格列（坐标 / 512 向下取整）及 (workflow_id, grid_x, grid_y) 索引，用于按视口读取节点
+ALTER TABLE nodes ADD COLUMN grid_x INTEGER DEFAULT 0;
+ALTER TABLE nodes ADD COLUMN grid_y INTEGER DEFAULT 0;
+
+-- SQLite 没有 FLOOR：CAST 向零取整，负数且有小数部分时再减一
+UPDATE nodes
+SET grid_x = CAST(COALESCE(position_x, 0) / 512.0 AS INTEGER)
+        - (COALESCE(position_x, 0) / 512.0 < CAST(COALESCE(position_x, 0) / 512.0 AS INTEGER)),
+    grid_y = CAST(COALESCE(position_y, 0) / 512.0 AS INTEGER)
+        - (COALESCE(position_y, 0) / 512.0 < CAST(COALESCE(position_y, 0) / 512.0 AS INTEGER));
+
+CREATE INDEX IF NOT EXISTS ix_nodes_workflow_grid ON nodes (workflow_id, grid_x, grid_y);
@@ -0,0 +1,21 @@
+-- 描述: 工作流统计增量维护所需的列（成功次数、执行时长分位数及草图、分享次数、计入平均执行时间的执行次数），workflow_id 唯一索引
+-- 成功次数按已有的成功率和执行次数回填；已有的平均执行时间按全部执行次数计入滑动平均；
+-- 分位数留空，之后的执行逐条累加
+ALTER TABLE workflow_stats
+    ADD COLUMN success_count INT DEFAULT 0 COMMENT '成功次数',
+    ADD COLUMN duration_p50 DOUBLE NULL COMMENT '执行时长P50(秒)',
+    ADD COLUMN duration_p95 DOUBLE NULL COMMENT '执行时长P95(秒)',
+    ADD COLUMN duration_p99 DOUBLE NULL COMMENT '执行时长P99(秒)',
+    ADD COLUMN duration_sketch JSON NULL COMMENT '执行时长分位数草图',
+    ADD COLUMN share_count INT DEFAULT 0 COMMENT '分享次数',
+    ADD COLUMN timed_execution_count INT DEFAULT 0 COMMENT '计入平均执行时间的执行次数';
+
+UPDATE workflow_stats
+SET success_count = ROUND(COALESCE(success_rate, 0) / 100 * COALESCE(execution_count, 0)),
+    timed_execution_count = COALESCE(execution_count, 0);
+
+-- 每个工作流只保留最新的一行统计，再建唯一索引
+DELETE FROM workflow_stats
+WHERE id NOT IN (SELECT id FROM (SELECT MAX(id) AS id FROM workflow_stats GROUP BY workflow_id) AS latest);
+
+CREATE UNIQUE INDEX ix_workflow_stats_workflow_id ON workflow_stats (workflow_id);
@@ -0,0 +1,20 @@
+-- 描述: 工作流统计增量维护所需的列（成功次数、执行时长分位数及草图、分享次数、计入平均执行时间的执行次数），workflow_id 唯一索引
+-- 成功次数按已有的成功率和执行次数回填；已有的平均执行时间按全部执行次数计入滑动平均；
+-- 分位数留空，之后的执行逐条累加
+ALTER TABLE workflow_stats ADD COLUMN success_count INTEGER DEFAULT 0;
+ALTER TABLE workflow_stats ADD COLUMN duration_p50 FLOAT;
+ALTER TABLE workflow_stats ADD COLUMN duration_p95 FLOAT;
+ALTER TABLE workflow_stats ADD COLUMN duration_p99 FLOAT;
+ALTER TABLE workflow_stats ADD COLUMN duration_sketch JSON;
+ALTER TABLE workflow_stats ADD COLUMN share_count INTEGER DEFAULT 0;
+ALTER TABLE workflow_stats ADD COLUMN timed_execution_count INTEGER DEFAULT 0;
+
+UPDATE workflow_stats
+SET success_count = CAST(ROUND(COALESCE(success_rate, 0) / 100 * COALESCE(execution_count, 0)) AS INTEGER),
+    timed_execution_count = COALESCE(execution_count, 0);
+
+-- 每个工作流只保留最新的一行统计，再建唯一索引
+DELETE FROM workflow_stats
+WHERE id NOT IN (SELECT MAX(id) FROM workflow_stats GROUP BY workflow_id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_workflow_stats_workflow_id ON workflow_stats (workflow_id);
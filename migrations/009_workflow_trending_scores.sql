@@ -0,0 +1,13 @@
+-- 描述: 热度排行检查点表，各进程定期把热度增量合并进表，启动时从表恢复
+-- 表为空时由第一个启动的进程按 workflow_stats 的累计数据冷启动写入
+CREATE TABLE IF NOT EXISTS workflow_trending_scores (
+    id BIGINT NOT NULL AUTO_INCREMENT,
+    workflow_id BIGINT NOT NULL COMMENT '工作流ID',
+    category ENUM('DATA_PROCESSING', 'API_INTEGRATION', 'AUTOMATION', 'AI_ML', 'NOTIFICATION', 'FILE_PROCESSING',
+                  'DATABASE', 'WEB_SCRAPING', 'BUSINESS_LOGIC', 'OTHER') NULL COMMENT '工作流分类',
+    time_range VARCHAR(10) NOT NULL COMMENT '时间范围',
+    score DOUBLE NOT NULL DEFAULT 0 COMMENT '检查点时刻的衰减分数',
+    checkpoint_at DATETIME NOT NULL COMMENT '检查点时间',
+    PRIMARY KEY (id),
+    CONSTRAINT uq_trending_workflow_range UNIQUE (workflow_id, time_range)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
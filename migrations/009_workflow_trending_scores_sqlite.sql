@@ -0,0 +1,11 @@
+-- 描述: 热度排行检查点表，各进程定期把热度增量合并进表，启动时从表恢复
+-- 表为空时由第一个启动的进程按 workflow_stats 的累计数据冷启动写入
+CREATE TABLE IF NOT EXISTS workflow_trending_scores (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    workflow_id BIGINT NOT NULL,
+    category VARCHAR(15),
+    time_range VARCHAR(10) NOT NULL,
+    score FLOAT NOT NULL DEFAULT 0,
+    checkpoint_at DATETIME NOT NULL,
+    CONSTRAINT uq_trending_workflow_range UNIQUE (workflow_id, time_range)
+);
@@ -0,0 +1,10 @@
+-- 描述: 工作流广场物化计数器表
+-- 计数器由应用启动时按业务表初始化（表为空时），之后随创建、发布、复制、删除增减
+CREATE TABLE IF NOT EXISTS marketplace_counters (
+    id BIGINT NOT NULL AUTO_INCREMENT,
+    name VARCHAR(100) NOT NULL COMMENT '计数器名称',
+    value BIGINT NOT NULL DEFAULT 0 COMMENT '计数值',
+    updated_at DATETIME NULL COMMENT '更新时间',
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_marketplace_counters_name (name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,8 @@
+-- 描述: 工作流广场物化计数器表
+-- 计数器由应用启动时按业务表初始化（表为空时），之后随创建、发布、复制、删除增减
+CREATE TABLE IF NOT EXISTS marketplace_counters (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(100) NOT NULL UNIQUE,
+    value BIGINT NOT NULL DEFAULT 0,
+    updated_at DATETIME
+);
@@ -0,0 +1,18 @@
+-- 描述: 执行统计时间桶表（按用户/工作流、分钟/小时/天汇总执行次数与时长）
+-- 时间桶由应用启动时按历史执行记录重建（表为空时），过期的细粒度桶由写回线程定期清理
+CREATE TABLE IF NOT EXISTS execution_stats_buckets (
+    id BIGINT NOT NULL AUTO_INCREMENT,
+    scope ENUM('USER', 'WORKFLOW') NOT NULL COMMENT '统计维度',
+    scope_id BIGINT NOT NULL COMMENT '用户ID或工作流ID',
+    granularity ENUM('MINUTE', 'HOUR', 'DAY') NOT NULL COMMENT '时间粒度',
+    bucket_start DATETIME NOT NULL COMMENT '时间桶起点',
+    status ENUM('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', 'CANCELLED', 'TIMEOUT') NOT NULL COMMENT '执行状态',
+    execution_count INT DEFAULT 0 COMMENT '执行次数',
+    duration_sum DOUBLE DEFAULT 0 COMMENT '执行时长总和(秒)',
+    duration_max DOUBLE DEFAULT 0 COMMENT '最长执行时长(秒)',
+    duration_histogram JSON NULL COMMENT '执行时长直方图',
+    updated_at DATETIME NULL COMMENT '更新时间',
+    PRIMARY KEY (id),
+    CONSTRAINT uq_execution_stats_bucket UNIQUE (scope, scope_id, granularity, bucket_start, status),
+    KEY ix_execution_stats_lookup (scope, scope_id, granularity, bucket_start)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
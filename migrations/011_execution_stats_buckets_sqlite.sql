@@ -0,0 +1,18 @@
+-- 描述: 执行统计时间桶表（按用户/工作流、分钟/小时/天汇总执行次数与时长）
+-- 时间桶由应用启动时按历史执行记录重建（表为空时），过期的细粒度桶由写回线程定期清理
+CREATE TABLE IF NOT EXISTS execution_stats_buckets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scope VARCHAR(8) NOT NULL,
+    scope_id BIGINT NOT NULL,
+    granularity VARCHAR(6) NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    status VARCHAR(9) NOT NULL,
+    execution_count INTEGER DEFAULT 0,
+    duration_sum FLOAT DEFAULT 0,
+    duration_max FLOAT DEFAULT 0,
+    duration_histogram JSON,
+    updated_at DATETIME,
+    CONSTRAINT uq_execution_stats_bucket UNIQUE (scope, scope_id, granularity, bucket_start, status)
+);
+
+CREATE INDEX IF NOT EXISTS ix_execution_stats_lookup ON execution_stats_buckets (scope, scope_id, granularity, bucket_start);
@@ -0,0 +1,10 @@
+-- 描述: 工作流全文检索文档表，FULLTEXT 索引使用 ngram 解析器以支持中文检索
+-- 表为空时由应用启动时按现有工作流回填
+CREATE TABLE IF NOT EXISTS workflow_search_documents (
+    workflow_id BIGINT NOT NULL COMMENT '工作流ID',
+    name VARCHAR(200) NOT NULL DEFAULT '' COMMENT '工作流名称',
+    description TEXT COMMENT '工作流描述',
+    tags VARCHAR(500) NOT NULL DEFAULT '' COMMENT '以空格分隔的标签',
+    PRIMARY KEY (workflow_id),
+    FULLTEXT KEY ft_workflow_search (name, description, tags) WITH PARSER ngram
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,3 @@
+-- 描述: 工作流全文检索 FTS5 虚拟表，rowid 即工作流ID，中文在写入前切成单字和二元组
+-- 表为空时由应用启动时按现有工作流回填
+CREATE VIRTUAL TABLE IF NOT EXISTS workflow_search_fts USING fts5(name, description, tags, tokenize='unicode61');
@@ -0,0 +1,4 @@
+-- 描述: 执行记录保存本次执行渲染后的全局变量（{{input.*}} 已替换为执行输入）
+-- 已有执行记录留空
+ALTER TABLE workflow_executions
+    ADD COLUMN variables JSON NULL COMMENT '本次执行的全局变量（已渲染）';
@@ -0,0 +1,10 @@
+-- 描述: 工作流点赞表，每个用户对每个工作流最多点赞一次（主键保证幂等）
+-- 已有的 like_count 保持不变，历史点赞没有逐用户记录，不回填
+CREATE TABLE IF NOT EXISTS workflow_likes (
+    workflow_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    created_at DATETIME,
+    PRIMARY KEY (workflow_id, user_id),
+    FOREIGN KEY (workflow_id) REFERENCES workflows (id) ON DELETE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
@@ -0,0 +1,2 @@
+-- 描述: 热度检查点表按 (时间范围, 分类, 分数) 建索引，检查点只读取各排行榜分数最高的行
+CREATE INDEX IF NOT EXISTS ix_trending_scores_rank ON workflow_trending_scores (time_range, category, score);
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试夹具
+
+只注册工作流蓝图，使用 SQLite 内存数据库；请求头 X-User 作为当前用户ID。
+"""
+
+import pytest
+from flask import Flask, g, request
+from sqlalchemy import BigInteger, event
+from sqlalchemy.ext.compiler import compiles
+
+from config import TestingConfig
+from app.database import db, init_db
+from app.utils.response_cache import init_cache
+from app.utils.json_provider import init_json_provider
+
+class Config(TestingConfig):
+    """测试配置：内存数据库不使用连接池参数，不启动后台线程"""
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    CACHE_TYPE = 'SimpleCache'
+    STATS_FLUSH_INTERVAL = 0
+    TRENDING_CHECKPOINT_INTERVAL = 0
+
+@compiles(BigInteger, 'sqlite')
+def _sqlite_big_integer(type_, compiler, **kw):
+    # SQLite 只有 INTEGER PRIMARY KEY 会自动递增
+    return 'INTEGER'
+
+def _enable_savepoints(engine):
+    """pysqlite 默认自行管理事务，begin_nested 需要由 SQLAlchemy 显式 BEGIN"""
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def on_begin(connection):
+        connection.exec_driver_sql('BEGIN')
+
+@pytest.fixture
+def app():
+    app = Flask('app')
+    app.config.from_object(Config)
+    init_json_provider(app)
+    init_db(app)
+    init_cache(app)
+
+    from app.models import user, workflow  # noqa: F401 注册模型
+    from app.api.workflow_routes import workflow_bp
+    app.register_blueprint(workflow_bp, url_prefix='/api/workflows')
+
+    @app.before_request
+    def load_user():
+        # 测试期间应用上下文一直存在，g 在请求之间共享，需要清除上一个请求的用户
+        user_id = request.headers.get('X-User')
+        if user_id:
+            g.user_id = int(user_id)
+        else:
+            g.pop('user_id', None)
+
+    with app.app_context():
+        _enable_savepoints(db.engine)
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def session(app):
+    return db.session
+
+def _create_user(session, username):
+    from app.models.user import User
+    user = User(username=username, email=f'{username}@example.com', password_hash='x')
+    session.add(user)
+    session.commit()
+    return user.id
+
+@pytest.fixture
+def user_id(session):
+    return _create_user(session, 'owner')
+
+@pytest.fixture
+def other_user_id(session):
+    return _create_user(session, 'other')
+
+@pytest.fixture
+def workflow_service(session):
+    from app.services.workflow_service import WorkflowService
+    return WorkflowService(session)
+
+@pytest.fixture(autouse=True)
+def stats_buffer(monkeypatch):
+    """每个测试使用新的计数缓冲（缓冲的增量和去重状态是进程级的）"""
+    from app.services import workflow_service
+    from app.services.stats_buffer_service import StatsCounterBuffer, TemplateUsageBuffer
+    buffer = StatsCounterBuffer()
+    monkeypatch.setattr(workflow_service, 'stats_buffer', buffer)
+    monkeypatch.setattr(workflow_service, 'template_usage_buffer', TemplateUsageBuffer())
+    return buffer
+
+@pytest.fixture(autouse=True)
+def trending_index(monkeypatch):
+    """每个测试使用新的热度索引（索引是进程级的）"""
+    from app.services import workflow_service
+    from app.services.trending_service import TrendingIndex
+    index = TrendingIndex()
+    monkeypatch.setattr(workflow_service, 'trending_index', index)
+    return index
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流详情的查询数：与节点和连接的数量无关
+
+前两个测试统计服务层 get_workflow_detail 的查询；接口测试另外计入路由层
+计算 ETag 的查询。
+"""
+
+import pytest
+from sqlalchemy import event
+
+from app.database import db
+
+@pytest.fixture
+def statements(app):
+    """记录执行的 SQL 语句"""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+@pytest.fixture
+def workflow_id(workflow_service, user_id):
+    """已发布的 50 个节点的链式工作流"""
+    result = workflow_service.create_workflow({
+        'name': 'chain',
+        'nodes': [{'id': f'n{index}', 'node_type': 'http'} for index in range(50)],
+        'connections': [{'source': f'n{index}', 'target': f'n{index + 1}'} for index in range(49)]
+    }, user_id)
+    workflow_service.publish_workflow(result['id'], user_id)
+    return result['id']
+
+def test_detail_loads_in_three_queries(session, workflow_service, workflow_id, statements):
+    session.expunge_all()
+    statements.clear()
+
+    detail = workflow_service.get_workflow_detail(workflow_id, None, 'viewer')
+
+    assert len(detail['nodes']) == 50
+    assert len(detail['connections']) == 49
+    assert detail['stats'] is not None
+    # 工作流连同统计行、全部节点、全部连接
+    assert len(statements) == 3
+
+def test_unmaterialized_fork_reads_snapshot(session, workflow_service, workflow_id, user_id, statements):
+    fork_id = workflow_service.fork_workflow(workflow_id, user_id)['id']
+    session.expunge_all()
+    statements.clear()
+
+    detail = workflow_service.get_workflow_detail(fork_id, user_id)
+
+    assert len(detail['nodes']) == 50
+    # 工作流连同统计行、图快照
+    assert len(statements) == 2
+
+def test_detail_endpoint_statement_counts(client, session, workflow_id, statements):
+    url = f'/api/workflows/{workflow_id}'
+    session.expunge_all()
+    statements.clear()
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert len(response.get_json()['data']['nodes']) == 50
+    # ETag 一条，响应缓存未命中时加载详情三条
+    assert len(statements) == 4
+
+    statements.clear()
+    assert client.get(url).status_code == 200
+    # 响应缓存命中：ETag 和统计各一条
+    assert len(statements) == 2
+
+    statements.clear()
+    assert client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    # 客户端缓存有效：只计算 ETag
+    assert len(statements) == 1
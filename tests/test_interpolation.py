@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+{{变量}} 模板的编译与渲染
+"""
+
+import pytest
+
+from app.utils.interpolation import (
+    LITERAL, REFERENCE, TEXT, compile_template, is_static, make_context, render
+)
+
+CONTEXT = make_context(
+    variables={'name': '小明', 'enabled': True},
+    input_data={'query': 'flask', 'ids': [3, 5]},
+    node_outputs={'检索': {'output': {'items': [{'title': '第一条'}, {'title': '第二条'}]}}}
+)
+
+class TestStaticConfig:
+    @pytest.mark.parametrize('config', [
+        {'url': 'https://example.com', 'retries': 3, 'headers': {'Accept': 'application/json'}},
+        ['a', 1, None, {'b': [True]}],
+        'plain text',
+        42,
+        None
+    ])
+    def test_compiles_to_literal(self, config):
+        compiled = compile_template(config)
+
+        assert compiled[0] == LITERAL
+        assert is_static(compiled)
+        assert render(compiled, CONTEXT) is config
+
+    def test_static_subtree_is_returned_as_is(self):
+        headers = {'Accept': 'application/json'}
+        rendered = render(compile_template({'q': '{{input.query}}', 'headers': headers}), CONTEXT)
+
+        assert rendered == {'q': 'flask', 'headers': headers}
+        assert rendered['headers'] is headers
+
+class TestReferences:
+    def test_whole_placeholder_keeps_type(self):
+        compiled = compile_template('{{ input.ids }}')
+
+        assert compiled[0] == REFERENCE
+        assert render(compiled, CONTEXT) == [3, 5]
+
+    def test_default_namespace_is_vars(self):
+        assert render(compile_template('{{name}}'), CONTEXT) == '小明'
+
+    def test_text_concatenates_values(self):
+        compiled = compile_template('你好，{{vars.name}}，开关 {{enabled}}，ID {{input.ids}}')
+
+        assert compiled[0] == TEXT
+        assert render(compiled, CONTEXT) == '你好，小明，开关 true，ID [3,5]'
+
+    @pytest.mark.parametrize('template', [
+        '{{nodes.检索.output.items[1].title}}',
+        '{{nodes.检索.output.items.1.title}}'
+    ])
+    def test_list_indexes(self, template):
+        assert render(compile_template(template), CONTEXT) == '第二条'
+
+    def test_nested_containers(self):
+        compiled = compile_template({'params': [{'q': '{{input.query}}'}, 'fixed'], 'limit': 10})
+
+        assert not is_static(compiled)
+        assert render(compiled, CONTEXT) == {'params': [{'q': 'flask'}, 'fixed'], 'limit': 10}
+
+class TestMissingValues:
+    @pytest.mark.parametrize('template', [
+        '{{vars.missing}}',
+        '{{input.query.deeper}}',
+        '{{nodes.检索.output.items[9].title}}',
+        '{{nodes.检索.output.items.first}}',
+        '{{nodes.不存在.output}}'
+    ])
+    def test_reference_resolves_to_none(self, template):
+        assert render(compile_template(template), CONTEXT) is None
+
+    def test_text_renders_empty_string(self):
+        assert render(compile_template('[{{vars.missing}}]'), CONTEXT) == '[]'
+
+class TestMalformedPlaceholders:
+    @pytest.mark.parametrize('template', ['{{vars.name', 'a {{ b', '{{}}', '{{vars..name}}', '{name}'])
+    def test_kept_as_literal(self, template):
+        compiled = compile_template(template)
+
+        assert compiled == (LITERAL, template)
+
+    def test_unclosed_after_valid_placeholder(self):
+        assert render(compile_template('{{name}} 和 {{input.query'), CONTEXT) == '小明 和 {{input.query'
+
+    def test_invalid_placeholder_between_valid_ones(self):
+        compiled = compile_template('{{name}}{{a..b}}{{input.query}}')
+
+        assert compiled == (TEXT, (('vars', 'name'), '{{a..b}}', ('input', 'query')))
+        assert render(compiled, CONTEXT) == '小明{{a..b}}flask'
+
+def test_execution_records_rendered_variables(workflow_service, user_id):
+    workflow_id = workflow_service.create_workflow({
+        'name': 'greet',
+        'global_variables': {'greeting': '你好，{{input.name}}', 'limit': 10, 'ids': '{{input.ids}}'},
+        'nodes': [{'id': 'start', 'node_type': 'http'}]
+    }, user_id)['id']
+
+    execution = workflow_service.execute_workflow(workflow_id, user_id, {'input_data': {'name': '小红', 'ids': [1]}})
+
+    assert execution['variables'] == {'greeting': '你好，小红', 'limit': 10, 'ids': [1]}
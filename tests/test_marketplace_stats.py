@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流广场统计计数器
+"""
+
+from sqlalchemy import event, update
+
+from app.database import db
+from app.models.marketplace import MarketplaceCounter
+from app.models.workflow import Workflow, WorkflowCategory, WorkflowStatus
+from app.services.marketplace_stats_service import MarketplaceStatsService
+
+def counters(session):
+    """非零的计数器"""
+    return dict(session.query(MarketplaceCounter.name, MarketplaceCounter.value)
+                .filter(MarketplaceCounter.value != 0).all())
+
+def test_rebuild_merges_null_category_into_other(session, user_id):
+    session.add_all([
+        Workflow(name=name, user_id=user_id, category=category, status=WorkflowStatus.PUBLISHED, is_public=True)
+        for name, category in (('a', WorkflowCategory.OTHER), ('b', WorkflowCategory.OTHER), ('c', WorkflowCategory.AI_ML))
+    ])
+    session.flush()
+    # 早期数据的分类为空（模型默认值只在新建时生效）
+    session.execute(update(Workflow).where(Workflow.name == 'a').values(category=None))
+    session.commit()
+
+    values = MarketplaceStatsService(session).rebuild()
+    session.commit()
+
+    assert values['category:other'] == 2
+    assert values['category:ai_ml'] == 1
+    assert values['workflows.published'] == 3
+
+def test_rebuild_matches_incremental_counters(session, workflow_service, user_id, other_user_id):
+    for owner, category in ((user_id, 'other'), (user_id, 'other'), (other_user_id, 'ai_ml')):
+        workflow_id = workflow_service.create_workflow({
+            'name': 'w', 'category': category, 'is_public': True,
+            'nodes': [{'id': 'start', 'node_type': 'http'}]
+        }, owner)['id']
+        workflow_service.publish_workflow(workflow_id, owner)
+    incremental = counters(session)
+
+    MarketplaceStatsService(session).rebuild()
+    session.commit()
+
+    assert counters(session) == incremental
+
+def test_creating_draft_does_not_touch_counters(app, workflow_service, user_id):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        workflow_service.create_workflow({'name': 'draft'}, user_id)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert not [statement for statement in statements if 'marketplace_counters' in statement]
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流列表的游标分页
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.workflow import Workflow, WorkflowStatus
+
+WORKFLOW_COUNT = 25
+
+@pytest.fixture
+def workflows(session, user_id):
+    """已发布的公开工作流，每三个共用同一创建时间，分页需要按ID区分"""
+    base = datetime(2026, 1, 1)
+    session.add_all([
+        Workflow(
+            name=f'w{index:02d}', user_id=user_id, status=WorkflowStatus.PUBLISHED, is_public=True,
+            created_at=base + timedelta(minutes=index // 3), updated_at=base, published_at=base
+        )
+        for index in range(WORKFLOW_COUNT)
+    ])
+    session.commit()
+
+def fetch(client, url, user_id, **params):
+    response = client.get(url, headers={'X-User': str(user_id)}, query_string=params)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['data']
+
+def walk(client, url, user_id, **params):
+    """沿 next_cursor 翻完全部页，返回 (ID列表, 页数)"""
+    ids, pages, cursor = [], 0, None
+    while True:
+        data = fetch(client, url, user_id, size=10, **params, **({'cursor': cursor} if cursor else {}))
+        ids += [item['id'] for item in data['items']]
+        pages += 1
+        cursor = data['next_cursor']
+        if not cursor:
+            return ids, pages
+
+@pytest.mark.parametrize('url, params', [
+    ('/api/workflows/my', {}),
+    ('/api/workflows', {}),
+    ('/api/workflows', {'sort_by': 'name', 'order': 'asc'})
+])
+def test_cursor_walk_matches_single_page(client, user_id, workflows, url, params):
+    expected = [item['id'] for item in fetch(client, url, user_id, size=100, **params)['items']]
+
+    ids, pages = walk(client, url, user_id, **params)
+
+    assert len(expected) == WORKFLOW_COUNT
+    assert ids == expected
+    assert pages == 3
+
+def test_cursor_continues_page_number_listing(client, user_id, workflows):
+    second = fetch(client, '/api/workflows/my', user_id, page=2, size=10)
+    third = fetch(client, '/api/workflows/my', user_id, page=3, size=10)
+
+    continued = fetch(client, '/api/workflows/my', user_id, size=10, cursor=second['next_cursor'])
+
+    assert [item['id'] for item in continued['items']] == [item['id'] for item in third['items']]
+
+def test_rejects_malformed_cursor(client, workflows):
+    response = client.get('/api/workflows', query_string={'cursor': 'not-a-cursor'})
+
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+def test_rejects_cursor_of_other_sort(client, user_id, workflows):
+    cursor = fetch(client, '/api/workflows', user_id, size=10)['next_cursor']
+
+    # 按创建时间排序得到的游标不能用于按名称排序
+    response = client.get('/api/workflows', query_string={'sort_by': 'name', 'cursor': cursor})
+
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON Schema 编译后的校验闭包，以及按节点类型版本缓存的校验
+"""
+
+import pytest
+
+from app.services.node_schema_service import NodeSchemaRegistry
+from app.utils.schema_validator import SchemaError, SchemaValidationError, compile_schema
+
+def errors(schema, value):
+    """校验结果：通过时为 None，否则为 (路径, 错误信息)"""
+    check = compile_schema(schema)
+    return None if check is None else check(value)
+
+class TestType:
+    @pytest.mark.parametrize('schema, value', [
+        ({'type': 'integer'}, 3),
+        ({'type': 'integer'}, 1.0),
+        ({'type': 'integer'}, -0.0),
+        ({'type': 'number'}, 1.5),
+        ({'type': 'number'}, 2),
+        ({'type': 'string'}, ''),
+        ({'type': 'boolean'}, False),
+        ({'type': 'null'}, None),
+        ({'type': 'array'}, []),
+        ({'type': 'object'}, {}),
+        ({'type': ['integer', 'string']}, 'x'),
+        ({'type': ['integer', 'number']}, 1.5)
+    ])
+    def test_accepts(self, schema, value):
+        assert errors(schema, value) is None
+
+    @pytest.mark.parametrize('schema, value', [
+        ({'type': 'integer'}, 1.5),
+        ({'type': 'integer'}, float('inf')),
+        ({'type': 'integer'}, True),
+        ({'type': 'integer'}, '1'),
+        ({'type': 'number'}, False),
+        ({'type': 'string'}, None),
+        ({'type': ['integer', 'string']}, 2.5),
+        ({'type': 'object'}, [])
+    ])
+    def test_rejects(self, schema, value):
+        path, message = errors(schema, value)
+
+        assert path == ()
+        assert message.startswith('类型应为')
+
+    def test_integral_float_in_properties_and_items(self):
+        schema = {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer'},
+                'ids': {'type': 'array', 'items': {'type': 'integer'}}
+            }
+        }
+
+        assert errors(schema, {'count': 2.0, 'ids': [1, 2.0]}) is None
+        assert errors(schema, {'count': 2.5})[0] == ('count',)
+        assert errors(schema, {'ids': [1, 2.5]})[0] == ('ids', 1)
+
+    def test_unconstrained_schema_compiles_to_none(self):
+        assert compile_schema({'title': '任意值', 'description': '只有注解'}) is None
+
+    @pytest.mark.parametrize('schema', [{'type': 'decimal'}, {'type': []}, {'$ref': '#/x'}, {'pattern': '('}, 'object'])
+    def test_invalid_schema(self, schema):
+        with pytest.raises(SchemaError):
+            compile_schema(schema)
+
+class TestObject:
+    SCHEMA = {
+        'type': 'object',
+        'properties': {'url': {'type': 'string'}, 'timeout': {'type': 'number', 'minimum': 0}},
+        'required': ['url', 'timeout'],
+        'additionalProperties': False
+    }
+
+    def test_valid(self):
+        assert errors(self.SCHEMA, {'url': 'https://example.com', 'timeout': 5}) is None
+
+    def test_missing_required(self):
+        assert errors(self.SCHEMA, {'url': 'x'}) == (('timeout',), '缺少必填字段')
+
+    def test_property_constraint(self):
+        assert errors(self.SCHEMA, {'url': 'x', 'timeout': -1}) == (('timeout',), '不能小于 0')
+
+    def test_additional_property(self):
+        assert errors(self.SCHEMA, {'url': 'x', 'timeout': 1, 'extra': 1}) == (('extra',), '不允许的字段')
+
+    def test_additional_properties_schema(self):
+        schema = {'type': 'object', 'additionalProperties': {'type': 'string'}}
+
+        assert errors(schema, {'a': 'x'}) is None
+        assert errors(schema, {'a': 1}) == (('a',), '类型应为 string')
+
+class TestEnum:
+    def test_matches_option(self):
+        assert errors({'enum': ['GET', 'POST', 1]}, 'POST') is None
+        assert errors({'const': 1}, 1.0) is None
+
+    def test_rejects_other_values(self):
+        assert errors({'enum': ['GET', 'POST']}, 'PUT') == ((), "取值应为 ['GET', 'POST'] 之一")
+
+    def test_boolean_is_not_number(self):
+        assert errors({'enum': [1, 0]}, True) is not None
+        assert errors({'enum': [True]}, 1) is not None
+
+class TestCombinators:
+    def test_any_of(self):
+        schema = {'anyOf': [{'type': 'string', 'maxLength': 3}, {'type': 'integer'}]}
+
+        assert errors(schema, 'abc') is None
+        assert errors(schema, 7) is None
+        assert errors(schema, 'abcd') == ((), '不符合 anyOf 中的任何模式')
+
+    def test_one_of(self):
+        schema = {'oneOf': [{'type': 'number'}, {'type': 'integer'}]}
+
+        assert errors(schema, 1.5) is None
+        assert errors(schema, 2) == ((), '应恰好符合 oneOf 中的一个模式（符合 2 个）')
+
+    def test_all_of_and_not(self):
+        schema = {'allOf': [{'type': 'string'}, {'minLength': 2}], 'not': {'const': 'no'}}
+
+        assert errors(schema, 'yes') is None
+        assert errors(schema, 'y') == ((), '长度不能小于 2')
+        assert errors(schema, 'no') == ((), '不应符合 not 模式')
+
+class TestArray:
+    SCHEMA = {'type': 'array', 'items': {'type': 'object', 'required': ['id']}, 'minItems': 1, 'maxItems': 3}
+
+    def test_valid(self):
+        assert errors(self.SCHEMA, [{'id': 1}, {'id': 2}]) is None
+
+    def test_item_error_path(self):
+        assert errors(self.SCHEMA, [{'id': 1}, {}]) == ((1, 'id'), '缺少必填字段')
+
+    def test_item_type(self):
+        assert errors(self.SCHEMA, [{'id': 1}, 'x']) == ((1,), '类型应为 object')
+
+    def test_length_limits(self):
+        assert errors(self.SCHEMA, []) == ((), '元素个数不能少于 1')
+        assert errors(self.SCHEMA, [{'id': index} for index in range(4)]) == ((), '元素个数不能多于 3')
+
+class TestPattern:
+    def test_search_semantics(self):
+        # JSON Schema 的 pattern 不隐含锚定
+        assert errors({'type': 'string', 'pattern': r'\d{3}'}, 'abc123') is None
+        assert errors({'type': 'string', 'pattern': r'^\d{3}$'}, 'abc123') == ((), r'不匹配 ^\d{3}$')
+
+    def test_ignores_non_strings(self):
+        assert errors({'pattern': '^a'}, 5) is None
+
+class TestNodeSchemaRegistry:
+    INPUT_SCHEMA = {'type': 'object', 'required': ['url']}
+
+    def node_type(self, version, schema=None):
+        return {'name': 'http', 'version': version, 'updated_at': None,
+                'input_schema': schema or self.INPUT_SCHEMA, 'output_schema': None}
+
+    def test_node_schema_overrides_type_schema(self):
+        registry = NodeSchemaRegistry()
+        node = {'input_schema': {'type': 'object', 'required': ['query']}, 'output_schema': None}
+
+        validators = registry.node_validators(node, self.node_type('1.0'))
+
+        validators.validate_input({'query': 'x'})
+        with pytest.raises(SchemaValidationError, match='输入.query: 缺少必填字段'):
+            validators.validate_input({'url': 'x'})
+
+    def test_type_schema_is_used_without_node_schema(self):
+        validators = NodeSchemaRegistry().node_validators({}, self.node_type('1.0'))
+
+        with pytest.raises(SchemaValidationError, match='输入.url'):
+            validators.validate_input({})
+        validators.validate_output(None)
+
+    def test_type_recompiles_when_version_changes(self):
+        registry = NodeSchemaRegistry()
+        first = registry.type_validators(self.node_type('1.0'))
+
+        assert registry.type_validators(self.node_type('1.0')) is first
+        changed = registry.type_validators(self.node_type('1.1', {'type': 'object', 'required': ['method']}))
+        assert changed is not first
+        assert changed[0]({'url': 'x'}) == (('method',), '缺少必填字段')
+
+    def test_validation_off(self):
+        registry = NodeSchemaRegistry()
+        registry.configure('off')
+
+        registry.node_validators({}, self.node_type('1.0')).validate_input({})
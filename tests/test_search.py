@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流全文检索：索引表由迁移 012 创建，按 bm25 相关度排序
+"""
+
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+from app.services.search_service import SqliteFtsBackend, get_search_backend, init_search_index
+
+MIGRATION = Path(__file__).resolve().parent.parent / 'migrations' / '012_workflow_search_index_sqlite.sql'
+
+def apply_migration(session, path):
+    """执行迁移文件中的语句（与迁移管理器一样按分号分句，跳过注释行）"""
+    lines = [line for line in path.read_text(encoding='utf-8').splitlines() if not line.startswith('--')]
+    for statement in '\n'.join(lines).split(';'):
+        if statement.strip():
+            session.execute(text(statement))
+    session.commit()
+
+@pytest.fixture
+def fts(app, session):
+    """在第一次使用检索后端之前建好 FTS5 表"""
+    apply_migration(session, MIGRATION)
+    return get_search_backend(session)
+
+@pytest.fixture
+def workflows(fts, workflow_service, user_id):
+    """已发布的公开工作流，按名称返回ID"""
+    specs = [
+        {'name': '销售报表', 'description': '每日汇总数据清洗后的结果'},
+        {'name': '数据清洗流程', 'description': '去重并校验字段'},
+        {'name': 'Workflow automation', 'tags': ['ops']},
+        {'name': '通知推送', 'tags': ['数据']},
+        {'name': '草稿数据清洗', 'publish': False}
+    ]
+    ids = {}
+    for spec in specs:
+        publish = spec.pop('publish', True)
+        workflow_id = workflow_service.create_workflow({
+            **spec, 'is_public': True, 'nodes': [{'id': 'start', 'node_type': 'http'}]
+        }, user_id)['id']
+        if publish:
+            workflow_service.publish_workflow(workflow_id, user_id)
+        ids[spec['name']] = workflow_id
+    return ids
+
+def search(client, **params):
+    response = client.get('/api/workflows', query_string=params)
+    assert response.status_code == 200, response.get_json()
+    return [item['name'] for item in response.get_json()['data']['items']]
+
+def test_backend_uses_migrated_table(fts):
+    assert isinstance(fts, SqliteFtsBackend)
+
+def test_name_match_ranks_first(client, workflows):
+    # 名称权重高于描述，未发布的工作流不出现在结果中
+    assert search(client, q='数据清洗') == ['数据清洗流程', '销售报表']
+
+def test_single_character_and_tag_match(client, workflows):
+    assert search(client, q='数据') == ['数据清洗流程', '通知推送', '销售报表']
+
+def test_prefix_match(client, workflows):
+    assert search(client, q='work') == ['Workflow automation']
+
+def test_punctuation_only_matches_nothing(client, workflows):
+    assert search(client, q='!!') == []
+
+def test_init_backfills_empty_index(app, session, fts, workflows):
+    session.execute(text(f'DELETE FROM {SqliteFtsBackend.TABLE}'))
+    session.commit()
+
+    init_search_index(app, session)
+
+    assert search(app.test_client(), q='数据清洗') == ['数据清洗流程', '销售报表']
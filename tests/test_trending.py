@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+热度排行：只收录已上架的工作流；检查点只读取各排行榜可能上榜的行
+"""
+
+import random
+import time
+from datetime import datetime
+
+import pytest
+
+from app.models.trending import TrendingScore
+from app.models.workflow import WorkflowCategory
+from app.services import trending_service
+from app.services.trending_service import TrendingIndex, _to_epoch
+
+HALF_LIFE = 3600
+CAPACITY = 3
+
+@pytest.fixture
+def workflow_id(workflow_service, user_id):
+    result = workflow_service.create_workflow({'name': 'listed', 'nodes': [{'id': 'a', 'node_type': 'start'}]}, user_id)
+    workflow_service.publish_workflow(result['id'], user_id)
+    return result['id']
+
+def ranked_ids(index, category=None):
+    return [workflow_id for workflow_id, _ in index.top(category, '7d', 20)]
+
+def test_only_listed_workflows_are_ranked(client, workflow_service, trending_index, workflow_id, user_id):
+    draft_id = workflow_service.create_workflow({'name': 'draft', 'nodes': [{'id': 'a', 'node_type': 'start'}]}, user_id)['id']
+
+    for target in (workflow_id, draft_id):
+        client.get(f'/api/workflows/{target}', headers={'X-User': str(user_id)})
+        workflow_service.record_action(target, 'share', user_id)
+        workflow_service.fork_workflow(target, user_id)
+        workflow_service.execute_workflow(target, user_id)
+
+    assert ranked_ids(trending_index) == [workflow_id]
+
+def test_not_modified_view_of_draft_is_not_ranked(client, workflow_service, trending_index, user_id):
+    draft_id = workflow_service.create_workflow({'name': 'draft'}, user_id)['id']
+    etag = client.get(f'/api/workflows/{draft_id}', headers={'X-User': str(user_id)}).headers['ETag']
+
+    response = client.get(f'/api/workflows/{draft_id}', headers={'X-User': str(user_id), 'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert ranked_ids(trending_index) == []
+
+@pytest.fixture
+def small_boards(monkeypatch):
+    monkeypatch.setattr(trending_service, 'TOP_CAPACITY', CAPACITY)
+
+def add_rows(session, now, specs):
+    """specs: [(workflow_id, 分类, 表中分数, 距今秒数)]"""
+    session.add_all([
+        TrendingScore(workflow_id=workflow_id, category=category, time_range='7d', score=score,
+                      checkpoint_at=datetime.utcfromtimestamp(now - age))
+        for workflow_id, category, score, age in specs
+    ])
+    session.commit()
+
+def test_restore_reads_each_board_top(session, small_boards):
+    now = time.time()
+    # 表中分数高但早已衰减的行，排在表中分数较低、刚更新的行之后
+    add_rows(session, now, [
+        (1, WorkflowCategory.AI_ML, 100.0, 10 * HALF_LIFE),
+        (2, WorkflowCategory.AI_ML, 90.0, 10 * HALF_LIFE),
+        (3, WorkflowCategory.AI_ML, 80.0, 10 * HALF_LIFE),
+        (4, WorkflowCategory.AI_ML, 5.0, 0),
+        (5, WorkflowCategory.AI_ML, 4.0, 0),
+        (6, WorkflowCategory.OTHER, 3.0, 0),
+        (7, WorkflowCategory.OTHER, 0.5, 0),
+        (8, None, 6.0, 0)
+    ])
+    index = TrendingIndex({'7d': HALF_LIFE})
+
+    index.restore(session)
+
+    assert ranked_ids(index, WorkflowCategory.AI_ML) == [4, 5, 1]
+    assert ranked_ids(index, WorkflowCategory.OTHER) == [6, 7]
+    assert ranked_ids(index) == [8, 4, 5]
+
+def test_checkpoint_matches_full_scan(session, small_boards):
+    now = time.time()
+    generator = random.Random(7)
+    categories = [WorkflowCategory.AI_ML, WorkflowCategory.OTHER, None]
+    add_rows(session, now, [
+        (workflow_id, generator.choice(categories), generator.uniform(1, 100), generator.uniform(0, 5 * HALF_LIFE))
+        for workflow_id in range(1, 61)
+    ])
+    index = TrendingIndex({'7d': HALF_LIFE})
+    index.restore(session)
+    index.record_event(61, WorkflowCategory.OTHER, 'fork')
+
+    index.checkpoint(session)
+
+    def decayed(row):
+        return row.score * 2 ** (-(now - _to_epoch(row.checkpoint_at)) / HALF_LIFE)
+
+    rows = session.query(TrendingScore).all()
+    for category in (None, WorkflowCategory.AI_ML, WorkflowCategory.OTHER):
+        board = [row for row in rows if category is None or row.category == category]
+        expected = [row.workflow_id for row in sorted(board, key=decayed, reverse=True)[:CAPACITY]]
+        assert ranked_ids(index, category) == expected
+
+def test_checkpoint_does_not_read_whole_table(session, small_boards):
+    now = time.time()
+    add_rows(session, now, [(workflow_id, WorkflowCategory.AI_ML, float(workflow_id), 0) for workflow_id in range(1, 51)])
+    index = TrendingIndex({'7d': HALF_LIFE})
+    index.restore(session)
+    index.record_event(7, WorkflowCategory.AI_ML, 'view')
+
+    index.checkpoint(session)
+
+    # 只读回各榜前 3 名和本次合并的工作流 7
+    assert ranked_ids(index) == [50, 49, 48]
+    assert set(index._boards['7d'][None].scores) == {50, 49, 48, 7}
+
+def test_checkpoint_expires_decayed_rows(session):
+    now = time.time()
+    add_rows(session, now, [
+        (1, None, 1.0, 20 * HALF_LIFE),
+        (2, None, 100.0, 5 * HALF_LIFE),
+        (3, None, 50.0, 0)
+    ])
+    index = TrendingIndex({'7d': HALF_LIFE})
+
+    index.checkpoint(session)
+
+    assert sorted(row.workflow_id for row in session.query(TrendingScore).all()) == [2, 3]
+    assert ranked_ids(index) == [3, 2]
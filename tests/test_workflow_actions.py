@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+点赞、分享和浏览的去重
+"""
+
+import pytest
+
+from app.models.workflow import WorkflowLike
+
+@pytest.fixture
+def workflow_id(workflow_service, user_id):
+    result = workflow_service.create_workflow({'name': 'actions', 'nodes': [{'id': 'a', 'node_type': 'start'}]}, user_id)
+    workflow_service.publish_workflow(result['id'], user_id)
+    return result['id']
+
+def act(client, workflow_id, action, **headers):
+    return client.post(f'/api/workflows/{workflow_id}/actions', json={'action': action}, headers=headers)
+
+def stats(client, session, stats_buffer, workflow_id):
+    stats_buffer.flush(session)
+    return client.get(f'/api/workflows/{workflow_id}/stats').get_json()['data']
+
+def test_like_is_idempotent_per_user(client, session, stats_buffer, workflow_id, user_id, other_user_id):
+    results = [
+        act(client, workflow_id, 'like', **{'X-User': str(viewer)}).get_json()['data']['accepted']
+        for viewer in (user_id, user_id, other_user_id, user_id)
+    ]
+
+    assert results == [True, False, True, False]
+    assert session.query(WorkflowLike).filter_by(workflow_id=workflow_id).count() == 2
+    assert stats(client, session, stats_buffer, workflow_id)['like_count'] == 2
+
+def test_like_survives_dedup_reset(client, session, stats_buffer, workflow_id, user_id):
+    assert act(client, workflow_id, 'like', **{'X-User': str(user_id)}).get_json()['data']['accepted']
+
+    # 去重窗口过期或进程重启后，数据库中的点赞行仍然阻止重复计数
+    stats_buffer.configure(0)
+
+    assert not act(client, workflow_id, 'like', **{'X-User': str(user_id)}).get_json()['data']['accepted']
+    assert stats(client, session, stats_buffer, workflow_id)['like_count'] == 1
+
+def test_anonymous_like_is_rejected(client, workflow_id):
+    response = act(client, workflow_id, 'like', **{'X-Session-ID': 's1'})
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == '点赞需要登录'
+
+def test_anonymous_share_is_deduplicated_by_session(client, session, stats_buffer, workflow_id):
+    for session_id in ('s1', 's1', 's2'):
+        act(client, workflow_id, 'share', **{'X-Session-ID': session_id})
+
+    assert stats(client, session, stats_buffer, workflow_id)['share_count'] == 2
+
+def test_clients_behind_one_address_are_counted_separately(client, session, stats_buffer, workflow_id):
+    # 测试客户端的地址都是 127.0.0.1，相当于同一 NAT 出口
+    for user_agent in ('Firefox', 'Chrome', 'Firefox'):
+        client.get(f'/api/workflows/{workflow_id}', headers={'User-Agent': user_agent})
+
+    assert stats(client, session, stats_buffer, workflow_id)['view_count'] == 2
+
+def test_session_id_does_not_collide_with_user_id(client, session, stats_buffer, workflow_id, user_id):
+    client.get(f'/api/workflows/{workflow_id}', headers={'X-User': str(user_id)})
+    client.get(f'/api/workflows/{workflow_id}', headers={'X-Session-ID': str(user_id)})
+
+    assert stats(client, session, stats_buffer, workflow_id)['view_count'] == 2
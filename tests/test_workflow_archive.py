@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流归档导入
+"""
+
+import gzip
+import json
+
+import pytest
+
+from app.models.template import WorkflowTemplate
+from app.models.user import User, UserRole
+from app.models.workflow import Workflow
+
+TEMPLATE_DATA = {
+    'nodes': [
+        {'id': 'start', 'type': 'start', 'data': {'label': '开始'}},
+        {'id': 'end', 'type': 'end', 'data': {'label': '结束'}}
+    ],
+    'edges': [{'source': 'start', 'target': 'end'}]
+}
+
+@pytest.fixture
+def admin_id(session):
+    admin = User(username='admin', email='admin@example.com', password_hash='x', role=UserRole.ADMIN)
+    session.add(admin)
+    session.commit()
+    return admin.id
+
+def archive(*records):
+    lines = [{'format': 'vwb-archive', 'version': 1}, *records]
+    return gzip.compress(''.join(json.dumps(line) + '\n' for line in lines).encode('utf-8'))
+
+def template_record(**fields):
+    return {'kind': 'template', 'ref': 1, 'name': 'T', 'template_data': TEMPLATE_DATA, **fields}
+
+def post_archive(client, user_id, body):
+    return client.post(
+        '/api/workflows/import', data=body, headers={'X-User': str(user_id), 'Content-Encoding': 'gzip'}
+    )
+
+def test_imports_workflow(client, session, user_id):
+    response = post_archive(client, user_id, archive({
+        'kind': 'workflow', 'ref': 7, 'name': 'W',
+        'graph': {'nodes': [{'node_type': 'start'}, {'node_type': 'end'}], 'connections': [{'source': 0, 'target': 1}]}
+    }))
+
+    assert response.status_code == 201
+    workflow = session.get(Workflow, response.get_json()['data']['workflow_ids']['7'])
+    assert workflow.user_id == user_id
+    assert workflow.is_public is False
+
+def test_template_import_requires_admin(client, session, user_id):
+    response = post_archive(client, user_id, archive(template_record(is_public=True)))
+
+    assert response.status_code == 400
+    assert session.query(WorkflowTemplate).count() == 0
+
+def test_imported_templates_are_private_and_not_featured(client, session, admin_id):
+    response = post_archive(client, admin_id, archive(
+        template_record(ref=1, is_featured=True),
+        template_record(ref=2, name='T2', is_public=True, is_featured=True)
+    ))
+
+    assert response.status_code == 201
+    ids = response.get_json()['data']['template_ids']
+    first, second = session.get(WorkflowTemplate, ids['1']), session.get(WorkflowTemplate, ids['2'])
+    assert (first.is_public, first.is_featured) == (False, False)
+    assert (second.is_public, second.is_featured) == (True, False)
+    assert first.author_id == admin_id
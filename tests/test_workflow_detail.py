@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流详情的条件请求与统计计数
+"""
+
+import pytest
+
+@pytest.fixture
+def workflow_id(workflow_service, user_id):
+    result = workflow_service.create_workflow({
+        'name': 'detail',
+        'nodes': [{'id': 'a', 'node_type': 'start'}, {'id': 'b', 'node_type': 'end'}],
+        'connections': [{'source': 'a', 'target': 'b'}]
+    }, user_id)
+    workflow_service.publish_workflow(result['id'], user_id)
+    return result['id']
+
+def test_etag_ignores_counter_flushes(client, session, workflow_id, stats_buffer):
+    response = client.get(f'/api/workflows/{workflow_id}', headers={'X-Session-ID': 'a'})
+    etag = response.headers['ETag']
+    assert etag.startswith('W/')
+
+    client.get(f'/api/workflows/{workflow_id}', headers={'X-Session-ID': 'b'})
+    assert stats_buffer.flush(session) == 1
+
+    response = client.get(f'/api/workflows/{workflow_id}', headers={'X-Session-ID': 'c', 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+def test_etag_changes_with_workflow(client, workflow_service, workflow_id, user_id):
+    etag = client.get(f'/api/workflows/{workflow_id}').headers['ETag']
+
+    workflow_service.update_workflow(workflow_id, {'description': 'changed'}, user_id)
+
+    response = client.get(f'/api/workflows/{workflow_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_stats_resource_is_short_lived(app, client, session, workflow_id, stats_buffer):
+    for viewer in ('a', 'b', 'a'):
+        client.get(f'/api/workflows/{workflow_id}', headers={'X-Session-ID': viewer})
+    stats_buffer.flush(session)
+
+    response = client.get(f'/api/workflows/{workflow_id}/stats')
+
+    assert response.status_code == 200
+    assert response.get_json()['data']['view_count'] == 2
+    assert response.headers['Cache-Control'] == f"public, max-age={app.config['STATS_MAX_AGE']}"
+    assert 'ETag' not in response.headers
+
+def test_stats_of_private_workflow(client, workflow_service, user_id, other_user_id):
+    workflow_id = workflow_service.create_workflow({'name': 'draft'}, user_id)['id']
+
+    own = client.get(f'/api/workflows/{workflow_id}/stats', headers={'X-User': str(user_id)})
+    other = client.get(f'/api/workflows/{workflow_id}/stats', headers={'X-User': str(other_user_id)})
+
+    assert own.status_code == 200
+    assert own.headers['Cache-Control'].startswith('private, ')
+    assert other.status_code == 404
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流图增量修改（PATCH /graph）与复制品物化
+"""
+
+import pytest
+
+from app.models.node import Node, Connection
+
+def create_chain(workflow_service, user_id):
+    """创建 start -> llm -> end 的工作流，返回 (工作流ID, 版本号, {节点类型: 节点ID})"""
+    result = workflow_service.create_workflow({
+        'name': 'chain',
+        'nodes': [
+            {'id': 'a', 'node_type': 'start'},
+            {'id': 'b', 'node_type': 'llm'},
+            {'id': 'c', 'node_type': 'end'}
+        ],
+        'connections': [{'source': 'a', 'target': 'b'}, {'source': 'b', 'target': 'c'}]
+    }, user_id)
+    return result['id'], result['version'], {node['node_type']: node['id'] for node in result['nodes']}
+
+def patch(client, workflow_id, user_id, version, operations):
+    return client.patch(
+        f'/api/workflows/{workflow_id}/graph',
+        headers={'X-User': str(user_id)},
+        json={'version': version, 'operations': operations}
+    )
+
+def get_detail(client, workflow_id, user_id, etag=None):
+    headers = {'X-User': str(user_id)}
+    if etag:
+        headers['If-None-Match'] = etag
+    return client.get(f'/api/workflows/{workflow_id}', headers=headers)
+
+def edges(session, workflow_id):
+    return {
+        (connection.source_node_id, connection.target_node_id)
+        for connection in session.query(Connection).filter(Connection.workflow_id == workflow_id)
+    }
+
+class TestPatchGraph:
+
+    def test_resolves_temp_ids(self, client, session, workflow_service, user_id):
+        workflow_id, version, nodes = create_chain(workflow_service, user_id)
+
+        response = patch(client, workflow_id, user_id, version, [
+            {'op': 'add', 'type': 'node', 'id': 'tmp-1', 'data': {'node_type': 'http', 'name': 'H'}},
+            {'op': 'add', 'type': 'connection', 'id': 'tmp-c1',
+             'data': {'source_node_id': 'tmp-1', 'target_node_id': nodes['end']}},
+            {'op': 'update', 'type': 'node', 'id': nodes['llm'], 'data': {'position': {'x': 5, 'y': 7}}}
+        ])
+
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        assert data['version'] != version
+        new_node_id = data['node_ids']['tmp-1']
+        new_connection = session.get(Connection, data['connection_ids']['tmp-c1'])
+        assert session.get(Node, new_node_id).node_type == 'http'
+        assert (new_connection.source_node_id, new_connection.target_node_id) == (new_node_id, nodes['end'])
+        llm = session.get(Node, nodes['llm'])
+        assert (llm.position_x, llm.position_y) == (5, 7)
+
+    def test_remove_node_cascades_connections(self, client, session, workflow_service, user_id):
+        workflow_id, version, nodes = create_chain(workflow_service, user_id)
+
+        response = patch(client, workflow_id, user_id, version, [
+            {'op': 'remove', 'type': 'node', 'id': nodes['llm']}
+        ])
+
+        assert response.status_code == 200
+        assert session.get(Node, nodes['llm']) is None
+        assert edges(session, workflow_id) == set()
+        assert {node.id for node in session.query(Node).filter(Node.workflow_id == workflow_id)} == {
+            nodes['start'], nodes['end']
+        }
+
+    def test_stale_version_conflicts(self, client, session, workflow_service, user_id):
+        workflow_id, version, nodes = create_chain(workflow_service, user_id)
+        operations = [{'op': 'update', 'type': 'node', 'id': nodes['llm'], 'data': {'name': 'renamed'}}]
+
+        first = patch(client, workflow_id, user_id, version, operations)
+        second = patch(client, workflow_id, user_id, version, [
+            {'op': 'remove', 'type': 'node', 'id': nodes['start']}
+        ])
+
+        assert first.status_code == 200
+        assert second.status_code == 409
+        assert second.get_json()['current_version'] == first.get_json()['data']['version']
+        # 被拒绝的补丁整体不生效
+        assert session.get(Node, nodes['start']) is not None
+
+    @pytest.mark.parametrize('operations', [
+        [{'op': 'update', 'type': 'node', 'id': 999999, 'data': {}}],
+        [{'op': 'add', 'type': 'connection', 'data': {'source': 'missing', 'target': 1}}],
+        [{'op': 'move', 'type': 'node'}],
+        []
+    ])
+    def test_rejects_invalid_operations(self, client, workflow_service, user_id, operations):
+        workflow_id, version, _ = create_chain(workflow_service, user_id)
+
+        response = patch(client, workflow_id, user_id, version, operations)
+
+        assert response.status_code == 400
+        assert get_detail(client, workflow_id, user_id).get_json()['data']['version'] == version
+
+class TestForkMaterialization:
+
+    @pytest.fixture
+    def fork(self, workflow_service, user_id):
+        """已发布工作流的复制品（未物化），同样发布以便其他用户执行"""
+        source_id, _, _ = create_chain(workflow_service, user_id)
+        workflow_service.publish_workflow(source_id, user_id)
+        fork_id = workflow_service.fork_workflow(source_id, user_id)['id']
+        workflow_service.publish_workflow(fork_id, user_id)
+        return fork_id
+
+    def test_patch_translates_placeholder_ids(self, client, session, fork, user_id):
+        detail = get_detail(client, fork, user_id).get_json()['data']
+        placeholders = {node['node_type']: node['id'] for node in detail['nodes']}
+        assert all(node_id < 0 for node_id in placeholders.values())
+
+        response = patch(client, fork, user_id, detail['version'], [
+            {'op': 'remove', 'type': 'node', 'id': placeholders['llm']},
+            {'op': 'add', 'type': 'connection', 'id': 'tmp-c1',
+             'data': {'source_node_id': placeholders['start'], 'target_node_id': placeholders['end']}}
+        ])
+
+        assert response.status_code == 200
+        node_ids = response.get_json()['data']['node_ids']
+        start, end = node_ids[str(placeholders['start'])], node_ids[str(placeholders['end'])]
+        assert str(placeholders['llm']) not in node_ids
+        assert edges(session, fork) == {(start, end)}
+
+    def test_execution_by_other_user_rotates_etag_and_version(self, client, workflow_service, fork, user_id,
+                                                              other_user_id):
+        response = get_detail(client, fork, user_id)
+        etag, stale = response.headers['ETag'], response.get_json()['data']
+
+        workflow_service.execute_workflow(fork, other_user_id)
+
+        response = get_detail(client, fork, user_id, etag)
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        fresh = response.get_json()['data']
+        assert fresh['version'] != stale['version']
+        assert all(node['id'] > 0 for node in fresh['nodes'])
+
+        # 按旧版本号和占位ID提交的修改得到版本冲突，而不是找不到节点
+        response = patch(client, fork, user_id, stale['version'], [
+            {'op': 'remove', 'type': 'node', 'id': stale['nodes'][0]['id']}
+        ])
+        assert response.status_code == 409
+        assert response.get_json()['current_version'] == fresh['version']
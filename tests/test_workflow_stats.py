@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流统计的增量维护
+"""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+from app.models.workflow import WorkflowStats
+
+ROOT = Path(__file__).resolve().parent.parent
+MIGRATIONS_DIR = ROOT / 'migrations'
+
+def load_migration_manager():
+    """迁移管理器是独立脚本（app/database.py 与 app/database/ 同名，不能按包导入）"""
+    spec = importlib.util.spec_from_file_location('migration_manager', ROOT / 'app' / 'database' / 'migration_manager.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.MigrationManager
+
+@pytest.fixture
+def migrated_row(tmp_path):
+    """迁移 008 之前就存在的统计行（10 次执行，平均 2 秒），迁移后读出"""
+    manager = load_migration_manager()(f'sqlite:///{tmp_path / "stats.db"}', str(MIGRATIONS_DIR))
+    with manager.engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE schema_migrations (version VARCHAR(50) PRIMARY KEY, description VARCHAR(255))'
+        ))
+        conn.execute(text(
+            'CREATE TABLE workflow_stats (id INTEGER PRIMARY KEY, workflow_id INTEGER NOT NULL, '
+            'view_count INTEGER, like_count INTEGER, fork_count INTEGER, execution_count INTEGER, '
+            'success_rate FLOAT, avg_execution_time FLOAT, updated_at DATETIME)'
+        ))
+        conn.execute(text(
+            'INSERT INTO workflow_stats (workflow_id, execution_count, success_rate, avg_execution_time) '
+            'VALUES (1, 10, 80.0, 2.0)'
+        ))
+
+    migration = next(item for item in manager.get_available_migrations() if item['version'] == '008')
+    assert manager.apply_migration(migration)
+
+    with manager.engine.connect() as conn:
+        row = conn.execute(text(
+            'SELECT execution_count, success_count, success_rate, avg_execution_time, '
+            'timed_execution_count, duration_sketch FROM workflow_stats'
+        )).mappings().one()
+    return WorkflowStats(**row)
+
+def test_migration_backfills_counts(migrated_row):
+    assert migrated_row.success_count == 8
+    assert migrated_row.timed_execution_count == 10
+    assert migrated_row.duration_sketch is None
+
+def test_first_execution_after_migration_keeps_history(migrated_row):
+    migrated_row.record_execution(True, 13.0)
+
+    assert migrated_row.execution_count == 11
+    assert migrated_row.success_rate == pytest.approx(81.82)
+    # (10 * 2 + 13) / 11
+    assert migrated_row.avg_execution_time == pytest.approx(3.0)
+    assert migrated_row.duration_p50 == pytest.approx(13.0, rel=0.02)
+
+def test_running_mean_of_new_row():
+    stats = WorkflowStats(execution_count=0, success_count=0, avg_execution_time=0.0, timed_execution_count=0)
+
+    for duration in (1.0, 2.0, 6.0):
+        stats.record_execution(True, duration)
+    stats.record_execution(False)
+
+    assert stats.execution_count == 4
+    assert stats.timed_execution_count == 3
+    assert stats.avg_execution_time == pytest.approx(3.0)
+    assert stats.success_rate == pytest.approx(75.0)